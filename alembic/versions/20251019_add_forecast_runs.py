@@ -0,0 +1,44 @@
+"""add delta-encoded forecast_runs table
+
+Revision ID: 20251019_forecast_runs
+Revises: 20251019_packed_hourly
+Create Date: 2025-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20251019_forecast_runs"
+down_revision = "20251019_packed_hourly"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "forecast_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("station_id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(length=20), nullable=False),
+        sa.Column("run_time", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("hourly_start", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("hours", sa.Integer(), nullable=False),
+        sa.Column("base_id", sa.Integer(), nullable=True),
+        sa.Column("keyframe_id", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["station_id"], ["weather_stations.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_forecast_runs_station_source_id",
+        "forecast_runs",
+        ["station_id", "source", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_forecast_runs_station_source_id", table_name="forecast_runs")
+    op.drop_table("forecast_runs")
@@ -0,0 +1,36 @@
+"""add packed hourly series columns to weather_forecasts
+
+Revision ID: 20251019_packed_hourly
+Revises: 20251019_registry_versions
+Create Date: 2025-10-19 11:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20251019_packed_hourly"
+down_revision = "20251019_registry_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "weather_forecasts",
+        sa.Column("hourly_start", postgresql.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "weather_forecasts", sa.Column("hourly_values", sa.LargeBinary(), nullable=True)
+    )
+    op.add_column(
+        "weather_forecasts", sa.Column("hourly_spread", sa.LargeBinary(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("weather_forecasts", "hourly_spread")
+    op.drop_column("weather_forecasts", "hourly_values")
+    op.drop_column("weather_forecasts", "hourly_start")
@@ -0,0 +1,31 @@
+"""add registry_versions table
+
+Revision ID: 20251019_registry_versions
+Revises: 20251019_station_time_idx
+Create Date: 2025-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20251019_registry_versions"
+down_revision = "20251019_station_time_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "registry_versions",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    # Seeded here so workers only ever UPDATE the counter
+    op.execute("INSERT INTO registry_versions (name, version) VALUES ('stations', 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("registry_versions")
@@ -0,0 +1,31 @@
+"""add scheduler_nodes membership table
+
+Revision ID: 20251019_scheduler_nodes
+Revises: 20251019_forecast_runs
+Create Date: 2025-10-19 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20251019_scheduler_nodes"
+down_revision = "20251019_forecast_runs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduler_nodes",
+        sa.Column("node_id", sa.String(length=100), nullable=False),
+        sa.Column("started_at", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("heartbeat_at", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("node_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheduler_nodes")
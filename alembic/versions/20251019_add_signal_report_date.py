@@ -0,0 +1,33 @@
+"""add tmax_calculations.date_iso
+
+Revision ID: 20251019_signal_date
+Revises: 20251019_station_daily
+Create Date: 2025-10-19 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20251019_signal_date"
+down_revision = "20251019_station_daily"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing signals keep NULL and are reconciled by their creation time
+    op.add_column(
+        "tmax_calculations", sa.Column("date_iso", sa.String(length=10), nullable=True)
+    )
+    op.create_index(
+        "ix_tmax_calculations_station_date",
+        "tmax_calculations",
+        ["station_id", "date_iso"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tmax_calculations_station_date", table_name="tmax_calculations")
+    op.drop_column("tmax_calculations", "date_iso")
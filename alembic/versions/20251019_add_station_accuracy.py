@@ -0,0 +1,39 @@
+"""add station_accuracy aggregates and wethr_highs date index
+
+Revision ID: 20251019_station_accuracy
+Revises: 20251019_scheduler_nodes
+Create Date: 2025-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20251019_station_accuracy"
+down_revision = "20251019_scheduler_nodes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "station_accuracy",
+        sa.Column("station_id", sa.Integer(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("sum_error", sa.Float(), nullable=False),
+        sa.Column("sum_abs_error", sa.Float(), nullable=False),
+        sa.Column("sum_sq_error", sa.Float(), nullable=False),
+        sa.Column("within_1f", sa.Integer(), nullable=False),
+        sa.Column("last_date", sa.String(length=10), nullable=True),
+        sa.Column("updated_at", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["station_id"], ["weather_stations.id"]),
+        sa.PrimaryKeyConstraint("station_id"),
+    )
+    op.create_index("ix_wethr_highs_date", "wethr_highs", ["date_iso"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wethr_highs_date", table_name="wethr_highs")
+    op.drop_table("station_accuracy")
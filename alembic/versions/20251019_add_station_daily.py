@@ -0,0 +1,44 @@
+"""add station_daily rollups
+
+Existing history is rolled up by scripts/rebuild_daily.py after upgrading.
+
+Revision ID: 20251019_station_daily
+Revises: 20251019_station_accuracy
+Create Date: 2025-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "20251019_station_daily"
+down_revision = "20251019_station_accuracy"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "station_daily",
+        sa.Column("station_id", sa.Integer(), nullable=False),
+        sa.Column("date_iso", sa.String(length=10), nullable=False),
+        sa.Column("model_temp", sa.Float(), nullable=True),
+        sa.Column("model_at", postgresql.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("wethr_high", sa.Float(), nullable=True),
+        sa.Column("wethr_at", postgresql.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("signals", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Float(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.Column("size", sa.Float(), nullable=True),
+        sa.Column("signal_at", postgresql.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("observed_high", sa.Float(), nullable=True),
+        sa.Column("updated_at", postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["station_id"], ["weather_stations.id"]),
+        sa.PrimaryKeyConstraint("station_id", "date_iso"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("station_daily")
@@ -0,0 +1,62 @@
+"""add (station_id, time) indexes and widen station code
+
+Revision ID: 20251019_station_time_idx
+Revises: 20250622_add_wethr_highs
+Create Date: 2025-10-19 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20251019_station_time_idx"
+down_revision = "20250622_add_wethr_highs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The model has always declared code as String(10); the initial migration used 5
+    op.alter_column(
+        "weather_stations",
+        "code",
+        type_=sa.String(10),
+        existing_type=sa.String(5),
+        existing_nullable=False,
+    )
+
+    # Every hot query filters on station_id and orders/ranges on a time column
+    op.create_index(
+        "ix_weather_forecasts_station_forecast_time",
+        "weather_forecasts",
+        ["station_id", "forecast_time"],
+    )
+    op.create_index(
+        "ix_tmax_calculations_station_created",
+        "tmax_calculations",
+        ["station_id", "created_at"],
+    )
+    op.create_index(
+        "ix_wethr_highs_station_date",
+        "wethr_highs",
+        ["station_id", "date_iso"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wethr_highs_station_date", table_name="wethr_highs")
+    op.drop_index(
+        "ix_tmax_calculations_station_created", table_name="tmax_calculations"
+    )
+    op.drop_index(
+        "ix_weather_forecasts_station_forecast_time", table_name="weather_forecasts"
+    )
+
+    op.alter_column(
+        "weather_stations",
+        "code",
+        type_=sa.String(5),
+        existing_type=sa.String(10),
+        existing_nullable=False,
+    )
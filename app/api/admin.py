@@ -0,0 +1,82 @@
+import secrets
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.governor import governor
+from app.core.loopmon import ProfileBusy, loop_monitor, sample_profile
+from app.core.schedule_loader import load_station_times
+from app.core.settings import get_settings
+from app.services.sharding import shard
+from app.services.warmup import slot_latency, warm_slots
+from app.services.write_behind import write_behind
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Admin routes are off unless ADMIN_TOKEN is set, then require it."""
+    token = get_settings().admin_token
+    if not token:
+        raise HTTPException(404, "Not Found")
+    # Constant-time comparison so response timing does not leak the token
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token.encode(), token.encode()
+    ):
+        raise HTTPException(403, "Invalid admin token")
+
+
+admin_router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@admin_router.get("/loop")
+async def loop_stats() -> dict[str, Any]:
+    """Event-loop lag percentiles and the most recent slow callbacks with stacks."""
+    return loop_monitor.stats()
+
+
+@admin_router.get("/resources")
+async def resource_stats() -> dict[str, Any]:
+    """Budget, usage, queue depth and admission wait per scheduled-job resource."""
+    return {**governor.stats(), "write_behind": write_behind.stats()}
+
+
+@admin_router.get("/shards")
+async def shard_status() -> dict[str, Any]:
+    """This node's view of the scheduler ring and the stations it owns."""
+    return {
+        "enabled": shard.enabled,
+        "node_id": shard.node_id,
+        "nodes": list(shard.ring.nodes),
+        "last_heartbeat": shard.last_heartbeat,
+        "owned_stations": shard.owned(load_station_times()),
+    }
+
+
+@admin_router.get("/slots")
+async def slot_stats() -> dict[str, Any]:
+    """Slot-to-signal latency of wethr.net runs, warm vs cold, and warm-ups waiting."""
+    return {"latency": slot_latency.stats(), "warmup": warm_slots.stats()}
+
+
+@admin_router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+) -> PlainTextResponse:
+    """Sample the running process and return collapsed stacks.
+
+    Feed the file to ``flamegraph.pl`` or open it in speedscope. Sampling runs
+    in a worker thread, so the loop keeps serving while the profile is taken.
+    """
+    try:
+        folded = await sample_profile(seconds, interval_ms / 1000)
+    except ProfileBusy:
+        raise HTTPException(409, "A profile is already running")
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+    )
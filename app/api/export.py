@@ -0,0 +1,36 @@
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.db.database import AsyncReadSessionLocal
+from app.services.export import EXPORTS, arrow_ipc_stream
+
+# Mounted only when EXPORT_ENDPOINT_ENABLED is set (see app.main)
+export_router = APIRouter(prefix="/export", tags=["export"])
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+@export_router.get("/{table}.arrow")
+async def export_arrow(
+    table: str,
+    since_id: int = 0,
+    station_id: int | None = None,
+) -> StreamingResponse:
+    """Stream a table as Arrow IPC, optionally only rows with id > since_id.
+
+    ``weather_forecasts`` is flattened to one row per forecast hour. Read with
+    ``pyarrow.ipc.open_stream`` or ``polars.read_ipc_stream``.
+    """
+    if table not in EXPORTS:
+        raise HTTPException(404, f"Unknown table; expected one of {sorted(EXPORTS)}")
+
+    async def body() -> AsyncIterator[bytes]:
+        # The session must live as long as the stream, not the request handler
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in arrow_ipc_stream(db, table, since_id, station_id):
+                if chunk:
+                    yield chunk
+
+    return StreamingResponse(body(), media_type=ARROW_STREAM_MEDIA_TYPE)
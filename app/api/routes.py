@@ -1,23 +1,54 @@
-from datetime import datetime, timezone
-from typing import List
+import json
+from dataclasses import asdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, List
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
 
-from app.db.database import get_db
-from app.models.weather import WeatherStation, TmaxCalculation, WeatherForecast
+from app.db.database import get_db, get_read_db
+from app.models.weather import (
+    StationAccuracy,
+    StationDaily,
+    WeatherStation,
+    TmaxCalculation,
+)
 from app.api.schemas import (
     WeatherStationIn,
     WeatherStationOut,
     TmaxCalcIn,
     TmaxCalcOut,
+    ForecastEvolutionPoint,
+    NearbyStationOut,
+    StationAccuracyOut,
+    StationDailyOut,
+)
+from app.core.encoding import dumps, rows_json, schema_columns
+from app.core.response_cache import cached_json, response_cache
+from app.services.forecast_runs import forecast_evolution
+from app.services.ingest import fetch_forecast, store_forecast
+from app.services.reconcile import accuracy_summary
+from app.services.rollups import DailyRollup, day_of, station_zones
+from app.services.signals import SubscriptionLagged, broker
+from app.services.spatial import SpatialIndex
+from app.services.station_registry import (
+    StationSnapshot,
+    bump_version,
+    station_registry,
 )
-from app.services.ingest import fetch_forecast
 
 router = APIRouter(prefix="/stations", tags=["stations"])
 
+# Read paths serialize selected columns directly; rows come from our own
+# tables, so per-row model validation buys nothing
+_station_columns = schema_columns(WeatherStationOut, WeatherStation)
+_tmax_columns = schema_columns(TmaxCalcOut, TmaxCalculation)
+_daily_columns = schema_columns(StationDailyOut, StationDaily)
+
+DEFAULT_DAILY_DAYS = 31
+
 
 @router.post("/", response_model=WeatherStationOut, status_code=201)
 async def create_station(
@@ -25,25 +56,140 @@ async def create_station(
 ) -> WeatherStation:
     obj = WeatherStation(**station.model_dump())
     db.add(obj)
+    version = await bump_version(db)
     await db.commit()
     await db.refresh(obj)
+    station_registry.upsert(obj, version)
+    response_cache.invalidate("stations")
     return obj
 
 
 @router.get("/", response_model=List[WeatherStationOut])
-async def list_stations(db: AsyncSession = Depends(get_db)) -> List[WeatherStation]:
-    res = await db.execute(select(WeatherStation))
-    return list(res.scalars().all())
+async def list_stations(
+    request: Request, db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    async def render() -> bytes:
+        res = await db.execute(select(*_station_columns).order_by(WeatherStation.id))
+        return rows_json(res)
+
+    return await cached_json(request, ["stations"], render)
+
+
+def _nearby_json(hits: list[tuple[StationSnapshot, float]]) -> Response:
+    return Response(
+        content=dumps([{**asdict(s), "distance_km": round(km, 3)} for s, km in hits]),
+        media_type="application/json",
+    )
+
+
+async def _spatial_index(db: AsyncSession) -> SpatialIndex:
+    if not len(station_registry):
+        await station_registry.load(db)
+    return station_registry.spatial_index()
+
+
+# Declared before /{station_id} so the literal paths win
+@router.get("/nearest", response_model=List[NearbyStationOut])
+async def nearest_stations(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """The ``k`` stations closest to a point by great-circle distance."""
+    index = await _spatial_index(db)
+    return _nearby_json(index.nearest(lat, lon, k))
+
+
+@router.get("/within", response_model=List[NearbyStationOut])
+async def stations_within(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=20_000),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """Stations within ``radius_km`` of a point, nearest first."""
+    index = await _spatial_index(db)
+    return _nearby_json(index.within(lat, lon, radius_km))
 
 
 @router.get("/{station_id}", response_model=WeatherStationOut)
 async def get_station(
-    station_id: int, db: AsyncSession = Depends(get_db)
-) -> WeatherStation:
-    obj = await db.get(WeatherStation, station_id)
-    if not obj:
+    request: Request, station_id: int, db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    async def render() -> bytes:
+        res = await db.execute(
+            select(*_station_columns).where(WeatherStation.id == station_id)
+        )
+        row = res.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Station not found")
+        return dumps(row._asdict())
+
+    return await cached_json(request, ["stations"], render)
+
+
+@router.get(
+    "/{station_id}/forecast-evolution", response_model=List[ForecastEvolutionPoint]
+)
+async def get_forecast_evolution(
+    station_id: int,
+    valid_time: datetime,
+    source: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> list[dict[str, object]]:
+    """How the forecast for ``valid_time`` changed across successive model runs."""
+    if not await db.get(WeatherStation, station_id):
         raise HTTPException(status_code=404, detail="Station not found")
-    return obj
+    return await forecast_evolution(db, station_id, valid_time, source)
+
+
+@router.get("/{station_id}/accuracy", response_model=StationAccuracyOut)
+async def get_station_accuracy(
+    station_id: int, db: AsyncSession = Depends(get_read_db)
+) -> dict[str, object]:
+    """Forecast error of reconciled signals (one primary-key read)."""
+    if not await db.get(WeatherStation, station_id):
+        raise HTTPException(status_code=404, detail="Station not found")
+    return accuracy_summary(await db.get(StationAccuracy, station_id))
+
+
+def daily_query(station_id: int, start: date, end: date) -> Select[Any]:
+    """Rollup days ``start``..``end`` inclusive; a range scan of the station_daily key."""
+    return (
+        select(*_daily_columns)
+        .where(
+            StationDaily.station_id == station_id,
+            StationDaily.date_iso >= start.isoformat(),
+            StationDaily.date_iso <= end.isoformat(),
+        )
+        .order_by(StationDaily.date_iso)
+    )
+
+
+@router.get("/{station_id}/daily", response_model=List[StationDailyOut])
+async def get_station_daily(
+    station_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """Per-station-day summary of forecasts, wethr highs and signals.
+
+    Days are the station's local standard-time calendar days. Defaults to the
+    last 31 days. Days with no activity are omitted.
+    """
+    station = await db.get(WeatherStation, station_id)
+    if not station:
+        raise HTTPException(status_code=404, detail="Station not found")
+    end = end or date.fromisoformat(
+        day_of(datetime.now(timezone.utc), station.timezone)
+    )
+    start = start or end - timedelta(days=DEFAULT_DAILY_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start is after end")
+    res = await db.execute(daily_query(station_id, start, end))
+    return Response(content=rows_json(res), media_type="application/json")
 
 
 @router.post("/ingest/{station_code}", status_code=202, tags=["ingest"])
@@ -51,24 +197,13 @@ async def ingest_single(
     station_code: str, db: AsyncSession = Depends(get_db)
 ) -> dict[str, str]:
     """Manually trigger data ingestion for a single station."""
-    stmt = select(WeatherStation).where(WeatherStation.code == station_code.upper())
-    res = await db.execute(stmt)
-    station = res.scalar_one_or_none()
+    station = await station_registry.resolve(db, station_code)
     if not station:
         raise HTTPException(404, "Station not found")
 
-    async with httpx.AsyncClient(http2=True) as client:
-        data = await fetch_forecast(client, station)
+    data = await fetch_forecast(station)
 
-    wf = WeatherForecast(
-        station_id=station.id,
-        source="OpenMeteo",
-        forecast_time=datetime.now(timezone.utc),
-        valid_time=datetime.now(timezone.utc),
-        temperature=0.0,  # Will be populated from data processing
-        raw_data=data,
-    )
-    db.add(wf)
+    await store_forecast(db, station, data)
     await db.commit()
     return {"status": "queued"}
 
@@ -81,22 +216,96 @@ tmax_router = APIRouter(prefix="/tmax", tags=["tmax"])
 async def create_tmax(
     calc: TmaxCalcIn, db: AsyncSession = Depends(get_db)
 ) -> TmaxCalculation:
-    obj = TmaxCalculation(**calc.model_dump())
+    now = datetime.now(timezone.utc)
+    zones = await station_zones(db, [calc.station_id])
+    obj = TmaxCalculation(
+        **calc.model_dump(),
+        date_iso=day_of(now, zones.get(calc.station_id, "UTC")),
+        created_at=now,
+    )
     db.add(obj)
+    await db.flush()
+    daily = DailyRollup(zones)
+    delta = obj.raw_payload.get("delta") if isinstance(obj.raw_payload, dict) else None
+    daily.signal(
+        obj.station_id, obj.created_at, delta, obj.confidence, obj.size, obj.date_iso
+    )
+    await daily.apply(db)
     await db.commit()
     await db.refresh(obj)
+    response_cache.invalidate(f"tmax:{obj.station_id}")
     return obj
 
 
+def tmax_for_station_query(station_id: int) -> Select[Any]:
+    """Signals for a station in creation order; served by ix_tmax_calculations_station_created."""
+    return (
+        select(*_tmax_columns)
+        .where(TmaxCalculation.station_id == station_id)
+        .order_by(TmaxCalculation.created_at)
+    )
+
+
 @tmax_router.get("/station/{station_id}", response_model=List[TmaxCalcOut])
 async def list_tmax_for_station(
-    station_id: int, db: AsyncSession = Depends(get_db)
-) -> List[TmaxCalculation]:
-    res = await db.execute(
-        select(TmaxCalculation).where(TmaxCalculation.station_id == station_id)
+    request: Request, station_id: int, db: AsyncSession = Depends(get_read_db)
+) -> Response:
+    async def render() -> bytes:
+        res = await db.execute(tmax_for_station_query(station_id))
+        return rows_json(res)
+
+    return await cached_json(request, [f"tmax:{station_id}"], render)
+
+
+# --- signals sub-router ---
+signals_router = APIRouter(prefix="/signals", tags=["signals"])
+
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+@signals_router.get("/stream")
+async def stream_signals(
+    request: Request,
+    station_id: List[int] = Query(default=[]),
+    last_event_id: int | None = Header(default=None),
+) -> StreamingResponse:
+    """Server-sent events for new strategy signals.
+
+    Filter with repeated ``station_id`` query params. Reconnecting clients send
+    ``Last-Event-ID`` (browsers do this automatically) to receive what they
+    missed; if that id is no longer buffered they get a ``reset`` event and
+    should refetch current signals. Consumers that fall too far behind are
+    disconnected and should reconnect to resume.
+    """
+    sub = broker.open(station_id, last_event_id)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield "retry: 2000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await sub.next(timeout=SSE_KEEPALIVE_SECONDS)
+                except SubscriptionLagged:
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                # An empty id clears the client's Last-Event-ID
+                event_id = "" if event.id is None else event.id
+                yield (
+                    f"id: {event_id}\nevent: {event.kind}\n"
+                    f"data: {json.dumps(event.data)}\n\n"
+                )
+        finally:
+            broker.close(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return list(res.scalars().all())
 
 
-# Include the tmax router
+# Include the sub-routers
 router.include_router(tmax_router)
+router.include_router(signals_router)
@@ -32,3 +32,37 @@ class TmaxCalcOut(TmaxCalcIn):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ForecastEvolutionPoint(BaseModel):
+    source: str
+    run_time: datetime
+    lead_hours: float
+    temperature: float
+
+
+class NearbyStationOut(WeatherStationOut):
+    distance_km: float
+
+
+class StationAccuracyOut(BaseModel):
+    samples: int
+    mae: Optional[float] = None
+    rmse: Optional[float] = None
+    bias: Optional[float] = None
+    hit_rate: Optional[float] = None
+    last_date: Optional[str] = None
+
+
+class StationDailyOut(BaseModel):
+    date_iso: str
+    model_temp: Optional[float] = None
+    wethr_high: Optional[float] = None
+    signals: int
+    delta: Optional[float] = None
+    confidence: Optional[float] = None
+    size: Optional[float] = None
+    observed_high: Optional[float] = None
+    model_at: Optional[datetime] = None
+    wethr_at: Optional[datetime] = None
+    signal_at: Optional[datetime] = None
@@ -0,0 +1,183 @@
+"""Admission control for scheduled work.
+
+Each heavy resource has a named budget (``browser``, ``http``, ``db``).
+A scheduler job declares what it needs and :func:`governed` admits it only
+once every budget has room; past the budget, jobs wait in FIFO order instead
+of launching another Chromium or opening another pooled connection. Budgets
+are always acquired in one canonical order so jobs needing several can never
+deadlock each other. That order puts the scarcest budget first: a job queued
+for a browser page holds nothing while it waits, so it cannot tie up the
+``db`` slots that HTTP-only jobs need.
+
+A job can also keep a slot past its own end as a :class:`Lease`: the wethr
+warm-up parks a browser page for the slot's job, and the page's browser slot
+stays taken until that job (which adopts the lease) or the warm-up sweep
+closes it.
+
+Per resource the governor reports the limit, slots in use, queue depth and
+how long admitted jobs waited (``GET /admin/resources``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, TypeVar
+
+from app.core.log import get_logger
+from app.core.settings import get_settings
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Canonical acquisition order, scarcest first
+RESOURCES = ("browser", "http", "db")
+
+
+class Lease:
+    """One budget slot held beyond the block that acquired it."""
+
+    def __init__(self, budget: Budget, waited: float) -> None:
+        self.budget = budget
+        self.waited = waited
+        self.released = False
+
+    def release(self) -> None:
+        """Give the slot back; later calls are no-ops."""
+        if not self.released:
+            self.released = True
+            self.budget._release()
+
+
+class Budget:
+    def __init__(self, name: str, limit: int, window: int = 500) -> None:
+        self.name = name
+        self.limit = limit
+        self._sem = asyncio.Semaphore(limit)
+        self.in_use = 0
+        self.queued = 0
+        self.admitted = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits: deque[float] = deque(maxlen=window)
+
+    async def lease(self) -> Lease:
+        """Take a slot that stays held until :meth:`Lease.release`."""
+        started = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.queued -= 1
+        waited = time.perf_counter() - started
+        self.in_use += 1
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._waits.append(waited)
+        return Lease(self, waited)
+
+    def _release(self) -> None:
+        self.in_use -= 1
+        self._sem.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        lease = await self.lease()
+        try:
+            yield lease.waited
+        finally:
+            lease.release()
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        ms = [w * 1000 for w in waits]
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "wait_ms_avg": (
+                round(self.wait_total * 1000 / self.admitted, 2)
+                if self.admitted
+                else None
+            ),
+            "wait_ms_p95": (
+                round(ms[max(0, int(len(ms) * 0.95) - 1)], 2) if ms else None
+            ),
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+        }
+
+
+class ResourceGovernor:
+    def __init__(self, limits: dict[str, int]) -> None:
+        unknown = set(limits) - set(RESOURCES)
+        if unknown:
+            raise ValueError(
+                f"Unknown resources {sorted(unknown)}; expected {RESOURCES}"
+            )
+        self.budgets = {name: Budget(name, limit) for name, limit in limits.items()}
+
+    @asynccontextmanager
+    async def acquire(
+        self, *resources: str, held: Mapping[str, Lease] | None = None
+    ) -> AsyncIterator[dict[str, float]]:
+        """Hold one slot of each resource; yields the wait per resource in seconds.
+
+        A resource in ``held`` is covered by that (still unreleased) lease
+        instead of a new slot; the block adopts it and releases it on exit.
+        """
+        held = held or {}
+        waits: dict[str, float] = {}
+        async with AsyncExitStack() as stack:
+            for name in sorted(set(resources) | set(held), key=RESOURCES.index):
+                if name in held:
+                    stack.callback(held[name].release)
+                    waits[name] = 0.0
+                else:
+                    waits[name] = await stack.enter_async_context(
+                        self.budgets[name].slot()
+                    )
+            yield waits
+
+    async def lease(self, resource: str) -> Lease:
+        return await self.budgets[resource].lease()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: budget.stats() for name, budget in self.budgets.items()}
+
+
+_settings = get_settings()
+governor = ResourceGovernor(
+    {
+        "db": _settings.budget_db_sessions,
+        "http": _settings.budget_http,
+        "browser": _settings.budget_browser_pages,
+    }
+)
+
+
+def governed(
+    func: Callable[..., Awaitable[T]],
+    *resources: str,
+    gov: ResourceGovernor | None = None,
+) -> Callable[..., Awaitable[T]]:
+    """Wrap a scheduler job so it runs only within the named budgets."""
+
+    @wraps(func)
+    async def run(*args: Any, **kwargs: Any) -> T:
+        async with (gov or governor).acquire(*resources) as waits:
+            if any(w > 0.001 for w in waits.values()):
+                log.info(
+                    "job admitted after queueing",
+                    extra={
+                        f"wait_ms_{k}": round(v * 1000, 1) for k, v in waits.items()
+                    },
+                )
+            return await func(*args, **kwargs)
+
+    return run
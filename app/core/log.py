@@ -0,0 +1,193 @@
+"""Structured, non-blocking logging.
+
+Every record is handed to a queue on the calling thread and written by a
+background :class:`logging.handlers.QueueListener`, so a slow or blocked
+stdout never stalls the event loop. Output is one JSON object per line.
+
+Job context (``job``, ``station``, ``slot``, ``job_id``) lives in context
+variables: everything logged inside :func:`job_scope` carries it, including
+logs from code that knows nothing about the job. High-volume messages can be
+sampled with ``extra={"sample": n}`` (keep one in ``n`` per message).
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from app.core.settings import get_settings
+
+_context: ContextVar[dict[str, Any]] = ContextVar("marlin_log_context", default={})
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+T = TypeVar("T")
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def current_context() -> dict[str, Any]:
+    return dict(_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """Copy the active job context onto each record (on the calling task)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keep one in ``sample`` records per message template; the rest are dropped."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._counters: dict[tuple[str, Any], itertools.count[int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample", None)
+        if not rate or rate <= 1:
+            return True
+        key = (record.name, record.msg)
+        seen = next(self._counters.setdefault(key, itertools.count()))
+        return seen % int(rate) == 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        doc: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                doc[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            doc["exc"] = record.exc_text
+        return json.dumps(doc, default=str)
+
+
+class _LoopSafeQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    The stock ``prepare`` runs the full formatter on the caller; here only
+    the message args and traceback are resolved so the record can cross
+    threads, and JSON encoding happens off the loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: QueueListener | None = None
+_handler: _LoopSafeQueueHandler | None = None
+
+
+def configure_logging(
+    level: str | None = None,
+    fmt: str | None = None,
+    stream: Any = None,
+) -> QueueListener:
+    """Route the root logger through a queue to a background writer."""
+    global _listener, _handler
+    settings = get_settings()
+    shutdown_logging()
+
+    sink = logging.StreamHandler(stream or sys.stdout)
+    if (fmt or settings.log_format) == "json":
+        sink.setFormatter(JsonFormatter())
+    else:
+        sink.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+
+    handler = _LoopSafeQueueHandler(queue.SimpleQueue())
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SampleFilter())
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    _handler = handler
+    root.setLevel((level or settings.log_level).upper())
+
+    _listener = QueueListener(handler.queue, sink, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the writer thread and detach the handler."""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+@asynccontextmanager
+async def job_scope(job: str, **fields: Any) -> AsyncIterator[dict[str, Any]]:
+    """Bind job context for the duration of a job and log its outcome."""
+    ctx = {**_context.get(), "job": job, "job_id": uuid.uuid4().hex[:12], **fields}
+    token = _context.set(ctx)
+    log = logging.getLogger("marlin.jobs")
+    started = time.perf_counter()
+    try:
+        yield ctx
+    except Exception:
+        log.exception(
+            "job failed",
+            extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+        )
+        raise
+    else:
+        log.info(
+            "job finished",
+            extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+        )
+    finally:
+        _context.reset(token)
+
+
+def traced(
+    func: Callable[..., Awaitable[T]], job: str, **fields: Any
+) -> Callable[..., Awaitable[T]]:
+    """Wrap a scheduler job so each run gets its own :func:`job_scope`."""
+
+    @wraps(func)
+    async def run(*args: Any, **kwargs: Any) -> T:
+        async with job_scope(job, **fields):
+            return await func(*args, **kwargs)
+
+    return run
@@ -0,0 +1,188 @@
+"""Event-loop lag monitor and sampling profiler.
+
+The scheduler, Playwright and API requests share one asyncio loop, so any
+synchronous work stalls all of them. :class:`LoopMonitor` runs a heartbeat
+task on the loop and a watchdog thread beside it. The heartbeat records how
+late each wake-up is; when it is overdue by more than the threshold the
+watchdog captures the loop thread's stack *while it is still blocked*, which
+names the callback that caused the stall.
+
+:func:`sample_profile` samples every thread's stack at a fixed interval for a
+bounded time and returns collapsed stacks (``frame;frame;frame count`` per
+line), the input format of flamegraph.pl, speedscope and inferno.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass
+class SlowCallback:
+    started_at: float
+    duration_ms: float
+    stack: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 1),
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        history: int = 50,
+        samples: int = 1200,
+    ) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.slow: deque[SlowCallback] = deque(maxlen=history)
+        self._lags: deque[float] = deque(maxlen=samples)
+        self._due = 0.0
+        self._stall_stack: list[str] | None = None
+        self._lock = threading.Lock()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._due = time.perf_counter() + self.interval
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - self._due
+            self._lags.append(lag)
+            if lag >= self.threshold:
+                with self._lock:
+                    stack, self._stall_stack = self._stall_stack or [], None
+                event = SlowCallback(
+                    started_at=time.time() - lag, duration_ms=lag * 1000, stack=stack
+                )
+                self.slow.append(event)
+                log.warning(
+                    "event loop blocked",
+                    extra={
+                        "duration_ms": round(event.duration_ms, 1),
+                        "where": stack[-1].strip() if stack else None,
+                    },
+                )
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            overdue = time.perf_counter() - self._due
+            if overdue < self.threshold:
+                continue
+            with self._lock:
+                if self._stall_stack is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread or 0)
+                self._stall_stack = traceback.format_stack(frame) if frame else []
+
+    def stats(self) -> dict[str, Any]:
+        lags = sorted(self._lags)
+        ms = [lag * 1000 for lag in lags]
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(ms),
+            "lag_p50_ms": round(statistics.median(ms), 2) if ms else None,
+            "lag_p99_ms": round(ms[max(0, int(len(ms) * 0.99) - 1)], 2) if ms else None,
+            "lag_max_ms": round(ms[-1], 2) if ms else None,
+            "slow_callbacks": [e.as_dict() for e in reversed(self.slow)],
+        }
+
+
+loop_monitor = LoopMonitor()
+
+
+def _collapse(frame: FrameType | None) -> list[str]:
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _sample(seconds: float, interval: float) -> Counter[str]:
+    own = threading.get_ident()
+    threads = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter[str] = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = threads.get(ident)
+            if name is None:
+                threads = {t.ident: t.name for t in threading.enumerate()}
+                name = threads.get(ident, str(ident))
+            counts[";".join([name.replace(" ", "_"), *_collapse(frame)])] += 1
+        time.sleep(interval)
+    return counts
+
+
+_profile_lock = asyncio.Lock()
+
+
+class ProfileBusy(RuntimeError):
+    """Only one sampling profile runs at a time."""
+
+
+async def sample_profile(seconds: float, interval: float = 0.005) -> str:
+    """Sample all threads for ``seconds`` and return collapsed stacks."""
+    if _profile_lock.locked():
+        raise ProfileBusy()
+    async with _profile_lock:
+        counts = await asyncio.to_thread(_sample, seconds, interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
@@ -0,0 +1,166 @@
+"""In-process cache for polled GET endpoints.
+
+Entries hold the serialized JSON body and its ETag, expire after a TTL and are
+evicted least-recently-used beyond a fixed size. Encoded representations
+(brotli, gzip, MessagePack; see :mod:`app.core.encoding`) are built on first
+request and kept on the entry. Each entry carries tags
+(``"stations"``, ``"tmax:<station_id>"``) so write paths can drop exactly the
+responses they affect. The cache is per process: other workers converge
+within one TTL.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable
+
+from fastapi import Request, Response
+
+from app.core.encoding import (
+    encode,
+    media_type,
+    negotiate,
+    variant_etag,
+    variant_headers,
+)
+from app.core.settings import get_settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: frozenset[str]
+    # (media, requested coding) -> (body, applied coding)
+    variants: dict[tuple[str, str | None], tuple[bytes, str | None]] = field(
+        default_factory=dict, compare=False
+    )
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._by_tag: dict[str, set[str]] = {}
+        # Bumped by every invalidation so in-flight renders can tell they raced one
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, body: bytes, tags: Iterable[str]) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            etag=make_etag(body),
+            expires_at=time.monotonic() + self.ttl_seconds,
+            tags=frozenset(tags),
+        )
+        self._drop(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        self.epoch += 1
+        for tag in tags:
+            for key in self._by_tag.pop(tag, set()):
+                self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_tag.clear()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+_settings = get_settings()
+response_cache = ResponseCache(
+    max_entries=_settings.response_cache_max_entries,
+    ttl_seconds=_settings.response_cache_ttl_seconds,
+)
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+async def cached_json(
+    request: Request,
+    tags: Iterable[str],
+    render: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """Serve a JSON body from the cache, rendering it on a miss.
+
+    The body is re-encoded per ``Accept``/``Accept-Encoding``. Clients that
+    send a matching ``If-None-Match`` get an empty 304.
+    """
+    key = request.url.path
+    if request.url.query:
+        key += "?" + request.url.query
+
+    entry = response_cache.get(key)
+    if entry is None:
+        epoch = response_cache.epoch
+        body = await render()
+        if response_cache.epoch == epoch:
+            entry = response_cache.put(key, body, tags)
+        else:
+            # A write landed while we were rendering; serve but don't cache
+            entry = CachedResponse(body, make_etag(body), 0.0, frozenset(tags))
+
+    media, coding = negotiate(request)
+    variant = entry.variants.get((media, coding))
+    if variant is None:
+        variant = encode(entry.body, media, coding)
+        entry.variants[(media, coding)] = variant
+    body, applied = variant
+
+    etag = variant_etag(entry.etag, media, applied)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        **variant_headers(media, applied),
+    }
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type(media), headers=headers)
@@ -6,8 +6,15 @@ import yaml
 SCHEDULE_FILE = pathlib.Path(__file__).parents[2] / "config" / "ingest_schedule.yml"
 
 
-def load_station_times() -> Dict[str, List[str]]:
-    """Load station-specific timing windows from YAML config."""
+def load_station_schedule() -> Dict[str, Dict[str, str]]:
+    """Load station-specific timing windows by name (``pre_dsm`` ... ``post_cli``)."""
     with SCHEDULE_FILE.open() as fh:
         raw: Dict[str, Any] = yaml.safe_load(fh)
-    return {code: list(slots.values()) for code, slots in raw.items()} 
\ No newline at end of file
+    return {code: dict(slots) for code, slots in raw.items()}
+
+
+def load_station_times() -> Dict[str, List[str]]:
+    """Load station-specific timing windows from YAML config."""
+    return {
+        code: list(slots.values()) for code, slots in load_station_schedule().items()
+    }
@@ -3,6 +3,13 @@ from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def _async_pg_url(db_url: str) -> str:
+    """Normalise Railway-style postgres:// URLs to the asyncpg driver."""
+    if db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql+asyncpg://", 1)
+    return db_url
+
+
 class Settings(BaseSettings):
     app_env: str = "local"
     app_debug: bool = True
@@ -13,17 +20,81 @@ class Settings(BaseSettings):
     postgres_user: str = "marlin"
     postgres_password: str = "secret"
 
+    # Engine tuning: "local", "production" or "pgbouncer". Empty picks
+    # "local" when APP_ENV=local and "production" otherwise.
+    db_profile: str = ""
+    # SQL statement logging is opt-in and independent of APP_DEBUG
+    db_echo: bool = False
+    # Per-setting overrides on top of the selected profile
+    db_pool_size: int | None = None
+    db_max_overflow: int | None = None
+    db_pool_timeout: float | None = None
+    db_pool_recycle: int | None = None
+    db_statement_cache_size: int | None = None
+
+    # In-process cache for hot GET endpoints
+    response_cache_ttl_seconds: float = 30.0
+    response_cache_max_entries: int = 1024
+
+    # Upstream record/replay: "live", "record" or "replay"
+    upstream_mode: str = "live"
+    upstream_cache_dir: str = ".upstream-cache"
+    upstream_cache_max_bytes: int = 256 * 1024 * 1024
+    # Upstream endpoints; scripts/soak.py points them at local stand-ins
+    open_meteo_url: str = "https://api.open-meteo.com/v1/forecast"
+    wethr_base_url: str = "https://wethr.net"
+
+    # Structured logging: level and "json" or "text" lines
+    log_level: str = "INFO"
+    log_format: str = "json"
+
+    # Batch ingest fetches one forecast per grid cell of this size (degrees)
+    # and stores it for every station inside; 0 fetches per station
+    ingest_grid_cell_deg: float = 0.0
+
+    # Concurrent scheduled jobs per resource; the rest queue (app.core.governor)
+    budget_browser_pages: int = 2
+    budget_http: int = 8
+    budget_db_sessions: int = 5
+
+    # Sharded scheduling: each node runs jobs only for its consistent-hash
+    # share of stations (app.services.sharding). NODE_ID defaults to host-pid.
+    scheduler_sharding: bool = False
+    node_id: str = ""
+    shard_heartbeat_seconds: float = 10.0
+    shard_node_ttl_seconds: float = 30.0
+
+    # /admin endpoints are disabled unless a token is set (X-Admin-Token)
+    admin_token: str = ""
+    # Stalls of the event loop longer than this are recorded with a stack
+    loop_lag_threshold_ms: float = 100.0
+
+    # Concurrent identical upstream fetches share one request; results are
+    # reused for this long
+    upstream_singleflight_ttl_seconds: float = 30.0
+
+    # Seconds before each wethr.net slot to launch the page, open connections
+    # and load model temps (app.services.warmup); 0 disables the warm-up
+    warmup_lead_seconds: float = 60.0
+
+    # Job rows are inserted in batches (app.services.write_behind); rows still
+    # pending at shutdown go to the journal if the database is unreachable.
+    # The journal must be on persistent storage; the default is CWD-relative.
+    write_behind_max_rows: int = 500
+    write_behind_max_delay_seconds: float = 2.0
+    write_behind_journal: str = ".write-behind.journal"
+
+    # Serve GET /export/{table}.arrow for research tooling
+    export_endpoint_enabled: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     @property
     def database_url(self) -> str:
         # Use Railway's DATABASE_URL if available
         db_url = os.getenv("DATABASE_URL")
-        if db_url and db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql+asyncpg://", 1)
-        
         if db_url:
-            return db_url
+            return _async_pg_url(db_url)
         else:
             return (
                 f"postgresql+asyncpg://{self.postgres_user}:"
@@ -31,6 +102,18 @@ class Settings(BaseSettings):
                 f"{self.postgres_port}/{self.postgres_db}"
             )
 
+    @property
+    def database_read_url(self) -> str | None:
+        """Optional read-only replica; GET routes use it when set."""
+        db_url = os.getenv("DATABASE_READ_URL")
+        return _async_pg_url(db_url) if db_url else None
+
+    @property
+    def engine_profile(self) -> str:
+        if self.db_profile:
+            return self.db_profile
+        return "local" if self.app_env == "local" else "production"
+
     @property
     def debug(self) -> bool:
         return self.app_debug
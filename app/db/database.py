@@ -1,14 +1,125 @@
-from typing import AsyncGenerator
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
 
-from app.core.settings import get_settings
+from app.core.settings import Settings, get_settings
 
 settings = get_settings()
 
+
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pool_pre_ping: bool
+    # asyncpg's server-side prepared statement cache (per connection)
+    statement_cache_size: int
+
+
+ENGINE_PROFILES: dict[str, EngineProfile] = {
+    "local": EngineProfile(
+        pool_size=5,
+        max_overflow=5,
+        pool_timeout=30.0,
+        pool_recycle=-1,
+        pool_pre_ping=False,
+        statement_cache_size=100,
+    ),
+    # Managed Postgres drops idle connections, so recycle and pre-ping
+    "production": EngineProfile(
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=10.0,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        statement_cache_size=500,
+    ),
+    # Transaction-mode PgBouncer cannot keep prepared statements
+    "pgbouncer": EngineProfile(
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=10.0,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        statement_cache_size=0,
+    ),
+}
+
+
+def engine_options(url: str, cfg: Settings) -> tuple[str, dict[str, Any]]:
+    """Resolve the engine URL and keyword arguments for the configured profile."""
+    try:
+        profile = ENGINE_PROFILES[cfg.engine_profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown DB_PROFILE {cfg.engine_profile!r}; "
+            f"expected one of {sorted(ENGINE_PROFILES)}"
+        ) from None
+
+    options: dict[str, Any] = {"echo": cfg.db_echo}
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        # sqlite and friends keep SQLAlchemy's default pool for their dialect
+        return url, options
+
+    cache_size = (
+        cfg.db_statement_cache_size
+        if cfg.db_statement_cache_size is not None
+        else profile.statement_cache_size
+    )
+    options.update(
+        pool_size=(
+            cfg.db_pool_size if cfg.db_pool_size is not None else profile.pool_size
+        ),
+        max_overflow=(
+            cfg.db_max_overflow
+            if cfg.db_max_overflow is not None
+            else profile.max_overflow
+        ),
+        pool_timeout=(
+            cfg.db_pool_timeout
+            if cfg.db_pool_timeout is not None
+            else profile.pool_timeout
+        ),
+        pool_recycle=(
+            cfg.db_pool_recycle
+            if cfg.db_pool_recycle is not None
+            else profile.pool_recycle
+        ),
+        pool_pre_ping=profile.pool_pre_ping,
+    )
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": cache_size}
+        # SQLAlchemy keeps its own prepared statement cache on top of asyncpg's
+        parsed = parsed.update_query_dict(
+            {"prepared_statement_cache_size": str(cache_size)}
+        )
+    return parsed.render_as_string(hide_password=False), options
+
+
+def _build_engine(url: str) -> AsyncEngine:
+    engine_url, options = engine_options(url, settings)
+    return create_async_engine(engine_url, **options)
+
+
 # Async engine for PostgreSQL
-engine = create_async_engine(settings.database_url, echo=settings.debug)
+engine = _build_engine(settings.database_url)
+
+# Read-only replica for GET routes; falls back to the primary
+read_url = settings.database_read_url
+read_engine = _build_engine(read_url) if read_url else engine
 
 # Async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -17,6 +128,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 # Dependency injection for FastAPI
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -25,3 +142,45 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes, bound to the replica when one is configured."""
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def upsert_insert(db: AsyncSession) -> Any:
+    """The dialect's ``insert`` construct, which has ``on_conflict_do_update``."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"No upsert for dialect {dialect!r}")
+
+
+_ON_COMMIT = "marlin_on_commit"
+
+
+def on_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's current transaction commits.
+
+    Callbacks are dropped if the transaction rolls back instead, so caches
+    and subscribers never hear about rows that were not persisted.
+    """
+    db.sync_session.info.setdefault(_ON_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    for callback in session.info.pop(_ON_COMMIT, []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_commit(session: Session) -> None:
+    session.info.pop(_ON_COMMIT, None)
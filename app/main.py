@@ -4,60 +4,190 @@ from typing import AsyncGenerator
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 
+from app.api.admin import admin_router
 from app.api.routes import router
+from app.core.governor import governed
+from app.core.log import configure_logging, get_logger, shutdown_logging, traced
+from app.core.loopmon import loop_monitor
+from app.core.settings import get_settings
 from app.core.schedule_loader import load_station_times
-from app.services.ingest import fetch_forecast_single
-from app.services.wethr import fetch_and_store_single
+from app.db.database import AsyncSessionLocal
+from app.services.ingest import close_forecast_client, fetch_forecast_single
+from app.services.reconcile import reconcile_yesterday
+from app.services.sharding import shard, shard_heartbeat, sharded
+from app.services.station_registry import refresh_station_registry, station_registry
+from app.services.browser import browser_pool
+from app.services.warmup import lead_time, warm_slots
+from app.services.wethr import fetch_and_store_single, warm_wethr_slot
+from app.services.write_behind import write_behind
 
 scheduler = AsyncIOScheduler()
+log = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Manage application lifespan with scheduler."""
+    configure_logging()
+    loop_monitor.threshold = get_settings().loop_lag_threshold_ms / 1000
+    loop_monitor.start()
+    try:
+        async with AsyncSessionLocal() as db:
+            await station_registry.load(db)
+        log.info("station registry loaded", extra={"stations": len(station_registry)})
+    except Exception:
+        log.warning("station registry not preloaded", exc_info=True)
+
+    try:
+        await write_behind.start()
+    except Exception:
+        log.warning("write-behind buffer failed to start", exc_info=True)
+
+    if shard.enabled:
+        try:
+            await shard_heartbeat()
+            log.info("joined scheduler shard ring", extra={"node_id": shard.node_id})
+        except Exception:
+            log.warning("shard heartbeat failed; owning no stations yet", exc_info=True)
+
     try:
         # Load station timing configuration
         station_times = load_station_times()
-        
+        warmup_lead = get_settings().warmup_lead_seconds
+
         # Schedule jobs for each station
         for code, times in station_times.items():
             pre_dsm, post_dsm, pre_cli, post_cli = times
-            
+
             # Schedule model fetches (pre_dsm and pre_cli)
             for t in (pre_dsm, pre_cli):
                 h, m = map(int, t.split(":"))
                 scheduler.add_job(
-                    fetch_forecast_single,
+                    sharded(
+                        traced(
+                            governed(fetch_forecast_single, "http", "db"),
+                            "model",
+                            station=code,
+                            slot=t,
+                        )
+                    ),
                     "cron",
-                    hour=h, minute=m, timezone="UTC",
-                    args=[code], name=f"{code}-model-{t}",
-                    misfire_grace_time=180, coalesce=True,
+                    hour=h,
+                    minute=m,
+                    timezone="UTC",
+                    args=[code],
+                    name=f"{code}-model-{t}",
+                    misfire_grace_time=180,
+                    coalesce=True,
                 )
-            
+
             # Schedule wethr scrapes (post_dsm and post_cli)
             for t in (post_dsm, post_cli):
                 h, m = map(int, t.split(":"))
                 scheduler.add_job(
-                    fetch_and_store_single,
+                    sharded(
+                        traced(
+                            # Admits itself: it may adopt a parked page's slot
+                            fetch_and_store_single,
+                            "wethr",
+                            station=code,
+                            slot=t,
+                        )
+                    ),
                     "cron",
-                    hour=h, minute=m, timezone="UTC",
-                    args=[code], name=f"{code}-wethr-{t}",
-                    misfire_grace_time=180, coalesce=True,
+                    hour=h,
+                    minute=m,
+                    timezone="UTC",
+                    args=[code],
+                    # The post-CLI scrape reports on the post-DSM slot's day
+                    kwargs={"slot": t, "report_slot": post_dsm},
+                    name=f"{code}-wethr-{t}",
+                    misfire_grace_time=180,
+                    coalesce=True,
                 )
-        
+                if warmup_lead > 0:
+                    wh, wm, ws = lead_time(t, warmup_lead)
+                    scheduler.add_job(
+                        sharded(
+                            traced(
+                                # Admits itself; the parked page keeps its slot
+                                warm_wethr_slot,
+                                "warmup",
+                                station=code,
+                                slot=t,
+                            )
+                        ),
+                        "cron",
+                        hour=wh,
+                        minute=wm,
+                        second=ws,
+                        timezone="UTC",
+                        args=[code, t],
+                        name=f"{code}-warmup-{t}",
+                        misfire_grace_time=max(1, int(warmup_lead // 2)),
+                        coalesce=True,
+                    )
+
+        # Pick up stations created or changed by other workers
+        scheduler.add_job(
+            governed(refresh_station_registry, "db"),
+            "interval",
+            seconds=60,
+            name="station-registry-refresh",
+            coalesce=True,
+        )
+
+        # Observed highs are final once the station day is over; local
+        # standard midnight is at 10:00 UTC at the latest (Hawaii)
+        scheduler.add_job(
+            governed(reconcile_yesterday, "db"),
+            "cron",
+            hour=11,
+            minute=0,
+            timezone="UTC",
+            name="reconcile-observed-highs",
+            misfire_grace_time=3600,
+            coalesce=True,
+        )
+
+        if shard.enabled:
+            scheduler.add_job(
+                shard_heartbeat,
+                "interval",
+                seconds=get_settings().shard_heartbeat_seconds,
+                name="shard-heartbeat",
+                coalesce=True,
+            )
+
         scheduler.start()
-        print("✅ Scheduler started successfully")
-    except Exception as e:
-        print(f"⚠️  Warning: Scheduler failed to start: {e}")
-        print("🚀 App will continue without scheduler")
-    
+        log.info("scheduler started", extra={"jobs": len(scheduler.get_jobs())})
+    except Exception:
+        log.warning("scheduler failed to start; continuing without it", exc_info=True)
+
     yield
-    
+
     try:
         scheduler.shutdown()
-        print("✅ Scheduler shutdown complete")
-    except Exception as e:
-        print(f"⚠️  Warning during scheduler shutdown: {e}")
+        log.info("scheduler shutdown complete")
+    except Exception:
+        log.warning("scheduler shutdown failed", exc_info=True)
+    # shutdown() does not wait for running jobs; rows they add after stop()
+    # are journaled and replayed on the next start
+    await write_behind.stop()
+    await warm_slots.close()
+    await close_forecast_client()
+    try:
+        await browser_pool.close()
+    except Exception:
+        log.warning("browser shutdown failed", exc_info=True)
+    if shard.enabled:
+        try:
+            async with AsyncSessionLocal() as db:
+                await shard.leave(db)
+        except Exception:
+            log.warning("failed to leave shard ring", exc_info=True)
+    await loop_monitor.stop()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -68,6 +198,12 @@ app = FastAPI(
 )
 
 app.include_router(router)
+app.include_router(admin_router)
+
+if get_settings().export_endpoint_enabled:
+    from app.api.export import export_router
+
+    app.include_router(export_router)
 
 
 @app.get("/")
@@ -6,4 +6,12 @@ class Base(DeclarativeBase):
 
 
 # Import all models to ensure they're registered with the Base
-from app.models.weather import WeatherStation, TmaxCalculation, WeatherForecast
+from app.models.weather import (
+    WeatherStation,
+    TmaxCalculation,
+    WeatherForecast,
+    ForecastRun,
+    StationAccuracy,
+    StationDaily,
+)
+from app.models.system import RegistryVersion, SchedulerNode
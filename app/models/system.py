@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, Integer, String, event
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class RegistryVersion(Base):
+    """Monotonic counters bumped whenever a cached reference table changes."""
+
+    __tablename__ = "registry_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+# Counter rows exist before any worker bumps them (the migration seeds them too),
+# so bumping is a plain UPDATE that never races on the primary key
+event.listen(
+    RegistryVersion.__table__,
+    "after_create",
+    DDL(  # type: ignore[no-untyped-call]
+        "INSERT INTO registry_versions (name, version) VALUES ('stations', 0)"
+    ),
+)
+
+
+class SchedulerNode(Base):
+    """A live scheduler process; rows older than the membership TTL are ignored."""
+
+    __tablename__ = "scheduler_nodes"
+
+    node_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    heartbeat_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
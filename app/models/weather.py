@@ -1,7 +1,17 @@
 from datetime import datetime, date
 from typing import Dict, Any
 
-from sqlalchemy import Integer, String, Float, ForeignKey, func, JSON, Date
+from sqlalchemy import (
+    Integer,
+    String,
+    Float,
+    ForeignKey,
+    func,
+    JSON,
+    Date,
+    Index,
+    LargeBinary,
+)
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -30,6 +40,10 @@ class WeatherStation(Base):
 
 class TmaxCalculation(Base):
     __tablename__ = "tmax_calculations"
+    __table_args__ = (
+        Index("ix_tmax_calculations_station_created", "station_id", "created_at"),
+        Index("ix_tmax_calculations_station_date", "station_id", "date_iso"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     station_id: Mapped[int] = mapped_column(Integer, ForeignKey("weather_stations.id"))
@@ -39,6 +53,9 @@ class TmaxCalculation(Base):
     confidence: Mapped[float] = mapped_column(Float)
     size: Mapped[float] = mapped_column(Float, default=0)
     raw_payload: Mapped[Dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # Station day the signal reports on (see app.services.wethr.report_day);
+    # NULL for signals written before it was recorded
+    date_iso: Mapped[str | None] = mapped_column(String(10), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), default=func.now()
     )
@@ -49,6 +66,11 @@ class TmaxCalculation(Base):
 
 class WeatherForecast(Base):
     __tablename__ = "weather_forecasts"
+    __table_args__ = (
+        Index(
+            "ix_weather_forecasts_station_forecast_time", "station_id", "forecast_time"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     station_id: Mapped[int] = mapped_column(Integer, ForeignKey("weather_stations.id"))
@@ -57,6 +79,13 @@ class WeatherForecast(Base):
     valid_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
     temperature: Mapped[float] = mapped_column(Float)
     raw_data: Mapped[Dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # Hourly series packed as float32 (see app.services.series); hour 0 is hourly_start
+    hourly_start: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+    hourly_values: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # Ensemble rows only: per-hour spread across member models
+    hourly_spread: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), default=func.now()
     )
@@ -67,6 +96,11 @@ class WeatherForecast(Base):
 
 class WethrHigh(Base):
     __tablename__ = "wethr_highs"
+    __table_args__ = (
+        Index("ix_wethr_highs_station_date", "station_id", "date_iso"),
+        # Reconciliation gathers one day's highs for every station
+        Index("ix_wethr_highs_date", "date_iso"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     station_id: Mapped[int] = mapped_column(Integer, ForeignKey("weather_stations.id"))
@@ -76,3 +110,83 @@ class WethrHigh(Base):
 
     # Relationships
     station = relationship("WeatherStation", back_populates="wethr_highs")
+
+
+class ForecastRun(Base):
+    """One model run's hourly series, delta-encoded (see app.services.forecast_runs).
+
+    Keyframes (base_id is None) hold the full quantized series; every other
+    run stores only its difference from the run named by base_id, aligned on
+    valid time.
+    """
+
+    __tablename__ = "forecast_runs"
+    __table_args__ = (
+        Index("ix_forecast_runs_station_source_id", "station_id", "source", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    station_id: Mapped[int] = mapped_column(Integer, ForeignKey("weather_stations.id"))
+    source: Mapped[str] = mapped_column(String(20))
+    run_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    hourly_start: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    hours: Mapped[int] = mapped_column(Integer)
+    base_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    keyframe_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class StationAccuracy(Base):
+    """Running forecast-error sums per station, maintained by reconciliation.
+
+    Stored as sums so each reconciled batch is added without rescanning
+    tmax_calculations; error = cli_forecast - observed_high in °F.
+    """
+
+    __tablename__ = "station_accuracy"
+
+    station_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("weather_stations.id"), primary_key=True
+    )
+    samples: Mapped[int] = mapped_column(Integer, default=0)
+    sum_error: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_abs_error: Mapped[float] = mapped_column(Float, default=0.0)
+    sum_sq_error: Mapped[float] = mapped_column(Float, default=0.0)
+    within_1f: Mapped[int] = mapped_column(Integer, default=0)
+    last_date: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class StationDaily(Base):
+    """Per-station, per-local-day summary (see app.services.rollups).
+
+    Updated in the same transaction as the rows it summarizes, so reading a
+    date range is one primary-key range scan.
+    """
+
+    __tablename__ = "station_daily"
+
+    station_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("weather_stations.id"), primary_key=True
+    )
+    date_iso: Mapped[str] = mapped_column(String(10), primary_key=True)
+    # Latest forecast of the day (the ensemble row when one was stored)
+    model_temp: Mapped[float | None] = mapped_column(Float, nullable=True)
+    model_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+    # Latest wethr.net high scraped for the day
+    wethr_high: Mapped[float | None] = mapped_column(Float, nullable=True)
+    wethr_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+    # Signal count and the latest signal's scoring
+    signals: Mapped[int] = mapped_column(Integer, default=0)
+    delta: Mapped[float | None] = mapped_column(Float, nullable=True)
+    confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    size: Mapped[float | None] = mapped_column(Float, nullable=True)
+    signal_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+    observed_high: Mapped[float | None] = mapped_column(Float, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
@@ -0,0 +1,300 @@
+"""Historical backfill from the Open-Meteo archive API.
+
+The requested date range is split into per-station chunks that are fetched
+with bounded concurrency and handed to a single loader, which writes each
+chunk in its own transaction: ``COPY`` on Postgres, executemany elsewhere.
+Every chunk first deletes any archive rows it covers, so re-running a chunk
+is idempotent, and completed chunks are recorded in a JSON checkpoint file
+so an interrupted run resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+import httpx
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.log import get_logger
+from app.models.weather import WeatherForecast
+from app.services import series
+from app.services.station_registry import StationLike
+from app.services.upstream_cache import through_cache
+
+log = get_logger(__name__)
+
+ARCHIVE_URL = (
+    "https://archive-api.open-meteo.com/v1/archive"
+    "?latitude={lat}&longitude={lon}"
+    "&start_date={start}&end_date={end}"
+    "&hourly=temperature_2m"
+    "&temperature_unit=fahrenheit"
+    "&timezone=UTC"
+)
+ARCHIVE_SOURCE = "archive"
+FETCH_ATTEMPTS = 3
+
+COPY_COLUMNS = (
+    "station_id",
+    "source",
+    "forecast_time",
+    "valid_time",
+    "temperature",
+    "raw_data",
+    "hourly_start",
+    "hourly_values",
+    "hourly_spread",
+    "created_at",
+)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    station: StationLike
+    start: date
+    end: date  # inclusive
+
+    @property
+    def key(self) -> str:
+        # Includes the end: a shortened last chunk must not mark a longer one
+        # done when a later run extends --end or changes --chunk-days
+        return f"{self.station.code}:{self.start.isoformat()}..{self.end.isoformat()}"
+
+
+def plan_chunks(
+    stations: Sequence[StationLike], start: date, end: date, chunk_days: int
+) -> list[Chunk]:
+    chunks = []
+    for station in stations:
+        cursor = start
+        while cursor <= end:
+            chunk_end = min(cursor + timedelta(days=chunk_days - 1), end)
+            chunks.append(Chunk(station, cursor, chunk_end))
+            cursor = chunk_end + timedelta(days=1)
+    return chunks
+
+
+class Checkpoint:
+    """Set of completed chunk keys persisted as JSON."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            self.done = set(json.loads(path.read_text()).get("done", []))
+
+    def mark(self, key: str) -> None:
+        self.done.add(key)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"done": sorted(self.done)}))
+        os.replace(tmp, self.path)
+
+
+def archive_rows(station_id: int, data: dict[str, Any]) -> list[dict[str, Any]]:
+    """One row per UTC day, holding that day's packed hourly series.
+
+    ``temperature`` is the day's maximum, the value backtests compare with.
+    """
+    hourly = data.get("hourly") or {}
+    times = hourly.get("time") or []
+    values = hourly.get("temperature_2m") or []
+    if not times:
+        return []
+
+    temps = np.asarray(values, dtype=np.float64)
+    first = datetime.fromisoformat(times[0]).replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for offset in range(0, len(temps), 24):
+        day = temps[offset : offset + 24]
+        if not np.isfinite(day).any():
+            continue
+        day_start = first + timedelta(hours=offset)
+        rows.append(
+            {
+                "station_id": station_id,
+                "source": ARCHIVE_SOURCE,
+                "forecast_time": day_start,
+                "valid_time": day_start,
+                "temperature": float(np.nanmax(day)),
+                "raw_data": {"model": ARCHIVE_SOURCE, "hours": len(day)},
+                "hourly_start": day_start,
+                "hourly_values": series.pack(day),
+                "hourly_spread": None,
+                "created_at": now,
+            }
+        )
+    return rows
+
+
+async def fetch_chunk(client: httpx.AsyncClient, chunk: Chunk) -> dict[str, Any]:
+    url = ARCHIVE_URL.format(
+        lat=chunk.station.lat,
+        lon=chunk.station.lon,
+        start=chunk.start.isoformat(),
+        end=chunk.end.isoformat(),
+    )
+
+    async def get() -> bytes:
+        for attempt in range(1, FETCH_ATTEMPTS + 1):
+            try:
+                r = await client.get(url, timeout=60.0)
+                r.raise_for_status()
+                return r.content
+            except httpx.HTTPError:
+                if attempt == FETCH_ATTEMPTS:
+                    raise
+                await asyncio.sleep(2**attempt)
+        raise AssertionError("unreachable")
+
+    data: dict[str, Any] = json.loads(await through_cache(f"open-meteo:{url}", get))
+    return data
+
+
+async def load_rows(db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Bulk-load rows in the session's transaction (COPY on asyncpg)."""
+    if not rows:
+        return
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        records = [
+            tuple(
+                json.dumps(row[c]) if c == "raw_data" else row[c] for c in COPY_COLUMNS
+            )
+            for row in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+            WeatherForecast.__tablename__, records=records, columns=COPY_COLUMNS
+        )
+    else:
+        await db.execute(insert(WeatherForecast), rows)
+
+
+@dataclass
+class BackfillStats:
+    chunks: int = 0
+    skipped: int = 0
+    failed: int = 0
+    rows: int = 0
+    started: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+
+async def run_backfill(
+    session_factory: async_sessionmaker[AsyncSession],
+    stations: Sequence[StationLike],
+    start: date,
+    end: date,
+    checkpoint: Checkpoint,
+    chunk_days: int = 31,
+    concurrency: int = 4,
+    client: httpx.AsyncClient | None = None,
+) -> BackfillStats:
+    stats = BackfillStats(started=time.perf_counter())
+    pending = []
+    for chunk in plan_chunks(stations, start, end, chunk_days):
+        if chunk.key in checkpoint.done:
+            stats.skipped += 1
+        else:
+            pending.append(chunk)
+    total = len(pending)
+    log.info(
+        "backfill started",
+        extra={
+            "chunks": total,
+            "stations": len(stations),
+            "skipped": stats.skipped,
+        },
+    )
+
+    # Fetchers run ahead of the single loader by at most `concurrency` chunks
+    loaded: asyncio.Queue[tuple[Chunk, list[dict[str, Any]]] | None] = asyncio.Queue(
+        concurrency
+    )
+    todo: asyncio.Queue[Chunk] = asyncio.Queue()
+    for chunk in pending:
+        todo.put_nowait(chunk)
+
+    async def fetcher(http: httpx.AsyncClient) -> None:
+        while not todo.empty():
+            chunk = todo.get_nowait()
+            try:
+                data = await fetch_chunk(http, chunk)
+            except Exception as e:
+                stats.failed += 1
+                log.warning(
+                    "backfill chunk fetch failed",
+                    extra={"chunk": chunk.key, "error": str(e)},
+                )
+                continue
+            await loaded.put((chunk, archive_rows(chunk.station.id, data)))
+
+    async def loader() -> None:
+        while (item := await loaded.get()) is not None:
+            chunk, rows = item
+            async with session_factory() as db:
+                await db.execute(
+                    delete(WeatherForecast).where(
+                        WeatherForecast.station_id == chunk.station.id,
+                        WeatherForecast.source == ARCHIVE_SOURCE,
+                        WeatherForecast.forecast_time
+                        >= datetime.combine(
+                            chunk.start, datetime.min.time(), timezone.utc
+                        ),
+                        WeatherForecast.forecast_time
+                        < datetime.combine(
+                            chunk.end + timedelta(days=1),
+                            datetime.min.time(),
+                            timezone.utc,
+                        ),
+                    )
+                )
+                await load_rows(db, rows)
+                await db.commit()
+            checkpoint.mark(chunk.key)
+            stats.chunks += 1
+            stats.rows += len(rows)
+            log.info(
+                "backfill chunk loaded",
+                extra={
+                    "chunk": chunk.key,
+                    "done": stats.chunks,
+                    "total": total,
+                    "rows": len(rows),
+                    "rows_per_second": round(stats.rows_per_second),
+                },
+            )
+
+    async def run(http: httpx.AsyncClient) -> None:
+        async def fetch_all() -> None:
+            await asyncio.gather(*(fetcher(http) for _ in range(max(1, concurrency))))
+            await loaded.put(None)
+
+        tasks = [asyncio.ensure_future(fetch_all()), asyncio.ensure_future(loader())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failing loader must not leave fetchers blocked on a full queue
+            for task in tasks:
+                task.cancel()
+
+    if client is not None:
+        await run(client)
+    else:
+        async with httpx.AsyncClient(http2=True) as http:
+            await run(http)
+    return stats
@@ -0,0 +1,53 @@
+"""One long-lived headless Chromium shared by every scrape.
+
+Launching Chromium costs about a second, which used to be paid at the start of
+every wethr.net job. The pool launches it once, on first use or from the
+pre-slot warm-up, hands out fresh pages, and relaunches it if it crashed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from playwright.async_api import Browser, Page, async_playwright
+
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+
+class BrowserPool:
+    def __init__(self) -> None:
+        self._playwright: Any = None
+        self._browser: Browser | None = None
+        self._lock = asyncio.Lock()
+        self.launches = 0
+
+    async def browser(self) -> Browser:
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self.launches += 1
+                log.info("chromium launched", extra={"launches": self.launches})
+            return self._browser
+
+    async def new_page(self) -> Page:
+        return await (await self.browser()).new_page()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    log.warning("chromium close failed", exc_info=True)
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+browser_pool = BrowserPool()
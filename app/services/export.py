@@ -0,0 +1,452 @@
+"""Columnar export of forecast and signal history.
+
+Tables are read from the database in id order as streaming batches and
+written as Hive-partitioned Parquet::
+
+    <root>/<table>/station=KAUS/month=2025-06/part-<first_id>-<last_id>.parquet
+
+``weather_forecasts`` is flattened to one row per forecast hour (packed
+hourly series are expanded with NumPy); per-model rows get their series from
+the matching ``forecast_runs`` run. The highest exported id per table is
+kept in ``<root>/_export_state.json``; the next run exports newer rows and
+rewrites every partition from ``REWRITE_DAYS`` ago onwards, so rows updated
+after export (e.g. ``observed_high`` set by reconcile) or committed out of id
+order are picked up. Older partitions are treated as final. The same batches
+can be streamed as Arrow IPC for the HTTP endpoint.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import Select, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.weather import (
+    TmaxCalculation,
+    WeatherForecast,
+    WeatherStation,
+    WethrHigh,
+)
+from app.services import forecast_runs, series
+
+BATCH_SIZE = 50_000
+STATE_FILE = "_export_state.json"
+# Partitions whose month overlaps this window are rewritten on every run
+REWRITE_DAYS = 7
+
+TS = pa.timestamp("us", tz="UTC")
+
+FORECAST_SCHEMA = pa.schema(
+    [
+        ("forecast_id", pa.int64()),
+        ("station_id", pa.int64()),
+        ("station_code", pa.string()),
+        ("source", pa.string()),
+        ("forecast_time", TS),
+        ("valid_time", TS),
+        ("temperature", pa.float32()),
+        ("spread", pa.float32()),
+    ]
+)
+
+WETHR_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("station_id", pa.int64()),
+        ("station_code", pa.string()),
+        ("date_iso", pa.string()),
+        ("wethr_high", pa.float64()),
+        ("scraped_at", TS),
+    ]
+)
+
+TMAX_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("station_id", pa.int64()),
+        ("station_code", pa.string()),
+        ("cli_forecast", pa.float64()),
+        ("observed_high", pa.float64()),
+        ("method", pa.string()),
+        ("confidence", pa.float64()),
+        ("size", pa.float64()),
+        ("raw_payload", pa.string()),
+        ("created_at", TS),
+    ]
+)
+
+
+def _utc64(dt: datetime) -> np.datetime64:
+    """Naive-UTC datetime64; sqlite hands back naive values already in UTC."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, "us")
+
+
+def _forecast_batch(rows: Sequence[Any]) -> pa.Table:
+    """Expand forecast rows to one output row per valid hour."""
+    cols: dict[str, list[Any]] = {name: [] for name in FORECAST_SCHEMA.names}
+    hour = np.timedelta64(1, "h")
+    for (
+        fid,
+        station_id,
+        code,
+        source,
+        forecast_time,
+        valid_time,
+        temperature,
+        hourly_start,
+        hourly_values,
+        hourly_spread,
+    ) in rows:
+        if hourly_values:
+            values = series.unpack(hourly_values)
+            n = len(values)
+            start = _utc64(hourly_start)
+            cols["valid_time"].append(start + np.arange(n) * hour)
+            cols["temperature"].append(values)
+            cols["spread"].append(
+                series.unpack(hourly_spread)
+                if hourly_spread
+                else np.full(n, np.nan, dtype=np.float32)
+            )
+        else:
+            n = 1
+            cols["valid_time"].append(np.array([_utc64(valid_time)]))
+            cols["temperature"].append(np.array([temperature], dtype=np.float32))
+            cols["spread"].append(np.array([np.nan], dtype=np.float32))
+        cols["forecast_id"].append(np.full(n, fid, dtype=np.int64))
+        cols["station_id"].append(np.full(n, station_id, dtype=np.int64))
+        cols["station_code"].append([code] * n)
+        cols["source"].append([source] * n)
+        cols["forecast_time"].append(np.full(n, _utc64(forecast_time)))
+
+    arrays = []
+    for field in FORECAST_SCHEMA:
+        parts = cols[field.name]
+        if field.type == pa.string():
+            flat: Any = [v for part in parts for v in part]
+        else:
+            flat = np.concatenate(parts) if parts else []
+        if pa.types.is_floating(field.type):
+            # NaN means "missing hour" in packed series; export it as null
+            arr = np.asarray(flat, dtype=np.float32)
+            arrays.append(pa.array(arr, type=field.type, mask=np.isnan(arr)))
+        else:
+            arrays.append(pa.array(flat, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=FORECAST_SCHEMA)
+
+
+async def _with_run_series(db: AsyncSession, rows: Sequence[Any]) -> Sequence[Any]:
+    """Fill in per-model hourly series from forecast_runs for rows stored without one."""
+    keys = [(r[1], r[3], r[4]) for r in rows if not r[8]]
+    if not keys:
+        return rows
+    runs = await forecast_runs.run_series(db, keys)
+    out = []
+    for r in rows:
+        run = None if r[8] else runs.get((r[1], r[3], r[4]))
+        if run is not None:
+            start, values = run
+            r = (*r[:7], start, series.pack(values), r[9])
+        out.append(r)
+    return out
+
+
+def _rows_batch(schema: pa.Schema) -> Callable[[Sequence[Any]], pa.Table]:
+    def build(rows: Sequence[Any]) -> pa.Table:
+        columns: list[Sequence[Any]] = (
+            list(zip(*rows)) if rows else [[] for _ in schema]
+        )
+        arrays = []
+        for field, values in zip(schema, columns):
+            if field.name == "raw_payload":
+                values = [None if v is None else json.dumps(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    return build
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    name: str
+    schema: pa.Schema
+    id_column: Any
+    station_column: Any
+    time_column: Any
+    time_field: str
+    columns: tuple[Any, ...]
+    build: Callable[[Sequence[Any]], pa.Table]
+    # Completes a batch's rows from other tables before it is built
+    prepare: (
+        Callable[[AsyncSession, Sequence[Any]], Awaitable[Sequence[Any]]] | None
+    ) = None
+
+    def query(
+        self,
+        after_id: int,
+        station_id: int | None = None,
+        since: datetime | None = None,
+    ) -> Select[Any]:
+        """Rows past ``after_id``, plus any row timed at or after ``since``."""
+        newer = self.id_column > after_id
+        stmt = (
+            select(*self.columns)
+            .join(WeatherStation, WeatherStation.id == self.station_column)
+            .where(newer if since is None else or_(newer, self.time_column >= since))
+            .order_by(self.id_column)
+        )
+        if station_id is not None:
+            stmt = stmt.where(self.station_column == station_id)
+        return stmt
+
+
+EXPORTS: dict[str, ExportSpec] = {
+    "weather_forecasts": ExportSpec(
+        name="weather_forecasts",
+        schema=FORECAST_SCHEMA,
+        id_column=WeatherForecast.id,
+        station_column=WeatherForecast.station_id,
+        time_column=WeatherForecast.forecast_time,
+        time_field="forecast_time",
+        columns=(
+            WeatherForecast.id,
+            WeatherForecast.station_id,
+            WeatherStation.code,
+            WeatherForecast.source,
+            WeatherForecast.forecast_time,
+            WeatherForecast.valid_time,
+            WeatherForecast.temperature,
+            WeatherForecast.hourly_start,
+            WeatherForecast.hourly_values,
+            WeatherForecast.hourly_spread,
+        ),
+        build=_forecast_batch,
+        prepare=_with_run_series,
+    ),
+    "wethr_highs": ExportSpec(
+        name="wethr_highs",
+        schema=WETHR_SCHEMA,
+        id_column=WethrHigh.id,
+        station_column=WethrHigh.station_id,
+        time_column=WethrHigh.scraped_at,
+        time_field="scraped_at",
+        columns=(
+            WethrHigh.id,
+            WethrHigh.station_id,
+            WeatherStation.code,
+            WethrHigh.date_iso,
+            WethrHigh.wethr_high,
+            WethrHigh.scraped_at,
+        ),
+        build=_rows_batch(WETHR_SCHEMA),
+    ),
+    "tmax_calculations": ExportSpec(
+        name="tmax_calculations",
+        schema=TMAX_SCHEMA,
+        id_column=TmaxCalculation.id,
+        station_column=TmaxCalculation.station_id,
+        time_column=TmaxCalculation.created_at,
+        time_field="created_at",
+        columns=(
+            TmaxCalculation.id,
+            TmaxCalculation.station_id,
+            WeatherStation.code,
+            TmaxCalculation.cli_forecast,
+            TmaxCalculation.observed_high,
+            TmaxCalculation.method,
+            TmaxCalculation.confidence,
+            TmaxCalculation.size,
+            TmaxCalculation.raw_payload,
+            TmaxCalculation.created_at,
+        ),
+        build=_rows_batch(TMAX_SCHEMA),
+    ),
+}
+
+
+async def iter_batches(
+    db: AsyncSession,
+    spec: ExportSpec,
+    after_id: int = 0,
+    station_id: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    since: datetime | None = None,
+) -> AsyncIterator[tuple[int, int, pa.Table]]:
+    """Yield (first id, last id, Arrow table) per batch, streaming from the DB."""
+    result = await db.stream(
+        spec.query(after_id, station_id, since).execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions(batch_size):
+        if spec.prepare is not None:
+            rows = await spec.prepare(db, rows)
+        yield rows[0][0], rows[-1][0], spec.build(rows)
+
+
+def _load_state(root: Path) -> dict[str, dict[str, Any]]:
+    path = root / STATE_FILE
+    state = json.loads(path.read_text()) if path.exists() else {}
+    # Older state files kept just the last id per table
+    return {
+        table: entry if isinstance(entry, dict) else {"last_id": entry}
+        for table, entry in state.items()
+    }
+
+
+def _save_state(root: Path, state: dict[str, dict[str, Any]]) -> None:
+    path = root / STATE_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def write_partitions(
+    root: Path, spec: ExportSpec, table: pa.Table, first_id: int, last_id: int
+) -> int:
+    """Write one Parquet file per (station, month) present in the batch."""
+    month = pc.strftime(table[spec.time_field], format="%Y-%m")
+    keyed = table.append_column("_month", month)
+    files = 0
+    groups = keyed.group_by(["station_code", "_month"]).aggregate([])
+    for code, mon in zip(
+        groups["station_code"].to_pylist(), groups["_month"].to_pylist()
+    ):
+        mask = pc.and_(
+            pc.equal(keyed["station_code"], code), pc.equal(keyed["_month"], mon)
+        )
+        part = keyed.filter(mask).drop_columns(["_month"])
+        out = root / spec.name / f"station={code}" / f"month={mon}"
+        out.mkdir(parents=True, exist_ok=True)
+        pq.write_table(part, out / f"part-{first_id:012d}-{last_id:012d}.parquet")
+        files += 1
+    return files
+
+
+def _month_start(ts: datetime) -> datetime:
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def clear_partitions(
+    root: Path, spec: ExportSpec, from_month: str | None = None
+) -> None:
+    """Delete a table's partitions, or only those for ``from_month`` and later."""
+    base = root / spec.name
+    if from_month is None:
+        shutil.rmtree(base, ignore_errors=True)
+        return
+    for path in base.glob("station=*/month=*"):
+        if path.name.removeprefix("month=") >= from_month:
+            shutil.rmtree(path)
+
+
+@dataclass
+class ExportResult:
+    table: str
+    rows: int = 0
+    files: int = 0
+    last_id: int = 0
+
+
+async def export_table(
+    db: AsyncSession,
+    root: Path,
+    table: str,
+    full: bool = False,
+    batch_size: int = BATCH_SIZE,
+    now: datetime | None = None,
+) -> ExportResult:
+    """Export new rows and rewrite recent partitions (or everything with ``full``)."""
+    spec = EXPORTS[table]
+    state = _load_state(root)
+    entry = {} if full else state.get(table, {})
+    after_id = entry.get("last_id", 0)
+    since: datetime | None = None
+    if not after_id:
+        # Starting over: drop whatever an earlier export left behind
+        clear_partitions(root, spec)
+    else:
+        cutoff = _month_start(
+            (now or datetime.now(timezone.utc)) - timedelta(days=REWRITE_DAYS)
+        )
+        # An interrupted run may already have cleared earlier months
+        pending = entry.get("rewrite_from")
+        if pending is not None:
+            cutoff = min(
+                cutoff, datetime.strptime(pending, "%Y-%m").replace(tzinfo=timezone.utc)
+            )
+        since = cutoff
+        entry["rewrite_from"] = since.strftime("%Y-%m")
+        state[table] = entry
+        _save_state(root, state)
+        clear_partitions(root, spec, entry["rewrite_from"])
+
+    result = ExportResult(table=table, last_id=after_id)
+    async for first_id, last_id, batch in iter_batches(
+        db, spec, after_id=after_id, batch_size=batch_size, since=since
+    ):
+        result.files += write_partitions(root, spec, batch, first_id, last_id)
+        result.rows += batch.num_rows
+        result.last_id = max(result.last_id, last_id)
+        # Persist after every batch so an interrupted export resumes cleanly
+        entry["last_id"] = result.last_id
+        state[table] = entry
+        _save_state(root, state)
+    entry.pop("rewrite_from", None)
+    entry["last_id"] = result.last_id
+    state[table] = entry
+    _save_state(root, state)
+    return result
+
+
+class _ChunkSink:
+    """File-like sink that hands written IPC bytes back in chunks."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+async def arrow_ipc_stream(
+    db: AsyncSession,
+    table: str,
+    after_id: int = 0,
+    station_id: int | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Arrow IPC stream bytes for a table, one record batch per DB batch."""
+    spec = EXPORTS[table]
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, spec.schema)
+    yield sink.drain()
+    async for _, _, batch in iter_batches(db, spec, after_id, station_id, batch_size):
+        writer.write_table(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,368 @@
+"""Delta-encoded storage of successive model runs.
+
+Consecutive Open-Meteo runs for a station overlap almost entirely, so each
+run is stored relative to an earlier one instead of in full:
+
+* values are quantized to 0.1 °F as int16 (``MISSING`` marks absent hours);
+* a keyframe stores the whole quantized series, zlib-compressed;
+* a delta run stores ``current - base`` where the base run's series is
+  aligned on valid time (hours outside the base count as 0), so unchanged
+  hours become zeros and compress to almost nothing;
+* a new keyframe is written every ``KEYFRAME_EVERY`` runs, or when a run no
+  longer overlaps its base, which bounds the decode chain.
+
+Every delta names its base explicitly (``base_id``), so concurrent writers
+stay correct even if they encode against the same base. Writers in other
+processes keep their own heads, so their chains can interleave in id order
+and a run's base may lie before the id range being read; such bases are
+loaded by following ``base_id`` links (see :func:`_with_bases`). Decoding a
+chain is a handful of vectorized NumPy operations per run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import on_commit
+from app.models.weather import ForecastRun
+
+QArray = npt.NDArray[np.int16]
+
+SCALE = 10
+MISSING = np.int16(-32768)
+# ±300 °F keeps every delta inside int16
+CLIP = 3000
+KEYFRAME_EVERY = 24
+# Longest series a run may hold; Open-Meteo forecasts at most 16 days ahead.
+# Bounds which runs can cover a given valid time.
+MAX_HORIZON_HOURS = 16 * 24
+
+
+def quantize(values: npt.ArrayLike) -> QArray:
+    arr = np.asarray(values, dtype=np.float64)
+    missing = ~np.isfinite(arr)
+    q = np.clip(np.rint(np.where(missing, 0.0, arr) * SCALE), -CLIP, CLIP)
+    q[missing] = MISSING
+    out: QArray = q.astype(np.int16)
+    return out
+
+
+def dequantize(q: QArray) -> npt.NDArray[np.float32]:
+    out = (q / SCALE).astype(np.float32)
+    out[q == MISSING] = np.nan
+    return out
+
+
+def _align(base: QArray, shift: int, n: int) -> npt.NDArray[np.int32]:
+    """Base values at the current run's valid hours; 0 where the base has none."""
+    out = np.zeros(n, dtype=np.int32)
+    idx = np.arange(n) + shift
+    valid = (idx >= 0) & (idx < len(base))
+    vals = base[idx[valid]].astype(np.int32)
+    vals[vals == MISSING] = 0
+    out[valid] = vals
+    return out
+
+
+def _shift_hours(start: datetime, base_start: datetime) -> int:
+    return int((_utc(start) - _utc(base_start)) // timedelta(hours=1))
+
+
+def _utc(dt: datetime) -> datetime:
+    # sqlite returns naive datetimes that are already UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def encode_keyframe(q: QArray) -> bytes:
+    return zlib.compress(q.astype("<i2").tobytes())
+
+
+def encode_delta(q: QArray, base: QArray, shift: int) -> bytes:
+    aligned = _align(base, shift, len(q))
+    delta = np.where(q == MISSING, MISSING, q.astype(np.int32) - aligned)
+    return zlib.compress(delta.astype("<i2").tobytes())
+
+
+def decode(payload: bytes, base: QArray | None = None, shift: int = 0) -> QArray:
+    raw = np.frombuffer(zlib.decompress(payload), dtype="<i2")
+    if base is None:
+        return raw.astype(np.int16)
+    aligned = _align(base, shift, len(raw))
+    return np.where(raw == MISSING, MISSING, aligned + raw).astype(np.int16)
+
+
+def decode_chain(runs: Sequence[ForecastRun]) -> dict[int, QArray]:
+    """Reconstruct every run in ``runs`` (id order, every base included)."""
+    decoded: dict[int, QArray] = {}
+    starts: dict[int, datetime] = {}
+    for run in runs:
+        if run.base_id is None:
+            decoded[run.id] = decode(run.payload)
+        else:
+            decoded[run.id] = decode(
+                run.payload,
+                decoded[run.base_id],
+                _shift_hours(run.hourly_start, starts[run.base_id]),
+            )
+        starts[run.id] = run.hourly_start
+    return decoded
+
+
+@dataclass(frozen=True)
+class _Head:
+    """Latest committed run for a (station, source), kept decoded in memory."""
+
+    run_id: int
+    keyframe_id: int
+    depth: int
+    hourly_start: datetime
+    values: QArray
+
+
+# Keyed by engine so separate databases (tests, scripts) never share heads
+_heads: weakref.WeakKeyDictionary[Any, dict[tuple[int, str], _Head]] = (
+    weakref.WeakKeyDictionary()
+)
+_locks: dict[tuple[int, str], asyncio.Lock] = {}
+
+
+async def _load_head(db: AsyncSession, station_id: int, source: str) -> _Head | None:
+    latest = (
+        await db.execute(
+            select(ForecastRun)
+            .where(ForecastRun.station_id == station_id, ForecastRun.source == source)
+            .order_by(ForecastRun.id.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    if latest is None:
+        return None
+    keyframe_id = latest.keyframe_id or latest.id
+    chain = await _chain(db, station_id, source, keyframe_id, latest.id)
+    decoded = decode_chain(chain)
+    # Other writers' runs may sit in between; count only this run's links
+    by_id = {run.id: run for run in chain}
+    depth, run = 0, latest
+    while run.base_id is not None:
+        depth, run = depth + 1, by_id[run.base_id]
+    return _Head(
+        run_id=latest.id,
+        keyframe_id=keyframe_id,
+        depth=depth,
+        hourly_start=latest.hourly_start,
+        values=decoded[latest.id],
+    )
+
+
+async def _chain(
+    db: AsyncSession, station_id: int, source: str, first_id: int, last_id: int
+) -> list[ForecastRun]:
+    """Runs with ids in ``[first_id, last_id]`` plus any bases they need."""
+    res = await db.execute(
+        select(ForecastRun)
+        .where(
+            ForecastRun.station_id == station_id,
+            ForecastRun.source == source,
+            ForecastRun.id >= first_id,
+            ForecastRun.id <= last_id,
+        )
+        .order_by(ForecastRun.id)
+    )
+    return await _with_bases(db, list(res.scalars().all()))
+
+
+async def _with_bases(db: AsyncSession, runs: list[ForecastRun]) -> list[ForecastRun]:
+    """Add the runs' bases that are not loaded yet, back to their keyframes.
+
+    A run from an interleaved chain can name a base before the range read;
+    each round loads one more link of every such chain.
+    """
+    by_id = {run.id: run for run in runs}
+    missing = {r.base_id for r in runs if r.base_id is not None} - set(by_id)
+    while missing:
+        res = await db.execute(
+            select(ForecastRun).where(ForecastRun.id.in_(sorted(missing)))
+        )
+        loaded = list(res.scalars().all())
+        if len(loaded) != len(missing):
+            raise LookupError(f"forecast run bases missing: {sorted(missing)}")
+        by_id.update((run.id, run) for run in loaded)
+        missing = {r.base_id for r in loaded if r.base_id is not None} - set(by_id)
+    return sorted(by_id.values(), key=lambda run: run.id)
+
+
+async def append_run(
+    db: AsyncSession,
+    station_id: int,
+    source: str,
+    run_time: datetime,
+    hourly_start: datetime,
+    values: npt.ArrayLike,
+) -> ForecastRun:
+    """Add one run to the session, as a delta against the latest committed run.
+
+    Hours past ``MAX_HORIZON_HOURS`` are dropped.
+    """
+    key = (station_id, source)
+    heads = _heads.setdefault(db.get_bind(), {})
+    async with _locks.setdefault(key, asyncio.Lock()):
+        head = heads.get(key)
+        if head is None:
+            head = await _load_head(db, station_id, source)
+
+        q = quantize(values)[:MAX_HORIZON_HOURS]
+        shift = _shift_hours(hourly_start, head.hourly_start) if head else 0
+        keyframe = (
+            head is None
+            or head.depth + 1 >= KEYFRAME_EVERY
+            or not 0 <= shift < len(head.values)
+        )
+        if keyframe:
+            run = ForecastRun(payload=encode_keyframe(q))
+        else:
+            assert head is not None
+            run = ForecastRun(
+                payload=encode_delta(q, head.values, shift),
+                base_id=head.run_id,
+                keyframe_id=head.keyframe_id,
+            )
+        run.station_id = station_id
+        run.source = source
+        run.run_time = run_time
+        run.hourly_start = hourly_start
+        run.hours = len(q)
+        db.add(run)
+        await db.flush()
+
+        new_head = _Head(
+            run_id=run.id,
+            keyframe_id=run.keyframe_id or run.id,
+            depth=0 if head is None or run.base_id is None else head.depth + 1,
+            hourly_start=hourly_start,
+            values=q,
+        )
+
+    # Only committed runs may serve as a base
+    def _advance() -> None:
+        current = heads.get(key)
+        if current is None or current.run_id < new_head.run_id:
+            heads[key] = new_head
+
+    on_commit(db, _advance)
+    return run
+
+
+async def forecast_evolution(
+    db: AsyncSession,
+    station_id: int,
+    valid_time: datetime,
+    source: str | None = None,
+) -> list[dict[str, Any]]:
+    """Forecast for ``valid_time`` from every stored run that covered it.
+
+    Only runs starting within ``MAX_HORIZON_HOURS`` before ``valid_time`` can
+    cover it; those and the deltas back to their keyframes are read, each a
+    few hundred compressed bytes rather than a full document.
+    """
+    valid_time = _utc(valid_time)
+    hour = timedelta(hours=1)
+    stmt = select(ForecastRun.id, ForecastRun.source, ForecastRun.keyframe_id).where(
+        ForecastRun.station_id == station_id,
+        ForecastRun.hourly_start <= valid_time,
+        ForecastRun.hourly_start > valid_time - MAX_HORIZON_HOURS * hour,
+    )
+    if source is not None:
+        stmt = stmt.where(ForecastRun.source == source)
+    candidates = (await db.execute(stmt)).all()
+    if not candidates:
+        return []
+
+    points: list[dict[str, Any]] = []
+    by_source: dict[str, list[Any]] = {}
+    for row in candidates:
+        by_source.setdefault(row.source, []).append(row)
+    for src, rows in sorted(by_source.items()):
+        first = min(r.keyframe_id or r.id for r in rows)
+        last = max(r.id for r in rows)
+        chain = await _chain(db, station_id, src, first, last)
+        decoded = decode_chain(chain)
+        for run in chain:
+            offset = (valid_time - _utc(run.hourly_start)) // hour
+            if not 0 <= offset < run.hours:
+                continue
+            value = decoded[run.id][offset]
+            if value == MISSING:
+                continue
+            points.append(
+                {
+                    "source": src,
+                    "run_time": _utc(run.run_time),
+                    "lead_hours": (valid_time - _utc(run.run_time)) / hour,
+                    "temperature": float(value) / SCALE,
+                }
+            )
+    points.sort(key=lambda p: (p["run_time"], p["source"]))
+    return points
+
+
+async def run_series(
+    db: AsyncSession, keys: Iterable[tuple[int, str, datetime]]
+) -> dict[tuple[int, str, datetime], tuple[datetime, npt.NDArray[np.float32]]]:
+    """Decoded series of the runs named by (station_id, source, run_time).
+
+    Returns ``(hourly_start, values)`` under each requested key that has a
+    stored run; run times are compared in UTC. Each (station, source) is decoded from the
+    earliest keyframe any requested run needs.
+    """
+    wanted = {(sid, src, _utc(at)): (sid, src, at) for sid, src, at in keys}
+    if not wanted:
+        return {}
+    res = await db.execute(
+        select(
+            ForecastRun.id,
+            ForecastRun.station_id,
+            ForecastRun.source,
+            ForecastRun.keyframe_id,
+            ForecastRun.run_time,
+        ).where(
+            ForecastRun.station_id.in_(sorted({k[0] for k in wanted})),
+            ForecastRun.run_time.in_(sorted({k[2] for k in wanted})),
+        )
+    )
+    matches: dict[tuple[int, str], dict[int, int]] = {}
+    for run_id, sid, src, keyframe_id, run_time in res.all():
+        if (sid, src, _utc(run_time)) in wanted:
+            matches.setdefault((sid, src), {})[run_id] = keyframe_id or run_id
+
+    out: dict[tuple[int, str, datetime], tuple[datetime, npt.NDArray[np.float32]]] = {}
+    for (sid, src), runs in sorted(matches.items()):
+        chain = await _chain(db, sid, src, min(runs.values()), max(runs))
+        decoded = decode_chain(chain)
+        for run in chain:
+            if run.id in runs:
+                key = wanted[(sid, src, _utc(run.run_time))]
+                out[key] = (_utc(run.hourly_start), dequantize(decoded[run.id]))
+    return out
+
+
+async def storage_stats(db: AsyncSession, station_id: int) -> dict[str, int]:
+    """Runs, keyframes and stored bytes for a station (for capacity checks)."""
+    res = await db.execute(
+        select(
+            func.count(ForecastRun.id),
+            func.count(ForecastRun.id).filter(ForecastRun.base_id.is_(None)),
+            func.coalesce(func.sum(func.length(ForecastRun.payload)), 0),
+        ).where(ForecastRun.station_id == station_id)
+    )
+    runs, keyframes, size = res.one()
+    return {"runs": runs, "keyframes": keyframes, "payload_bytes": size}
@@ -1,96 +1,253 @@
+import json
 from datetime import datetime, timezone
 from typing import Dict, Any
 
 import httpx
-from sqlalchemy import select
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.weather import WeatherStation, WeatherForecast
-from app.services.ingest_guard import should_run
+from app.core.log import get_logger
+from app.core.settings import get_settings
+from app.models.weather import WeatherForecast
+from app.services import forecast_runs, series
+from app.services.rollups import DailyRollup
+from app.services.singleflight import model_run, upstream_flight
+from app.services.spatial import grid_groups
+from app.services.station_registry import StationLike, station_registry
+from app.services.upstream_cache import through_cache
+from app.services.warmup import warm_slots
+
+# Models requested in one call; each becomes its own WeatherForecast row
+ENSEMBLE_MODELS = ("gfs_seamless", "ncep_hrrr_conus", "ecmwf_ifs025")
+ENSEMBLE_SOURCE = "ensemble"
+
+log = get_logger(__name__)
 
 OPEN_METEO_URL = (
-    "https://api.open-meteo.com/v1/forecast"
+    "{base}"
     "?latitude={lat}&longitude={lon}"
     "&hourly=temperature_2m"
+    "&models={models}"
+    "&temperature_unit=fahrenheit"
     "&timezone=UTC"
 )
 
 
-async def fetch_forecast(client: httpx.AsyncClient, station: WeatherStation) -> Any:
-    """Fetch weather forecast data from Open-Meteo API for a station."""
-    url = OPEN_METEO_URL.format(lat=station.lat, lon=station.lon)
-    r = await client.get(url, timeout=20.0)
-    r.raise_for_status()
-    return r.json()
+_client: httpx.AsyncClient | None = None
+
+
+def forecast_client() -> httpx.AsyncClient:
+    """The client every Open-Meteo fetch runs on, created on first use.
+
+    A fetch shared by several callers must not depend on a client that one
+    of them owns and may close while the others are still waiting.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(http2=True)
+    return _client
+
+
+async def close_forecast_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch_forecast(station: StationLike) -> Any:
+    """Fetch weather forecast data from Open-Meteo API for a station.
+
+    Concurrent and near-simultaneous calls for the same station and model
+    run share one request (see app.services.singleflight), made on
+    :func:`forecast_client`.
+    """
+    url = OPEN_METEO_URL.format(
+        base=get_settings().open_meteo_url,
+        lat=station.lat,
+        lon=station.lon,
+        models=",".join(ENSEMBLE_MODELS),
+    )
+
+    async def get() -> bytes:
+        r = await forecast_client().get(url, timeout=20.0)
+        r.raise_for_status()
+        return r.content
+
+    # The URL is the same for every run; the run keeps recordings apart
+    run = model_run()
+    body = await upstream_flight.do(
+        ("open-meteo", station.code.upper(), run),
+        lambda: through_cache(f"open-meteo:{url}:{run}", get),
+    )
+    return json.loads(body)
+
+
+def forecast_rows(
+    station_id: int, data: Dict[str, Any], fetched_at: datetime
+) -> list[WeatherForecast]:
+    """Turn a multi-model Open-Meteo response into per-model and ensemble rows.
+
+    Each model's hourly series is stored packed; the trailing ensemble row
+    holds the hour-by-hour mean and spread so the strategy reads one row.
+    """
+    hourly = data.get("hourly") or {}
+    times = hourly.get("time") or []
+    if not times:
+        return []
+    start = datetime.fromisoformat(times[0]).replace(tzinfo=timezone.utc)
+
+    rows: list[WeatherForecast] = []
+    members: list[series.FloatArray] = []
+    # Open-Meteo drops the model suffix when only one model is requested; with
+    # several, an unsuffixed series is not any one model's and must not be reused
+    unsuffixed = hourly.get("temperature_2m") if len(ENSEMBLE_MODELS) == 1 else None
+    for model in ENSEMBLE_MODELS:
+        values = hourly.get(f"temperature_2m_{model}", unsuffixed)
+        if values is None:
+            continue
+        packed = series.pack(values)
+        arr = series.unpack(packed)
+        last = series.last_finite(arr)
+        if last is None:
+            continue
+        members.append(arr)
+        rows.append(
+            WeatherForecast(
+                station_id=station_id,
+                source=model,
+                forecast_time=fetched_at,
+                valid_time=start,
+                temperature=last,
+                raw_data={"model": model, "hours": len(arr)},
+                hourly_start=start,
+                hourly_values=packed,
+            )
+        )
+
+    if members:
+        mean, spread = series.ensemble_stats(members)
+        rows.append(
+            WeatherForecast(
+                station_id=station_id,
+                source=ENSEMBLE_SOURCE,
+                forecast_time=fetched_at,
+                valid_time=start,
+                temperature=series.last_finite(mean) or 0.0,
+                raw_data={
+                    "models": [r.source for r in rows],
+                    "max_spread": float(np.nanmax(spread)),
+                },
+                hourly_start=start,
+                hourly_values=series.pack(mean),
+                hourly_spread=series.pack(spread),
+            )
+        )
+    return rows
+
+
+async def store_forecast(
+    db: AsyncSession,
+    station: StationLike,
+    data: Dict[str, Any],
+) -> int:
+    """Add the rows for one fetched forecast to the session; returns the row count.
+
+    Per-model hourly series go to ``forecast_runs`` as deltas against the
+    previous run, so the model rows keep only their scalar temperature. The
+    ensemble row keeps its packed mean and spread for the strategy. Runs,
+    forecast rows and the daily rollup share the session's transaction, so
+    they commit or roll back together.
+    """
+    fetched_at = datetime.now(timezone.utc)
+    rows = forecast_rows(station.id, data, fetched_at)
+    # A model temperature loaded by a pre-slot warm-up is now stale
+    warm_slots.invalidate(station.code)
+    for row in rows:
+        if (
+            row.source == ENSEMBLE_SOURCE
+            or row.hourly_values is None
+            or row.hourly_start is None
+        ):
+            continue
+        await forecast_runs.append_run(
+            db,
+            station.id,
+            row.source,
+            fetched_at,
+            row.hourly_start,
+            series.unpack(row.hourly_values),
+        )
+        row.hourly_values = None
+    db.add_all(rows)
+    daily = DailyRollup({station.id: station.timezone})
+    for row in rows:
+        daily.forecast(station.id, row.forecast_time, row.temperature)
+    await daily.apply(db)
+    return len(rows)
 
 
 async def ingest_open_meteo_for_station(db: AsyncSession, station_code: str) -> None:
     """Ingest Open-Meteo data for a specific station."""
-    # Get the station
-    stmt = select(WeatherStation).where(WeatherStation.code == station_code.upper())
-    result = await db.execute(stmt)
-    station = result.scalar_one_or_none()
-    
+    station = await station_registry.resolve(db, station_code)
     if not station:
-        print(f"Station {station_code} not found")
+        log.warning("station not found", extra={"station": station_code})
         return
-    
+
     # Fetch and store data
-    async with httpx.AsyncClient(http2=True) as client:
-        try:
-            data = await fetch_forecast(client, station)
-            wf = WeatherForecast(
-                station_id=station.id,
-                source="OpenMeteo",
-                forecast_time=datetime.now(timezone.utc),
-                valid_time=datetime.now(timezone.utc),
-                temperature=0.0,  # Will be populated from data processing
-                raw_data=data,
-            )
-            db.add(wf)
-            await db.commit()
-            print(f"Stored Open-Meteo data for {station_code}")
-        except Exception as e:
-            print(f"Error ingesting Open-Meteo data for {station_code}: {e}")
+    try:
+        data = await fetch_forecast(station)
+        await store_forecast(db, station, data)
+        await db.commit()
+        log.info("stored open-meteo forecast", extra={"station": station_code})
+    except Exception:
+        log.exception("open-meteo ingest failed", extra={"station": station_code})
 
 
 async def fetch_forecast_single(code: str) -> None:
-    """Fetch forecast for a single station with guard protection."""
-    if not should_run(f"model-{code}"):
-        return
-    
+    """Fetch forecast for a single station (scheduler job)."""
     from app.db.database import AsyncSessionLocal
-    
+
     async with AsyncSessionLocal() as db:
         await ingest_open_meteo_for_station(db, code)
 
 
 async def ingest_all(db: AsyncSession) -> None:
-    """Ingest weather data for all stations from Open-Meteo."""
-    # Get all stations
-    res = await db.execute(select(WeatherStation))
-    stations = list(res.scalars().all())
+    """Ingest weather data for all stations from Open-Meteo.
+
+    Stations sharing an ``INGEST_GRID_CELL_DEG`` cell share one fetch.
+    """
+    if not len(station_registry):
+        await station_registry.load(db)
+    stations = station_registry.all()
 
     if not stations:
         return
 
-    # Fetch data for all stations
-    async with httpx.AsyncClient(http2=True) as client:
-        for station in stations:
+    # Fetch data once per grid cell, store it for every station in the cell
+    groups = grid_groups(stations, get_settings().ingest_grid_cell_deg)
+    for group in groups:
+        try:
+            data = await fetch_forecast(group[0])
+        except Exception:
+            # Log error but continue with other stations
+            log.exception("open-meteo ingest failed", extra={"station": group[0].code})
+            continue
+        for station in group:
             try:
-                data = await fetch_forecast(client, station)
-                wf = WeatherForecast(
-                    station_id=station.id,
-                    source="OpenMeteo",
-                    forecast_time=datetime.now(timezone.utc),
-                    valid_time=datetime.now(timezone.utc),
-                    temperature=0.0,  # Will be populated from data processing
-                    raw_data=data,
+                await store_forecast(db, station, data)
+            except Exception:
+                log.exception(
+                    "open-meteo ingest failed", extra={"station": station.code}
                 )
-                db.add(wf)
-            except Exception as e:
-                # Log error but continue with other stations
-                print(f"Error ingesting data for station {station.code}: {e}")
                 continue
+            log.debug(
+                "stored open-meteo forecast",
+                extra={
+                    "station": station.code,
+                    "cell_size": len(group),
+                    "sample": 20,
+                },
+            )
 
     await db.commit()
@@ -0,0 +1,221 @@
+"""Fill in observed highs and keep per-station accuracy current.
+
+For one station day (local standard time; see app.services.rollups) the
+final observed high of every station is the latest ``wethr_highs`` scrape
+tagged with that date. A set-based ``UPDATE tmax_calculations ... FROM``
+writes it into every signal tagged with the same day that has no observed
+high yet (untagged older signals by creation time within the station's day,
+one statement per distinct UTC offset), and ``RETURNING`` hands back exactly
+the rows it changed. Their errors are summed
+per station and added to ``station_accuracy`` with an upsert, so accuracy
+never needs a scan of the signal history and re-running a day adds nothing.
+The observed highs are also recorded in the ``station_daily`` rollups.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.log import get_logger
+from app.core.response_cache import response_cache
+from app.db.database import on_commit, upsert_insert
+from app.models.weather import StationAccuracy, TmaxCalculation, WethrHigh
+from app.services.rollups import DailyRollup, day_bounds, station_zones
+
+log = get_logger(__name__)
+
+# An error within this many °F counts as a hit
+HIT_TOLERANCE_F = 1.0
+
+
+def observed_highs_query(day: date) -> Any:
+    """Latest wethr_highs reading per station for ``day``, as a subquery."""
+    day_iso = day.isoformat()
+    latest = (
+        select(
+            WethrHigh.station_id,
+            func.max(WethrHigh.scraped_at).label("scraped_at"),
+        )
+        .where(WethrHigh.date_iso == day_iso)
+        .group_by(WethrHigh.station_id)
+        .subquery()
+    )
+    return (
+        select(WethrHigh.station_id, WethrHigh.wethr_high)
+        .join(
+            latest,
+            and_(
+                WethrHigh.station_id == latest.c.station_id,
+                WethrHigh.scraped_at == latest.c.scraped_at,
+            ),
+        )
+        .where(WethrHigh.date_iso == day_iso)
+        .subquery("observed")
+    )
+
+
+def reconcile_statement(
+    day: date, start: datetime, end: datetime, station_ids: Iterable[int]
+) -> Any:
+    """UPDATE ... FROM setting observed_high on the day's unreconciled signals.
+
+    ``start``/``end`` are the UTC bounds of ``day`` for ``station_ids``, used
+    for signals stored before their reporting day was recorded.
+    """
+    observed = observed_highs_query(day)
+    return (
+        update(TmaxCalculation)
+        .where(
+            TmaxCalculation.station_id == observed.c.station_id,
+            TmaxCalculation.station_id.in_(sorted(station_ids)),
+            or_(
+                TmaxCalculation.date_iso == day.isoformat(),
+                and_(
+                    TmaxCalculation.date_iso.is_(None),
+                    TmaxCalculation.created_at >= start,
+                    TmaxCalculation.created_at < end,
+                ),
+            ),
+            TmaxCalculation.observed_high.is_(None),
+        )
+        .values(observed_high=observed.c.wethr_high)
+        .returning(
+            TmaxCalculation.station_id,
+            TmaxCalculation.cli_forecast,
+            TmaxCalculation.observed_high,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+@dataclass
+class AccuracyDelta:
+    samples: int = 0
+    sum_error: float = 0.0
+    sum_abs_error: float = 0.0
+    sum_sq_error: float = 0.0
+    within_1f: int = 0
+
+    def add(self, forecast: float, observed: float) -> None:
+        error = forecast - observed
+        self.samples += 1
+        self.sum_error += error
+        self.sum_abs_error += abs(error)
+        self.sum_sq_error += error * error
+        self.within_1f += abs(error) <= HIT_TOLERANCE_F
+
+
+def accuracy_deltas(rows: Iterable[Any]) -> dict[int, AccuracyDelta]:
+    deltas: dict[int, AccuracyDelta] = defaultdict(AccuracyDelta)
+    for station_id, forecast, observed in rows:
+        deltas[station_id].add(forecast, observed)
+    return dict(deltas)
+
+
+async def apply_accuracy(
+    db: AsyncSession, day: date, deltas: dict[int, AccuracyDelta]
+) -> None:
+    """Add per-station deltas to station_accuracy (insert or increment)."""
+    if not deltas:
+        return
+    insert = upsert_insert(db)
+    now = datetime.now(timezone.utc)
+    stmt = insert(StationAccuracy).values(
+        [
+            {
+                "station_id": station_id,
+                "samples": d.samples,
+                "sum_error": d.sum_error,
+                "sum_abs_error": d.sum_abs_error,
+                "sum_sq_error": d.sum_sq_error,
+                "within_1f": d.within_1f,
+                "last_date": day.isoformat(),
+                "updated_at": now,
+            }
+            for station_id, d in sorted(deltas.items())
+        ]
+    )
+    acc = StationAccuracy.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[acc.station_id],
+        set_={
+            "samples": acc.samples + stmt.excluded.samples,
+            "sum_error": acc.sum_error + stmt.excluded.sum_error,
+            "sum_abs_error": acc.sum_abs_error + stmt.excluded.sum_abs_error,
+            "sum_sq_error": acc.sum_sq_error + stmt.excluded.sum_sq_error,
+            "within_1f": acc.within_1f + stmt.excluded.within_1f,
+            "last_date": case(
+                (
+                    or_(
+                        acc.last_date.is_(None),
+                        stmt.excluded.last_date > acc.last_date,
+                    ),
+                    stmt.excluded.last_date,
+                ),
+                else_=acc.last_date,
+            ),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def reconcile_day(db: AsyncSession, day: date) -> dict[int, AccuracyDelta]:
+    """Reconcile one day inside the caller's transaction; returns what changed."""
+    windows: dict[tuple[datetime, datetime], list[int]] = defaultdict(list)
+    for station_id, tz_name in (await station_zones(db)).items():
+        windows[day_bounds(day, tz_name)].append(station_id)
+    rows: list[Any] = []
+    for (start, end), station_ids in sorted(windows.items()):
+        res = await db.execute(reconcile_statement(day, start, end, station_ids))
+        rows.extend(res.all())
+    deltas = accuracy_deltas(rows)
+    await apply_accuracy(db, day, deltas)
+    daily = DailyRollup()
+    for station_id, _, observed in rows:
+        daily.observed(station_id, day, observed)
+    await daily.apply(db)
+
+    def _after_commit() -> None:
+        response_cache.invalidate(*(f"tmax:{sid}" for sid in deltas))
+
+    on_commit(db, _after_commit)
+    return deltas
+
+
+def accuracy_summary(row: StationAccuracy | None) -> dict[str, Any]:
+    if row is None or not row.samples:
+        return {"samples": 0}
+    n = row.samples
+    return {
+        "samples": n,
+        "mae": row.sum_abs_error / n,
+        "rmse": (row.sum_sq_error / n) ** 0.5,
+        "bias": row.sum_error / n,
+        "hit_rate": row.within_1f / n,
+        "last_date": row.last_date,
+    }
+
+
+async def reconcile_yesterday() -> None:
+    """Scheduler job: reconcile the previous day, once it has ended everywhere."""
+    from app.db.database import AsyncSessionLocal
+
+    day = datetime.now(timezone.utc).date() - timedelta(days=1)
+    async with AsyncSessionLocal() as db:
+        deltas = await reconcile_day(db, day)
+        await db.commit()
+    log.info(
+        "reconciled observed highs",
+        extra={
+            "date": day.isoformat(),
+            "stations": len(deltas),
+            "signals": sum(d.samples for d in deltas.values()),
+        },
+    )
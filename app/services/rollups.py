@@ -0,0 +1,268 @@
+"""Per-station daily rollups kept current as rows are written.
+
+``station_daily`` holds one row per station and day: the day's latest
+model temperature, latest wethr.net high, signal count with the latest
+signal's delta/confidence/size, and the observed high once reconciled.
+Writers collect what they insert in a :class:`DailyRollup` and apply it in
+the same transaction, as one multi-row upsert. Applying is commutative:
+"latest" fields only move forward in time and counts add, so batches may be
+applied in any order.
+
+A day is the station's climate day, midnight to midnight local standard time
+as in the NWS daily climate reports. :func:`day_of` and :func:`day_bounds`
+map between timestamps and these days. Highs and signals carry the day they
+report on, which the wethr.net job takes from its slot rather than the clock
+(a post-CLI scrape just after local midnight reports on the day before; see
+app.services.wethr.report_day).
+
+:func:`rebuild_daily` recomputes the rollups from the source tables, for
+history written before ``station_daily`` existed (``scripts/rebuild_daily.py``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Mapping
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import upsert_insert
+from app.models.weather import (
+    StationDaily,
+    TmaxCalculation,
+    WeatherForecast,
+    WeatherStation,
+    WethrHigh,
+)
+
+# Rows per upsert statement, well inside SQLite and Postgres bind limits
+APPLY_BATCH = 1000
+# Source rows fetched per round trip by rebuild_daily
+REBUILD_BATCH = 10_000
+
+
+def standard_offset(tz_name: str, on: date) -> timedelta:
+    """UTC offset of local standard time (daylight saving ignored) on ``on``."""
+    local = datetime.combine(on, time(12), tzinfo=ZoneInfo(tz_name))
+    return (local.utcoffset() or timedelta(0)) - (local.dst() or timedelta(0))
+
+
+def day_of(ts: datetime, tz_name: str = "UTC") -> str:
+    """The ``date_iso`` of the station day ``ts`` falls in."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    ts = ts.astimezone(timezone.utc)
+    return (ts + standard_offset(tz_name, ts.date())).date().isoformat()
+
+
+def day_bounds(day: date, tz_name: str = "UTC") -> tuple[datetime, datetime]:
+    """UTC start and end of station day ``day``."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    start -= standard_offset(tz_name, day)
+    return start, start + timedelta(days=1)
+
+
+async def station_zones(
+    db: AsyncSession, station_ids: Iterable[int] | None = None
+) -> dict[int, str]:
+    """Timezone name per station id, for all stations or just ``station_ids``."""
+    stmt = select(WeatherStation.id, WeatherStation.timezone)
+    if station_ids is not None:
+        stmt = stmt.where(WeatherStation.id.in_(sorted(set(station_ids))))
+    return {sid: tz for sid, tz in (await db.execute(stmt)).all()}
+
+
+def _later(at: datetime | None, than: datetime | None) -> bool:
+    # Ties go to the later write, which for one ingest is the ensemble row
+    return at is not None and (than is None or at >= than)
+
+
+@dataclass
+class DailyDelta:
+    model_temp: float | None = None
+    model_at: datetime | None = None
+    wethr_high: float | None = None
+    wethr_at: datetime | None = None
+    signals: int = 0
+    delta: float | None = None
+    confidence: float | None = None
+    size: float | None = None
+    signal_at: datetime | None = None
+    observed_high: float | None = None
+
+
+class DailyRollup:
+    """Collects one transaction's rows; ``zones`` maps station id to timezone.
+
+    Stations missing from ``zones`` are bucketed by UTC day.
+    """
+
+    def __init__(self, zones: Mapping[int, str] | None = None) -> None:
+        self.days: dict[tuple[int, str], DailyDelta] = {}
+        self.zones = dict(zones or {})
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def _day(self, station_id: int, day: str) -> DailyDelta:
+        return self.days.setdefault((station_id, day), DailyDelta())
+
+    def forecast(self, station_id: int, at: datetime, temperature: float) -> None:
+        d = self._day(station_id, day_of(at, self.zones.get(station_id, "UTC")))
+        if _later(at, d.model_at):
+            d.model_temp, d.model_at = temperature, at
+
+    def high(self, station_id: int, day: str, high: float, at: datetime) -> None:
+        d = self._day(station_id, day)
+        if _later(at, d.wethr_at):
+            d.wethr_high, d.wethr_at = high, at
+
+    def signal(
+        self,
+        station_id: int,
+        at: datetime,
+        delta: float | None,
+        confidence: float,
+        size: float,
+        day: str | None = None,
+    ) -> None:
+        """Count a signal on ``day``, by default the station day of ``at``."""
+        day = day or day_of(at, self.zones.get(station_id, "UTC"))
+        d = self._day(station_id, day)
+        d.signals += 1
+        if _later(at, d.signal_at):
+            d.delta, d.confidence, d.size, d.signal_at = delta, confidence, size, at
+
+    def observed(self, station_id: int, day: date, high: float) -> None:
+        self._day(station_id, day.isoformat()).observed_high = high
+
+    def add_rows(self, model: type[Any], rows: Iterable[Mapping[Any, Any]]) -> None:
+        """Collect inserted rows given as column dicts (see app.services.write_behind)."""
+        for r in rows:
+            if model is WeatherForecast:
+                self.forecast(r["station_id"], r["forecast_time"], r["temperature"])
+            elif model is WethrHigh:
+                self.high(
+                    r["station_id"], r["date_iso"], r["wethr_high"], r["scraped_at"]
+                )
+            elif model is TmaxCalculation:
+                self.signal(
+                    r["station_id"],
+                    r["created_at"],
+                    (r["raw_payload"] or {}).get("delta"),
+                    r["confidence"],
+                    r["size"],
+                    r.get("date_iso"),
+                )
+
+    async def apply(self, db: AsyncSession) -> None:
+        """Upsert the collected days in the caller's transaction."""
+        if not self.days:
+            return
+        now = datetime.now(timezone.utc)
+        values = [
+            {"station_id": station_id, "date_iso": day, **vars(d), "updated_at": now}
+            for (station_id, day), d in sorted(self.days.items())
+        ]
+        for i in range(0, len(values), APPLY_BATCH):
+            await db.execute(self._upsert(db, values[i : i + APPLY_BATCH]))
+        self.days.clear()
+
+    @staticmethod
+    def _upsert(db: AsyncSession, values: list[dict[str, Any]]) -> Any:
+        stmt = upsert_insert(db)(StationDaily).values(values)
+        cur = StationDaily.__table__.c
+        new = stmt.excluded
+
+        def latest(at: str, *fields: str) -> dict[str, Any]:
+            newer = and_(
+                new[at].is_not(None), or_(cur[at].is_(None), new[at] >= cur[at])
+            )
+            return {f: case((newer, new[f]), else_=cur[f]) for f in (*fields, at)}
+
+        return stmt.on_conflict_do_update(
+            index_elements=[cur.station_id, cur.date_iso],
+            set_={
+                **latest("model_at", "model_temp"),
+                **latest("wethr_at", "wethr_high"),
+                **latest("signal_at", "delta", "confidence", "size"),
+                "signals": cur.signals + new.signals,
+                "observed_high": func.coalesce(new.observed_high, cur.observed_high),
+                "updated_at": new.updated_at,
+            },
+        )
+
+
+async def rebuild_daily(
+    db: AsyncSession,
+    station_ids: Iterable[int] | None = None,
+    batch_size: int = REBUILD_BATCH,
+) -> int:
+    """Recompute ``station_daily`` for all stations (or ``station_ids``).
+
+    Existing rollups of those stations are replaced, so re-running is safe;
+    run it while nothing else writes their rows. The caller commits. Returns
+    the number of station days written.
+    """
+    zones = await station_zones(db, station_ids)
+    await db.execute(
+        delete(StationDaily).where(StationDaily.station_id.in_(sorted(zones)))
+    )
+    daily = DailyRollup(zones)
+    sources: list[tuple[type[Any], tuple[Any, ...]]] = [
+        (
+            WeatherForecast,
+            (
+                WeatherForecast.station_id,
+                WeatherForecast.forecast_time,
+                WeatherForecast.temperature,
+            ),
+        ),
+        (
+            WethrHigh,
+            (
+                WethrHigh.station_id,
+                WethrHigh.date_iso,
+                WethrHigh.wethr_high,
+                WethrHigh.scraped_at,
+            ),
+        ),
+        (
+            TmaxCalculation,
+            (
+                TmaxCalculation.station_id,
+                TmaxCalculation.created_at,
+                TmaxCalculation.raw_payload,
+                TmaxCalculation.confidence,
+                TmaxCalculation.size,
+                TmaxCalculation.observed_high,
+                TmaxCalculation.date_iso,
+            ),
+        ),
+    ]
+    for model, columns in sources:
+        # Id order keeps the "later write wins" ties of the live writers
+        stmt = (
+            select(*columns)
+            .where(model.station_id.in_(sorted(zones)))
+            .order_by(model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(stmt)
+        async for rows in result.mappings().partitions(batch_size):
+            daily.add_rows(model, rows)
+            if model is TmaxCalculation:
+                for r in rows:
+                    if r["observed_high"] is not None:
+                        day = r["date_iso"] or day_of(
+                            r["created_at"], zones[r["station_id"]]
+                        )
+                        daily.observed(
+                            r["station_id"], date.fromisoformat(day), r["observed_high"]
+                        )
+    written = len(daily)
+    await daily.apply(db)
+    return written
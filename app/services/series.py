@@ -0,0 +1,54 @@
+"""Compact storage for hourly forecast series.
+
+Series are stored as little-endian float32 blobs (4 bytes per hour instead
+of a JSON number) with missing hours as NaN. Hour ``i`` of a series is valid
+at ``hourly_start + i hours``.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+FloatArray = npt.NDArray[np.float32]
+
+DTYPE = np.dtype("<f4")
+
+
+def pack(values: Sequence[float | None] | npt.NDArray[np.floating]) -> bytes:
+    """Pack a series into float32 bytes; ``None`` becomes NaN."""
+    return np.asarray(values, dtype=np.float64).astype(DTYPE).tobytes()
+
+
+def unpack(blob: bytes) -> FloatArray:
+    """Read-only view over a packed series."""
+    return np.frombuffer(blob, dtype=DTYPE)
+
+
+def last_finite(values: npt.NDArray[np.floating]) -> float | None:
+    """Last non-NaN value, or None if the series is empty or all NaN."""
+    finite = np.flatnonzero(np.isfinite(values))
+    if finite.size == 0:
+        return None
+    return float(values[finite[-1]])
+
+
+def ensemble_stats(members: Sequence[FloatArray]) -> tuple[FloatArray, FloatArray]:
+    """Hour-by-hour mean and spread (population std) across ensemble members.
+
+    Members may differ in length (HRRR stops at 48h); shorter ones are padded
+    with NaN and ignored where missing. Hours no member covers stay NaN.
+    """
+    width = max(len(m) for m in members)
+    stacked = np.full((len(members), width), np.nan, dtype=np.float64)
+    for row, member in zip(stacked, members):
+        row[: len(member)] = member
+    with warnings.catch_warnings():
+        # All-NaN columns legitimately produce NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        mean = np.nanmean(stacked, axis=0)
+        spread = np.nanstd(stacked, axis=0)
+    return mean.astype(DTYPE), spread.astype(DTYPE)
@@ -0,0 +1,155 @@
+"""Sharded scheduling: each node runs the jobs for its share of stations.
+
+Every node schedules the full ``config/ingest_schedule.yml`` but a job only
+does work on the node that owns its station. Ownership comes from a
+consistent-hash ring over the live nodes, so when a node joins or leaves only
+the stations on its arcs move.
+
+Membership is the ``scheduler_nodes`` table. Each node upserts its row every
+``SHARD_HEARTBEAT_SECONDS`` and reads back the rows whose heartbeat is newer
+than ``SHARD_NODE_TTL_SECONDS``; a node that stops heartbeating drops out of
+everyone's ring after the TTL, and a clean shutdown deletes its row at once.
+Node clocks are assumed to be NTP-synchronised.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.log import get_logger
+from app.core.settings import get_settings
+from app.models.system import SchedulerNode
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+VNODES = 64
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes for an even spread."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = VNODES) -> None:
+        self.nodes = tuple(sorted(set(nodes)))
+        ring = sorted(
+            (_point(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._points = [p for p, _ in ring]
+        self._owners = [n for _, n in ring]
+
+    def owner(self, key: str) -> str | None:
+        if not self._points:
+            return None
+        idx = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[idx]
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardCoordinator:
+    def __init__(
+        self,
+        node_id: str,
+        ttl: float = 30.0,
+        enabled: bool = False,
+    ) -> None:
+        self.node_id = node_id
+        self.ttl = timedelta(seconds=ttl)
+        self.enabled = enabled
+        self.ring = HashRing([])
+        self.started_at = datetime.now(timezone.utc)
+        self.last_heartbeat: datetime | None = None
+
+    def owns(self, station_code: str) -> bool:
+        """Whether this node should run jobs for ``station_code``."""
+        if not self.enabled:
+            return True
+        now = datetime.now(timezone.utc)
+        if self.last_heartbeat is None or now - self.last_heartbeat > self.ttl:
+            # Peers have dropped us from their rings; don't double-run
+            return False
+        return self.ring.owner(station_code.upper()) == self.node_id
+
+    def owned(self, station_codes: Iterable[str]) -> list[str]:
+        return sorted(c for c in station_codes if self.owns(c))
+
+    async def heartbeat(self, db: AsyncSession) -> HashRing:
+        """Record this node as alive and rebuild the ring from live members."""
+        now = datetime.now(timezone.utc)
+        await db.merge(
+            SchedulerNode(
+                node_id=self.node_id, started_at=self.started_at, heartbeat_at=now
+            )
+        )
+        res = await db.execute(
+            select(SchedulerNode.node_id).where(
+                SchedulerNode.heartbeat_at > now - self.ttl
+            )
+        )
+        members = set(res.scalars().all()) | {self.node_id}
+        await db.commit()
+
+        self.last_heartbeat = now
+        if set(self.ring.nodes) != members:
+            previous = self.ring.nodes
+            self.ring = HashRing(members)
+            log.info(
+                "shard membership changed",
+                extra={"nodes": list(self.ring.nodes), "previous": list(previous)},
+            )
+        return self.ring
+
+    async def leave(self, db: AsyncSession) -> None:
+        """Remove this node so peers take over its stations immediately."""
+        await db.execute(
+            delete(SchedulerNode).where(SchedulerNode.node_id == self.node_id)
+        )
+        await db.commit()
+        self.last_heartbeat = None
+        self.ring = HashRing([])
+
+
+_settings = get_settings()
+shard = ShardCoordinator(
+    node_id=_settings.node_id or default_node_id(),
+    ttl=_settings.shard_node_ttl_seconds,
+    enabled=_settings.scheduler_sharding,
+)
+
+
+async def shard_heartbeat() -> None:
+    """Scheduler job: refresh membership and rebalance."""
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await shard.heartbeat(db)
+
+
+def sharded(
+    func: Callable[..., Awaitable[T]], coordinator: ShardCoordinator | None = None
+) -> Callable[..., Awaitable[T | None]]:
+    """Wrap a per-station job (station code first arg) to run only on its owner."""
+
+    @wraps(func)
+    async def run(code: str, *args: Any, **kwargs: Any) -> T | None:
+        if not (coordinator or shard).owns(code):
+            return None
+        return await func(code, *args, **kwargs)
+
+    return run
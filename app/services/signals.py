@@ -0,0 +1,131 @@
+"""In-process pub/sub for strategy signals.
+
+``strategy.run_for_station`` publishes each committed ``TmaxCalculation`` here
+and the SSE endpoint fans it out to subscribers. An event's id is the
+committed row id, and the most recent events are kept in a ring buffer in
+publish order, so a client reconnecting with ``Last-Event-ID`` resumes
+without gaps as long as it was not away for longer than the buffer covers.
+Concurrent commits can publish ids out of order, so resuming replays what
+was published after that event rather than comparing ids. A client whose id
+is no longer buffered (or that reconnects after a restart) gets a ``reset``
+event instead and should refetch current state.
+
+Slow consumers never block the publisher: each subscriber has a bounded
+queue, and one that overflows is cut off once its queue drains and has to
+resume from the buffer by reconnecting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+HISTORY_SIZE = 1000
+QUEUE_SIZE = 100
+
+
+@dataclass(frozen=True)
+class SignalEvent:
+    # None only for a reset sent before anything was published
+    id: int | None
+    station_id: int
+    data: dict[str, Any]
+    kind: str = "signal"
+
+
+class SubscriptionLagged(Exception):
+    """The subscriber fell more than QUEUE_SIZE events behind."""
+
+
+@dataclass(eq=False)
+class Subscription:
+    station_ids: frozenset[int] | None
+    queue: asyncio.Queue[SignalEvent] = field(
+        default_factory=lambda: asyncio.Queue(QUEUE_SIZE)
+    )
+    # Missed events (or a reset) to deliver first when resuming from Last-Event-ID
+    backlog: deque[SignalEvent] = field(default_factory=deque)
+    lagged: bool = False
+
+    def wants(self, event: SignalEvent) -> bool:
+        return self.station_ids is None or event.station_id in self.station_ids
+
+    async def next(self, timeout: float | None = None) -> SignalEvent | None:
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        if self.backlog:
+            return self.backlog.popleft()
+        if self.lagged and self.queue.empty():
+            raise SubscriptionLagged()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class SignalBroker:
+    def __init__(self, history_size: int = HISTORY_SIZE) -> None:
+        self._history: deque[SignalEvent] = deque(maxlen=history_size)
+        self._subscribers: set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, station_id: int, data: dict[str, Any]) -> SignalEvent:
+        """Fan out a committed signal; ``data["id"]`` is its row id."""
+        event = SignalEvent(id=data["id"], station_id=station_id, data=data)
+        self._history.append(event)
+        for sub in list(self._subscribers):
+            if not sub.wants(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                sub.lagged = True
+                self._subscribers.discard(sub)
+        return event
+
+    def replay(
+        self, last_event_id: int, station_ids: frozenset[int] | None = None
+    ) -> list[SignalEvent] | None:
+        """Events published after ``last_event_id`` for the given stations.
+
+        None if that event is no longer (or was never) in the buffer.
+        """
+        history = list(self._history)
+        for i in range(len(history) - 1, -1, -1):
+            if history[i].id == last_event_id:
+                return [
+                    e
+                    for e in history[i + 1 :]
+                    if station_ids is None or e.station_id in station_ids
+                ]
+        return None
+
+    def open(
+        self,
+        station_ids: Iterable[int] | None = None,
+        last_event_id: int | None = None,
+    ) -> Subscription:
+        ids = frozenset(station_ids) if station_ids else None
+        sub = Subscription(ids)
+        if last_event_id is not None:
+            missed = self.replay(last_event_id, ids)
+            if missed is None:
+                # Resume from the newest buffered event once state is refetched
+                newest = self._history[-1].id if self._history else None
+                reset = {"reason": "last_event_id_not_buffered"}
+                sub.backlog.append(SignalEvent(newest, 0, reset, kind="reset"))
+            else:
+                sub.backlog.extend(missed)
+        # Registered after the replay so live events never repeat the backlog
+        self._subscribers.add(sub)
+        return sub
+
+    def close(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+
+broker = SignalBroker()
@@ -0,0 +1,80 @@
+"""Coalesce concurrent identical upstream fetches.
+
+Callers asking for the same key while a fetch is in flight await that one
+fetch instead of starting their own, and a result stays servable for a short
+TTL so near-simultaneous repeats (a manual ingest right after the scheduled
+one) cost nothing. Failures are shared with everyone waiting but never
+cached. The fetch runs as its own task, so a caller that is cancelled does
+not cancel it for the others.
+
+Open-Meteo keys are ``(source, station, model run)``; the model run is the
+UTC hour, the cadence at which the upstream models refresh.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from app.core.settings import get_settings
+
+T = TypeVar("T")
+
+
+def model_run(now: datetime | None = None) -> str:
+    """Identifier of the current upstream model run (UTC hour)."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._inflight: dict[Hashable, asyncio.Task[T]] = {}
+        self._recent: dict[Hashable, tuple[float, T]] = {}
+        self.calls = 0
+        self.fetches = 0
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        now = time.monotonic()
+        recent = self._recent.get(key)
+        if recent is not None:
+            if recent[0] > now:
+                return recent[1]
+            del self._recent[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.fetches += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.ttl_seconds > 0:
+            self._recent[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        # Keep the recent map from growing without bound
+        if len(self._recent) > 4096:
+            now = time.monotonic()
+            self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "fetches": self.fetches,
+            "inflight": len(self._inflight),
+            "cached": len(self._recent),
+        }
+
+
+upstream_flight: SingleFlight[bytes] = SingleFlight(
+    get_settings().upstream_singleflight_ttl_seconds
+)
@@ -0,0 +1,199 @@
+"""In-memory spatial index over stations.
+
+Stations are mapped to unit vectors on the sphere and stored in a KD-tree
+(NumPy arrays, brute-force leaves). Straight-line chord distance between
+unit vectors is monotonic in great-circle distance, so nearest-neighbour and
+radius searches in 3-D give exact haversine answers without projection
+error near the poles or the antimeridian.
+
+The station registry builds one index per station snapshot and drops it
+whenever stations change (see ``StationRegistry.spatial_index``).
+:func:`grid_groups` buckets stations into shared model grid cells so batch
+ingest can fetch each cell once.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from app.services.station_registry import StationSnapshot
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 16
+
+FloatArray = npt.NDArray[np.float64]
+
+
+def to_unit(lat: npt.ArrayLike, lon: npt.ArrayLike) -> FloatArray:
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.stack(
+        [cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=-1
+    )
+
+
+def chord_to_km(chord: npt.ArrayLike) -> FloatArray:
+    half = np.clip(np.asarray(chord, dtype=np.float64) / 2, 0.0, 1.0)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(half)
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+@dataclass(frozen=True)
+class _Node:
+    start: int
+    end: int
+    dim: int = -1
+    split: float = 0.0
+    left: int = -1
+    right: int = -1
+
+
+class KDTree:
+    """Static KD-tree over 3-D points; queries return (index, chord distance)."""
+
+    def __init__(self, points: FloatArray, leaf_size: int = LEAF_SIZE) -> None:
+        self.leaf_size = leaf_size
+        self._order = np.arange(len(points))
+        self.nodes: list[_Node] = []
+        self._points = points
+        if len(points):
+            self._build(0, len(points))
+        # Leaves scan contiguous slices of points in tree order
+        self._sorted = points[self._order]
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, start: int, end: int) -> int:
+        idx = len(self.nodes)
+        self.nodes.append(_Node(start, end))
+        if end - start <= self.leaf_size:
+            return idx
+        pts = self._points[self._order[start:end]]
+        dim = int(np.argmax(pts.max(axis=0) - pts.min(axis=0)))
+        mid = (end - start) // 2
+        part = np.argpartition(pts[:, dim], mid)
+        self._order[start:end] = self._order[start:end][part]
+        split = float(self._points[self._order[start + mid], dim])
+        left = self._build(start, start + mid)
+        right = self._build(start + mid, end)
+        self.nodes[idx] = _Node(start, end, dim, split, left, right)
+        return idx
+
+    def _leaf(
+        self, node: _Node, q: FloatArray
+    ) -> tuple[npt.NDArray[np.intp], FloatArray]:
+        d = np.linalg.norm(self._sorted[node.start : node.end] - q, axis=1)
+        return self._order[node.start : node.end], d
+
+    def query(self, q: FloatArray, k: int) -> list[tuple[int, float]]:
+        if not self.nodes or k <= 0:
+            return []
+        # Max-heap of the best k as (-distance, index)
+        best: list[tuple[float, int]] = []
+
+        def visit(i: int) -> None:
+            node = self.nodes[i]
+            if node.left < 0:
+                ids, dist = self._leaf(node, q)
+                for j, dj in zip(ids.tolist(), dist.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-dj, j))
+                    elif dj < -best[0][0]:
+                        heapq.heapreplace(best, (-dj, j))
+                return
+            diff = q[node.dim] - node.split
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(best) < k or abs(diff) < -best[0][0]:
+                visit(far)
+
+        visit(0)
+        return sorted(((j, -d) for d, j in best), key=lambda item: item[1])
+
+    def query_radius(self, q: FloatArray, r: float) -> list[tuple[int, float]]:
+        out: list[tuple[int, float]] = []
+        if not self.nodes:
+            return out
+        stack = [0]
+        while stack:
+            node = self.nodes[stack.pop()]
+            if node.left < 0:
+                ids, dist = self._leaf(node, q)
+                hit = dist <= r
+                out.extend(zip(ids[hit].tolist(), dist[hit].tolist()))
+                continue
+            diff = q[node.dim] - node.split
+            stack.append(node.left if diff < 0 else node.right)
+            if abs(diff) <= r:
+                stack.append(node.right if diff < 0 else node.left)
+        out.sort(key=lambda item: item[1])
+        return out
+
+
+class SpatialIndex:
+    def __init__(self, stations: Sequence[StationSnapshot]) -> None:
+        self.stations = list(stations)
+        self.tree = KDTree(
+            to_unit([s.lat for s in self.stations], [s.lon for s in self.stations])
+            if self.stations
+            else np.empty((0, 3))
+        )
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 5
+    ) -> list[tuple[StationSnapshot, float]]:
+        hits = self.tree.query(to_unit(lat, lon), k)
+        return [(self.stations[i], float(chord_to_km(c))) for i, c in hits]
+
+    def within(
+        self, lat: float, lon: float, radius_km: float
+    ) -> list[tuple[StationSnapshot, float]]:
+        hits = self.tree.query_radius(to_unit(lat, lon), km_to_chord(radius_km))
+        return [(self.stations[i], float(chord_to_km(c))) for i, c in hits]
+
+
+def grid_cell(lat: float, lon: float, cell_deg: float) -> tuple[float, float]:
+    """Centre of the regular lat/lon cell containing a point."""
+    return (
+        round((math.floor(lat / cell_deg) + 0.5) * cell_deg, 6),
+        round((math.floor(lon / cell_deg) + 0.5) * cell_deg, 6),
+    )
+
+
+def grid_groups(
+    stations: Iterable[StationSnapshot], cell_deg: float
+) -> list[list[StationSnapshot]]:
+    """Group stations that fall in the same model grid cell.
+
+    With ``cell_deg <= 0`` every station is its own group. The first station
+    of each group (lowest id) is the one whose coordinates are fetched.
+    """
+    ordered = sorted(stations, key=lambda s: s.id)
+    if cell_deg <= 0:
+        return [[s] for s in ordered]
+    groups: dict[tuple[float, float], list[StationSnapshot]] = {}
+    for s in ordered:
+        groups.setdefault(grid_cell(s.lat, s.lon, cell_deg), []).append(s)
+    return list(groups.values())
@@ -0,0 +1,182 @@
+"""Process-wide cache of weather stations.
+
+Stations change rarely but every scheduled job and the ingest route look one
+up by code. The registry keeps immutable snapshots keyed by code and id and
+swaps whole dictionaries on change, so readers never need the lock. A row in
+``registry_versions`` is bumped in the same transaction as every station
+write; workers compare it with the version they loaded to detect staleness.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Union
+
+from sqlalchemy import Select, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.log import get_logger
+from app.models.system import RegistryVersion
+from app.models.weather import WeatherStation
+
+if TYPE_CHECKING:
+    from app.services.spatial import SpatialIndex
+
+REGISTRY_NAME = "stations"
+
+
+@dataclass(frozen=True)
+class StationSnapshot:
+    id: int
+    code: str
+    name: str
+    lat: float
+    lon: float
+    timezone: str
+    coastal_distance_km: float | None
+
+    @classmethod
+    def from_orm(cls, station: WeatherStation) -> StationSnapshot:
+        return cls(
+            id=station.id,
+            code=station.code,
+            name=station.name,
+            lat=station.lat,
+            lon=station.lon,
+            timezone=station.timezone,
+            coastal_distance_km=station.coastal_distance_km,
+        )
+
+
+# Services accept either a live ORM row or a cached snapshot
+StationLike = Union[WeatherStation, StationSnapshot]
+
+
+def station_by_code_query(code: str) -> Select[tuple[WeatherStation]]:
+    """Station lookup by code; served by the unique index on weather_stations.code."""
+    return select(WeatherStation).where(WeatherStation.code == code.upper())
+
+
+async def _db_version(db: AsyncSession) -> int:
+    res = await db.execute(
+        select(RegistryVersion.version).where(RegistryVersion.name == REGISTRY_NAME)
+    )
+    return res.scalar_one_or_none() or 0
+
+
+async def bump_version(db: AsyncSession) -> int:
+    """Increment the shared station version inside the caller's transaction.
+
+    The counter row is seeded by the migration (and by ``create_all``).
+    """
+    res = await db.execute(
+        update(RegistryVersion)
+        .where(RegistryVersion.name == REGISTRY_NAME)
+        .values(version=RegistryVersion.version + 1)
+        .returning(RegistryVersion.version)
+    )
+    version = res.scalar_one_or_none()
+    if version is None:
+        raise RuntimeError(
+            f"registry_versions has no {REGISTRY_NAME!r} row; run migrations"
+        )
+    return int(version)
+
+
+class StationRegistry:
+    def __init__(self) -> None:
+        self._by_code: dict[str, StationSnapshot] = {}
+        self._by_id: dict[int, StationSnapshot] = {}
+        self._lock = asyncio.Lock()
+        self._spatial: SpatialIndex | None = None
+        # Shared version this copy was built from; -1 until first load
+        self.version = -1
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, code: str) -> StationSnapshot | None:
+        return self._by_code.get(code.upper())
+
+    def get_by_id(self, station_id: int) -> StationSnapshot | None:
+        return self._by_id.get(station_id)
+
+    def all(self) -> list[StationSnapshot]:
+        return list(self._by_id.values())
+
+    def spatial_index(self) -> SpatialIndex:
+        """KD-tree over the current stations, rebuilt lazily after each change."""
+        from app.services.spatial import SpatialIndex
+
+        index = self._spatial
+        if index is None:
+            index = self._spatial = SpatialIndex(self.all())
+        return index
+
+    async def load(self, db: AsyncSession) -> None:
+        """(Re)load every station from the database."""
+        async with self._lock:
+            version = await _db_version(db)
+            res = await db.execute(select(WeatherStation))
+            snapshots = [StationSnapshot.from_orm(s) for s in res.scalars().all()]
+            self._swap(snapshots, version)
+
+    async def is_stale(self, db: AsyncSession) -> bool:
+        return await _db_version(db) != self.version
+
+    async def refresh_if_stale(self, db: AsyncSession) -> bool:
+        """Reload when another worker changed stations; returns True if reloaded."""
+        if not await self.is_stale(db):
+            return False
+        await self.load(db)
+        return True
+
+    def upsert(self, station: WeatherStation, version: int | None = None) -> None:
+        """Apply a committed create/update without a full reload.
+
+        ``version`` is the shared version the change was committed at. It is
+        adopted only if it directly follows ours; otherwise another worker
+        changed stations in between, and keeping the old version makes the
+        next refresh reload them.
+        """
+        snap = StationSnapshot.from_orm(station)
+        merged = {sid: s for sid, s in self._by_id.items() if sid != snap.id}
+        merged[snap.id] = snap
+        if version is None or version != self.version + 1:
+            version = self.version
+        self._swap(list(merged.values()), version)
+
+    async def resolve(self, db: AsyncSession, code: str) -> StationSnapshot | None:
+        """Look a station up by code, falling back to the database on a miss."""
+        snap = self.get(code)
+        if snap is not None:
+            return snap
+        res = await db.execute(station_by_code_query(code))
+        station = res.scalar_one_or_none()
+        if station is None:
+            return None
+        # Created by another worker since our last load
+        self.upsert(station)
+        return self.get(code)
+
+    def _swap(self, snapshots: list[StationSnapshot], version: int) -> None:
+        # No await between the assignments, so coroutines never see a half swap
+        self._by_code = {s.code.upper(): s for s in snapshots}
+        self._by_id = {s.id: s for s in snapshots}
+        self._spatial = None
+        self.version = version
+
+
+station_registry = StationRegistry()
+
+
+async def refresh_station_registry() -> None:
+    """Scheduler job: pick up station changes made by other workers."""
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if await station_registry.refresh_if_stale(db):
+            get_logger(__name__).info(
+                "station registry reloaded", extra={"version": station_registry.version}
+            )
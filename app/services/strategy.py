@@ -1,37 +1,73 @@
 from __future__ import annotations
 import math
 from datetime import datetime, timezone, date
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.log import get_logger
+from app.core.response_cache import response_cache
+from app.db.database import on_commit
 from app.models.weather import (
     WeatherStation,
     WeatherForecast,
     WethrHigh,
     TmaxCalculation,
 )
+from app.services import series
+from app.services.rollups import DailyRollup, day_of
+from app.services.signals import broker
+from app.services.station_registry import StationLike
+from app.services.write_behind import WriteBehind
 
+log = get_logger(__name__)
 
-async def _latest_model_temp(db: AsyncSession, station_id: int) -> float | None:
-    """Get the latest model temperature forecast for a station."""
-    stmt = (
+
+def _latest_forecast_query(station_id: int) -> Select[tuple[WeatherForecast]]:
+    """Latest forecast for a station; served by ix_weather_forecasts_station_forecast_time.
+
+    Rows of one ingest share forecast_time and the ensemble row is inserted
+    last, so the id tiebreak prefers it over the individual models.
+    """
+    return (
         select(WeatherForecast)
         .where(WeatherForecast.station_id == station_id)
-        .order_by(WeatherForecast.forecast_time.desc())
+        .order_by(WeatherForecast.forecast_time.desc(), WeatherForecast.id.desc())
         .limit(1)
     )
+
+
+async def latest_model_temp(
+    db: AsyncSession, station_id: int
+) -> tuple[float, float | None] | None:
+    """Get the latest model temperature forecast and ensemble spread for a station."""
+    stmt = _latest_forecast_query(station_id)
     wf = (await db.execute(stmt)).scalar_one_or_none()
     if not wf:
         return None
-    
+
+    # Packed hourly series: use the last hour, like the legacy JSON path
+    if wf.hourly_values:
+        values = series.unpack(wf.hourly_values)
+        idx = np.flatnonzero(np.isfinite(values))
+        if idx.size:
+            spread = None
+            if wf.hourly_spread:
+                spread = float(series.unpack(wf.hourly_spread)[idx[-1]])
+            return float(values[idx[-1]]), spread
+
     # If raw_data contains hourly temperature array, get the last value
-    if wf.raw_data and "hourly" in wf.raw_data and "temperature_2m" in wf.raw_data["hourly"]:
+    if (
+        wf.raw_data
+        and "hourly" in wf.raw_data
+        and "temperature_2m" in wf.raw_data["hourly"]
+    ):
         temps = wf.raw_data["hourly"]["temperature_2m"]
         if temps and len(temps) > 0:
-            return float(temps[-1])
-    
+            return float(temps[-1]), None
+
     # Fallback to the temperature field
-    return wf.temperature
+    return wf.temperature, None
 
 
 def _scoring(delta: float) -> tuple[float, float]:
@@ -46,20 +82,38 @@ def _scoring(delta: float) -> tuple[float, float]:
     return 0.50, 0.5
 
 
-async def run_for_station(db: AsyncSession, station: WeatherStation, wethr_high: float) -> None:
-    """Run strategy calculation for a station after receiving a Wethr high temperature."""
-    model_temp = await _latest_model_temp(db, station.id)
-    if model_temp is None:
-        print(f"No model temperature found for station {station.code}")
+async def run_for_station(
+    db: AsyncSession,
+    station: StationLike,
+    wethr_high: float,
+    sink: WriteBehind | None = None,
+    latest: tuple[float, float | None] | None = None,
+    date_iso: str | None = None,
+) -> None:
+    """Run strategy calculation for a station after receiving a Wethr high temperature.
+
+    The signal is added to ``db`` and published when it commits, or, with a
+    write-behind ``sink``, queued there and published once it is flushed.
+    ``latest`` is a model temperature and spread already loaded by the
+    pre-slot warm-up; without it the latest forecast is read here.
+    ``date_iso`` is the station day the high reports on, by default the
+    current one.
+    """
+    if latest is None:
+        latest = await latest_model_temp(db, station.id)
+    if latest is None:
+        log.warning("no model temperature", extra={"station": station.code})
         return
-    
+    model_temp, model_spread = latest
+
     delta = model_temp - wethr_high
     conf, size = _scoring(delta)
 
+    now = datetime.now(timezone.utc)
     tmax_calc = TmaxCalculation(
         station_id=station.id,
         cli_forecast=model_temp,
-        observed_high=None,  # Will be filled in later when actual observed data is available
+        observed_high=None,  # Filled in by app.services.reconcile once the day is over
         method="MARLIN_v1",
         confidence=conf,
         size=size,
@@ -68,9 +122,49 @@ async def run_for_station(db: AsyncSession, station: WeatherStation, wethr_high:
             "model_temp": model_temp,
             "wethr_high": wethr_high,
             "station_code": station.code,
+            "model_spread": model_spread,
+        },
+        date_iso=date_iso or day_of(now, station.timezone),
+        created_at=now,
+    )
+    event = {
+        "id": None,
+        "station_id": station.id,
+        "station_code": station.code,
+        "cli_forecast": model_temp,
+        "method": tmax_calc.method,
+        "confidence": conf,
+        "size": size,
+        "delta": delta,
+        "wethr_high": wethr_high,
+        "model_spread": model_spread,
+        "created_at": tmax_calc.created_at.isoformat(),
+        "date_iso": tmax_calc.date_iso,
+    }
+
+    # Subscribers correlate the event with the row by id
+    def _publish(row_id: int) -> None:
+        response_cache.invalidate(f"tmax:{station.id}")
+        broker.publish(station.id, {**event, "id": row_id})
+
+    if sink is not None:
+        sink.add(tmax_calc, on_flush=_publish)
+    else:
+        db.add(tmax_calc)
+        daily = DailyRollup({station.id: station.timezone})
+        daily.signal(
+            station.id, tmax_calc.created_at, delta, conf, size, tmax_calc.date_iso
+        )
+        await daily.apply(db)
+        await db.flush()
+        row_id = tmax_calc.id
+        on_commit(db, lambda: _publish(row_id))
+    log.info(
+        "strategy signal",
+        extra={
+            "station": station.code,
+            "delta": round(delta, 1),
+            "confidence": conf,
+            "size": size,
         },
-        created_at=datetime.now(timezone.utc),
     )
-    
-    db.add(tmax_calc)
-    print(f"Strategy signal for {station.code}: delta={delta:.1f}, confidence={conf}, size={size}") 
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Record/replay layer for upstream fetches (Open-Meteo, wethr.net).
+
+``UPSTREAM_MODE`` selects the behaviour of every call routed through
+:func:`through_cache`:
+
+* ``live``   - always hit the upstream (default, production)
+* ``record`` - hit the upstream and store the response on disk
+* ``replay`` - serve from disk only; a missing entry raises :class:`ReplayMiss`
+
+Bodies are stored content-addressed under ``objects/`` (identical responses
+share one file) and ``index/`` maps a hash of the request key to the object
+hash. When the objects exceed ``UPSTREAM_CACHE_MAX_BYTES`` the least recently
+used are deleted; index entries pointing at evicted objects read as misses.
+Disk I/O runs in a worker thread so it never blocks the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from app.core.settings import get_settings
+
+MODES = ("live", "record", "replay")
+
+
+class ReplayMiss(LookupError):
+    """Replay mode was asked for a response that was never recorded."""
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class UpstreamCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _index_path(self, key: str) -> Path:
+        return self.root / "index" / _sha256(key.encode())
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            entry = json.loads(self._index_path(key).read_text())
+            path = self._object_path(entry["object"])
+            body = path.read_bytes()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        # Touch for LRU eviction
+        os.utime(path)
+        return body
+
+    def put(self, key: str, body: bytes) -> str:
+        digest = _sha256(body)
+        path = self._object_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        else:
+            os.utime(path)
+
+        index = self._index_path(key)
+        index.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"key": key, "object": digest, "recorded_at": time.time()})
+        )
+        os.replace(tmp, index)
+        self.evict()
+        return digest
+
+    def size(self) -> int:
+        objects = self.root / "objects"
+        if not objects.exists():
+            return 0
+        return sum(p.stat().st_size for p in objects.glob("*/*"))
+
+    def evict(self) -> int:
+        """Delete least recently used objects until under the size bound."""
+        objects = self.root / "objects"
+        if not objects.exists():
+            return 0
+        files = [(p.stat(), p) for p in objects.glob("*/*") if p.suffix != ".tmp"]
+        total = sum(st.st_size for st, _ in files)
+        removed = 0
+        for st, path in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+        return removed
+
+
+_settings = get_settings()
+upstream_cache = UpstreamCache(
+    Path(_settings.upstream_cache_dir), _settings.upstream_cache_max_bytes
+)
+
+
+async def through_cache(
+    key: str,
+    fetch: Callable[[], Awaitable[bytes]],
+    mode: str | None = None,
+    cache: UpstreamCache | None = None,
+) -> bytes:
+    """Run ``fetch`` according to the configured record/replay mode."""
+    mode = mode or _settings.upstream_mode
+    cache = cache or upstream_cache
+    if mode == "live":
+        return await fetch()
+    if mode == "replay":
+        body = await asyncio.to_thread(cache.get, key)
+        if body is None:
+            raise ReplayMiss(key)
+        return body
+    if mode == "record":
+        body = await fetch()
+        await asyncio.to_thread(cache.put, key, body)
+        return body
+    raise ValueError(f"Unknown UPSTREAM_MODE {mode!r}; expected one of {MODES}")
@@ -0,0 +1,186 @@
+"""Pre-slot warm-up for the latency-critical wethr.net jobs.
+
+``WARMUP_LEAD_SECONDS`` before each post-DSM/post-CLI slot the scheduler runs
+:func:`app.services.wethr.warm_wethr_slot`, which launches the shared
+Chromium, opens a page on the station's wethr.net URL, checks out a DB
+connection and loads the station's latest model temperature. The result is
+parked here as a :class:`PreparedSlot`; the slot's job takes it, so at the
+slot it only reloads an already-connected page and runs the strategy.
+
+A parked page keeps the warm-up's ``browser`` budget slot (a governor
+:class:`~app.core.governor.Lease`) until the slot's job adopts it or the page
+is closed, so parked pages count against ``budget_browser_pages``.
+
+A prepared model temperature is dropped when a new forecast is stored for
+the station, and prepared slots that are never taken expire and have their
+page closed. :data:`slot_latency` records, per run, the time from the
+scheduled slot to the signal being committed and published.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.core.governor import Lease
+from app.core.log import get_logger
+from app.services.station_registry import StationLike
+
+log = get_logger(__name__)
+
+# A prepared slot not taken this long after its slot time is discarded
+STALE_AFTER_SECONDS = 300.0
+
+
+def slot_datetime(
+    slot: str, now: datetime | None = None, upcoming: bool = False
+) -> datetime:
+    """The UTC datetime of an ``HH:MM`` slot nearest ``now``.
+
+    The most recent occurrence (today's or, just after midnight,
+    yesterday's) by default; with ``upcoming`` the next one.
+    """
+    now = now or datetime.now(timezone.utc)
+    h, m = map(int, slot.split(":"))
+    at = now.replace(hour=h, minute=m, second=0, microsecond=0)
+    if upcoming and at <= now:
+        at += timedelta(days=1)
+    elif not upcoming and at > now:
+        at -= timedelta(days=1)
+    return at
+
+
+def lead_time(slot: str, lead_seconds: float) -> tuple[int, int, int]:
+    """(hour, minute, second) of the cron trigger ``lead_seconds`` before ``slot``."""
+    h, m = map(int, slot.split(":"))
+    t = int(h * 3600 + m * 60 - lead_seconds) % 86400
+    return t // 3600, t // 60 % 60, t % 60
+
+
+@dataclass
+class PreparedSlot:
+    station: StationLike
+    slot_at: datetime
+    latest: tuple[float, float | None] | None = None
+    page: Any = None
+    lease: Lease | None = None
+
+    def expired(self, now: datetime | None = None) -> bool:
+        now = now or datetime.now(timezone.utc)
+        return now > self.slot_at + timedelta(seconds=STALE_AFTER_SECONDS)
+
+
+async def discard(slot: PreparedSlot) -> None:
+    """Close the slot's page and give its browser budget slot back."""
+    page, slot.page = slot.page, None
+    try:
+        if page is not None:
+            await page.close()
+    except Exception:
+        log.debug("prepared page close failed", exc_info=True)
+    finally:
+        if slot.lease is not None:
+            slot.lease.release()
+
+
+class WarmSlots:
+    def __init__(self) -> None:
+        self._slots: dict[str, PreparedSlot] = {}
+        self.prepared = 0
+        self.taken = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    async def put(self, code: str, slot: PreparedSlot) -> None:
+        previous = self._slots.pop(code.upper(), None)
+        self._slots[code.upper()] = slot
+        self.prepared += 1
+        if previous is not None:
+            await discard(previous)
+        await self.sweep()
+
+    async def take(self, code: str) -> PreparedSlot | None:
+        """Hand the prepared slot to the job; it owns the page and the lease."""
+        slot = self._slots.pop(code.upper(), None)
+        if slot is None:
+            return None
+        if slot.expired():
+            self.expired += 1
+            await discard(slot)
+            return None
+        self.taken += 1
+        return slot
+
+    def invalidate(self, code: str) -> None:
+        """Forget a prepared model temperature once a newer forecast is stored."""
+        slot = self._slots.get(code.upper())
+        if slot is not None:
+            slot.latest = None
+
+    async def sweep(self) -> None:
+        now = datetime.now(timezone.utc)
+        for code in [c for c, s in self._slots.items() if s.expired(now)]:
+            await discard(self._slots.pop(code))
+
+    async def close(self) -> None:
+        while self._slots:
+            await discard(self._slots.popitem()[1])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "waiting": sorted(self._slots),
+            "prepared": self.prepared,
+            "taken": self.taken,
+            "expired": self.expired,
+        }
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SlotLatency:
+    """Slot-to-signal latency of recent runs, split by warm and cold starts."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._samples: dict[bool, deque[float]] = {
+            True: deque(maxlen=window),
+            False: deque(maxlen=window),
+        }
+
+    def record(self, code: str, slot_at: datetime, warm: bool) -> float:
+        seconds = (datetime.now(timezone.utc) - slot_at).total_seconds()
+        self._samples[warm].append(seconds)
+        log.info(
+            "slot to signal",
+            extra={
+                "station": code,
+                "latency_ms": round(seconds * 1000, 1),
+                "warm": warm,
+            },
+        )
+        return seconds
+
+    def stats(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for warm, samples in self._samples.items():
+            ordered = sorted(samples)
+            summary: dict[str, Any] = {"runs": len(ordered)}
+            if ordered:
+                summary.update(
+                    {
+                        f"p{int(q * 100)}_ms": round(_percentile(ordered, q) * 1000, 1)
+                        for q in (0.5, 0.9, 0.99)
+                    }
+                )
+                summary["max_ms"] = round(ordered[-1] * 1000, 1)
+            out["warm" if warm else "cold"] = summary
+        return out
+
+
+warm_slots = WarmSlots()
+slot_latency = SlotLatency()
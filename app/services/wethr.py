@@ -1,111 +1,268 @@
-from datetime import datetime, timezone, date
-from typing import Optional
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional
 
-from playwright.async_api import async_playwright
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.weather import WeatherStation, WeatherForecast, WethrHigh
+from app.core.governor import governor
+from app.core.log import get_logger
+from app.core.settings import get_settings
+from app.models.weather import WethrHigh
 from app.services.ingest_guard import should_run
 from app.services import strategy
+from app.services.browser import browser_pool
+from app.services.rollups import day_of
+from app.services.station_registry import StationLike, station_registry
+from app.services.upstream_cache import ReplayMiss, through_cache
+from app.services.warmup import (
+    PreparedSlot,
+    discard,
+    slot_datetime,
+    slot_latency,
+    warm_slots,
+)
+from app.services.write_behind import write_behind
 
+log = get_logger(__name__)
 
-async def fetch_wethr_high(station_code: str) -> Optional[float]:
-    """Fetch the high temperature from wethr.net for a given station."""
-    url = f"https://wethr.net/{station_code.lower()}"
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-            await page.goto(url, timeout=30000)
-            
-            # Wait for the page to load and try to find temperature data
-            # This is a placeholder implementation - actual scraping logic would go here
-            # For now, return a mock temperature for testing
-            await page.wait_for_timeout(1000)
-            
-            # TODO: Implement actual temperature scraping logic
-            # Example: high_temp_element = await page.query_selector('.high-temp')
-            # if high_temp_element:
-            #     temp_text = await high_temp_element.text_content()
-            #     return float(temp_text.strip('°F'))
-            
-            # Mock temperature for testing (random value between 70-100°F)
-            import random
-            return round(random.uniform(70.0, 100.0), 1)
-            
-        except Exception as e:
-            print(f"Error scraping wethr.net for {station_code}: {e}")
-            return None
-        finally:
-            await browser.close()
-
-
-async def store_wethr_data(db: AsyncSession, station_code: str, high_temp: float) -> None:
-    """Store wethr.net data in the database."""
-    # Get the station
-    stmt = select(WeatherStation).where(WeatherStation.code == station_code.upper())
-    result = await db.execute(stmt)
-    station = result.scalar_one_or_none()
-    
+
+class _NoReading(Exception):
+    pass
+
+
+def wethr_url(station_code: str) -> str:
+    return f"{get_settings().wethr_base_url}/{station_code.lower()}"
+
+
+def report_day(
+    slot: str, report_slot: str, tz_name: str, now: datetime | None = None
+) -> str:
+    """The station day a scrape in ``slot`` reports on.
+
+    That is the day of the latest ``report_slot`` (the station's post-DSM
+    slot) at or before the scrape, so a post-CLI scrape that runs just after
+    local midnight is still filed under the afternoon it reports on.
+    """
+    slot_at = slot_datetime(slot, now)
+    return day_of(slot_datetime(report_slot, slot_at), tz_name)
+
+
+async def fetch_wethr_high(
+    station_code: str,
+    page: Any = None,
+    day: str | None = None,
+    slot: str | None = None,
+) -> Optional[float]:
+    """Fetch the high temperature from wethr.net for a given station.
+
+    ``page`` is a browser page already on the station's URL (see
+    app.services.warmup); it is reloaded rather than navigated. ``day`` (the
+    reporting day) and ``slot`` key the recorded response, defaulting to the
+    current UTC date and minute.
+    """
+    now = datetime.now(timezone.utc)
+    day = day or now.date().isoformat()
+    slot = slot or now.strftime("%H:%M")
+
+    async def scrape() -> bytes:
+        high = await _scrape_wethr_high(station_code, page)
+        if high is None:
+            # Nothing worth recording; surfaces as None below
+            raise _NoReading()
+        return json.dumps({"high": high}).encode()
+
+    try:
+        body = await through_cache(f"wethr:{station_code.upper()}:{day}:{slot}", scrape)
+    except _NoReading:
+        return None
+    except ReplayMiss:
+        log.warning("no recorded wethr.net response", extra={"station": station_code})
+        return None
+    high: float = json.loads(body)["high"]
+    return high
+
+
+async def _scrape_wethr_high(station_code: str, page: Any = None) -> Optional[float]:
+    prepared = page is not None
+    try:
+        if prepared:
+            # Warm page: same connection, just fetch the report again
+            await page.reload(timeout=30000)
+        else:
+            page = await browser_pool.new_page()
+            await page.goto(wethr_url(station_code), timeout=30000)
+
+        # Wait for the page to load and try to find temperature data
+        # This is a placeholder implementation - actual scraping logic would go here
+        # For now, return a mock temperature for testing
+        await page.wait_for_timeout(1000)
+
+        # TODO: Implement actual temperature scraping logic
+        # Example: high_temp_element = await page.query_selector('.high-temp')
+        # if high_temp_element:
+        #     temp_text = await high_temp_element.text_content()
+        #     return float(temp_text.strip('°F'))
+
+        # Mock temperature for testing (random value between 70-100°F)
+        import random
+
+        return round(random.uniform(70.0, 100.0), 1)
+
+    except Exception:
+        log.exception("wethr.net scrape failed", extra={"station": station_code})
+        return None
+    finally:
+        # The caller closes a prepared page; the shared browser stays up
+        if page is not None and not prepared:
+            await page.close()
+
+
+async def store_wethr_data(
+    db: AsyncSession, station_code: str, high_temp: float, date_iso: str | None = None
+) -> StationLike | None:
+    """Queue the scraped high as a WethrHigh row; returns the station, if known.
+
+    ``date_iso`` is the station day the high reports on, by default the
+    current one.
+    """
+    station = await station_registry.resolve(db, station_code)
     if not station:
-        print(f"Station {station_code} not found")
-        return
-    
-    # Store the data
-    wf = WeatherForecast(
-        station_id=station.id,
-        source="Wethr",
-        forecast_time=datetime.now(timezone.utc),
-        valid_time=datetime.now(timezone.utc),
-        temperature=high_temp,
-        raw_data={"high_temperature": high_temp, "source": "wethr.net"},
+        log.warning("station not found", extra={"station": station_code})
+        return None
+
+    now = datetime.now(timezone.utc)
+    write_behind.add(
+        WethrHigh(
+            station_id=station.id,
+            # The day reconciliation matches signals against
+            date_iso=date_iso or day_of(now, station.timezone),
+            wethr_high=high_temp,
+            scraped_at=now,
+        )
     )
-    db.add(wf)
-    await db.commit()
-    print(f"Stored Wethr data for {station_code}: {high_temp}°F")
+    return station
 
 
-async def fetch_and_store_single(code: str) -> None:
-    """Fetch and store wethr data for a single station with guard protection and strategy engine."""
-    if not should_run(f"wethr-{code}"):
-        return
-    
+async def warm_wethr_slot(code: str, slot: str) -> None:
+    """Scheduler job run ``WARMUP_LEAD_SECONDS`` before a wethr slot.
+
+    Opens a page on the station's URL in the shared browser, checks out a DB
+    connection and loads the latest model temperature, and parks them for
+    the slot's :func:`fetch_and_store_single`. The job admits itself: its
+    ``browser`` slot is a lease that stays with the parked page.
+    """
     from app.db.database import AsyncSessionLocal
-    
-    async with AsyncSessionLocal() as db:
+
+    lease = await governor.lease("browser")
+    page = None
+    try:
+        async with governor.acquire("db"):
+            async with AsyncSessionLocal() as db:
+                station = await station_registry.resolve(db, code)
+                if not station:
+                    log.warning("station not found", extra={"station": code})
+                    return
+                latest = await strategy.latest_model_temp(db, station.id)
+
         try:
-            high_temp = await fetch_wethr_high(code)
-            if high_temp is None:
-                print(f"No temperature data scraped for {code}")
-                return
-            
-            # Get the station
-            stmt = select(WeatherStation).where(WeatherStation.code == code.upper())
-            result = await db.execute(stmt)
-            station = result.scalar_one_or_none()
-            
-            if not station:
-                print(f"Station {code} not found")
-                return
-            
-            # Create WethrHigh record
-            wethr_high_record = WethrHigh(
-                station_id=station.id,
-                date_iso=date.today().isoformat(),
-                wethr_high=high_temp,
-                scraped_at=datetime.now(timezone.utc),
+            page = await browser_pool.new_page()
+            await page.goto(wethr_url(code), timeout=30000)
+        except Exception:
+            # The job can still use the warm DB side and open its own page
+            log.warning(
+                "wethr.net warm-up page failed", extra={"station": code}, exc_info=True
             )
-            db.add(wethr_high_record)
-            
-            # Run strategy engine
-            await strategy.run_for_station(db, station, high_temp)
-            
-            # Commit all changes
-            await db.commit()
-            print(f"Processed Wethr data and strategy for {code}: {high_temp}°F")
-            
-        except Exception as e:
-            print(f"Error in fetch_and_store_single for {code}: {e}")
-            await db.rollback() 
\ No newline at end of file
+            if page is not None:
+                await page.close()
+                page = None
+    finally:
+        if page is None:
+            lease.release()
+    await warm_slots.put(
+        code,
+        PreparedSlot(
+            station=station,
+            slot_at=slot_datetime(slot, upcoming=True),
+            latest=latest,
+            page=page,
+            lease=lease,
+        ),
+    )
+
+
+async def fetch_and_store_single(
+    code: str, slot: str | None = None, report_slot: str | None = None
+) -> None:
+    """Fetch and store wethr data for a single station with guard protection and strategy engine.
+
+    The high and the resulting signal go through the write-behind buffer,
+    flushed at once since the signal is time-critical. With ``slot`` (the
+    scheduled ``HH:MM``) the slot-to-signal latency is recorded, and with
+    ``report_slot`` (the station's post-DSM slot) the high and signal are
+    filed under the day that slot reports on (see :func:`report_day`).
+
+    The job admits itself under the ``browser`` and ``db`` budgets, adopting
+    the browser slot of a page parked by :func:`warm_wethr_slot`.
+    """
+    prepared = await warm_slots.take(code)
+    if not should_run(f"wethr-{code}"):
+        if prepared is not None:
+            await discard(prepared)
+        return
+
+    from app.db.database import AsyncSessionLocal
+
+    held = {"browser": prepared.lease} if prepared and prepared.lease else None
+    try:
+        async with governor.acquire("browser", "db", held=held):
+            async with AsyncSessionLocal() as db:
+                try:
+                    await _fetch_and_store(db, code, slot, report_slot, prepared)
+                except Exception:
+                    log.exception("wethr job failed", extra={"station": code})
+                finally:
+                    if prepared is not None:
+                        await discard(prepared)
+    finally:
+        # Admission cancelled before the job ran
+        if prepared is not None:
+            await discard(prepared)
+
+
+async def _fetch_and_store(
+    db: AsyncSession,
+    code: str,
+    slot: str | None,
+    report_slot: str | None,
+    prepared: PreparedSlot | None,
+) -> None:
+    date_iso = None
+    snap = await station_registry.resolve(db, code)
+    if snap is not None and slot is not None and report_slot is not None:
+        date_iso = report_day(slot, report_slot, snap.timezone)
+
+    high_temp = await fetch_wethr_high(
+        code, prepared.page if prepared else None, date_iso, slot
+    )
+    if high_temp is None:
+        log.warning("no temperature scraped", extra={"station": code})
+        return
+
+    station = await store_wethr_data(db, code, high_temp, date_iso)
+    if not station:
+        return
+
+    # A forecast stored since the warm-up invalidated prepared.latest
+    latest = prepared.latest if prepared else None
+    await strategy.run_for_station(
+        db,
+        station,
+        high_temp,
+        sink=write_behind,
+        latest=latest,
+        date_iso=date_iso,
+    )
+    await write_behind.flush()
+    if slot is not None:
+        slot_latency.record(code, slot_datetime(slot), warm=prepared is not None)
+    log.info("processed wethr data", extra={"station": code, "high": high_temp})
@@ -0,0 +1,444 @@
+"""Write-behind buffer for rows produced by scheduled jobs.
+
+The wethr.net job hands its ``WethrHigh`` and ``TmaxCalculation`` rows to
+:data:`write_behind` instead of committing them one at a time. Rows are
+flushed in one transaction, as one multi-row INSERT per table plus the
+matching ``station_daily`` upsert (app.services.rollups), once
+``WRITE_BEHIND_MAX_ROWS`` are pending or the oldest pending row is
+``WRITE_BEHIND_MAX_DELAY_SECONDS`` old, whichever comes first.
+
+A row can carry an ``on_flush`` callback; it runs after the commit with the
+row's new id, which is how strategy signals are published only once they are
+persisted. Callers that must read their own writes call :meth:`flush`.
+
+If a flush fails because the database is unreachable, the batch is queued
+again for the next attempt. Any other error means some row cannot be
+inserted (a constraint violation, a bad value), so the batch is split in
+halves until the failing rows are isolated; the rest commit, and each
+rejected row is logged and appended to ``<journal>.rejected`` for inspection
+(dropped without a journal) instead of blocking every later flush.
+
+On shutdown :meth:`stop` flushes whatever is pending. If the database is
+unreachable at that point the rows are pickled to ``WRITE_BEHIND_JOURNAL``
+and inserted by the next :meth:`start`. The scheduler does not wait for jobs
+already running when it shuts down, so rows added after :meth:`stop` go
+straight to the journal as well; without a journal they are refused with
+``RuntimeError``. Either way an accepted row is never lost (``on_flush``
+callbacks do not survive a restart).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+import time
+from dataclasses import dataclass
+from functools import partial
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import inspect, insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.log import get_logger
+from app.core.settings import get_settings
+from app.models import Base
+from app.models.weather import TmaxCalculation, WethrHigh
+from app.services.rollups import DailyRollup, station_zones
+
+log = get_logger(__name__)
+
+# Tables are inserted in this order within a flush. Forecast rows are not
+# buffered: they commit together with their forecast_runs deltas.
+BUFFERED: tuple[type[Base], ...] = (WethrHigh, TmaxCalculation)
+
+
+@dataclass
+class _Pending:
+    values: dict[str, Any]
+    on_flush: Callable[[int], None] | None = None
+
+
+_Batch = dict[type[Base], list[_Pending]]
+
+
+def _size(batch: _Batch) -> int:
+    return sum(len(rows) for rows in batch.values())
+
+
+def _halves(batch: _Batch) -> tuple[_Batch, _Batch]:
+    """Split a batch in two, keeping table and row order."""
+    flat = [(model, p) for model, rows in batch.items() for p in rows]
+    mid = len(flat) // 2
+    first: _Batch = {m: [] for m in BUFFERED}
+    second: _Batch = {m: [] for m in BUFFERED}
+    for i, (model, p) in enumerate(flat):
+        (first if i < mid else second)[model].append(p)
+    return first, second
+
+
+def _transient(exc: BaseException) -> bool:
+    """True if the database, not the rows, made the write fail."""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(
+        exc, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+    )
+
+
+def row_values(row: Base) -> dict[str, Any]:
+    """Every insertable column of ``row``, with column defaults resolved.
+
+    All rows of a table then share one key set, which multi-row INSERT
+    requires; ``func.now()`` defaults become the time the row was buffered.
+    """
+    values: dict[str, Any] = {}
+    for attr in inspect(type(row)).column_attrs:
+        column = attr.columns[0]
+        if column.primary_key:
+            continue
+        value = getattr(row, attr.key)
+        default = column.default
+        if value is None and default is not None:
+            if default.is_scalar:
+                value = default.arg
+            elif default.is_clause_element:
+                value = datetime.now(timezone.utc)
+        values[attr.key] = value
+    return values
+
+
+class WriteBehind:
+    def __init__(
+        self,
+        max_rows: int = 500,
+        max_delay: float = 2.0,
+        journal: str | Path | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ) -> None:
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.journal = Path(journal) if journal else None
+        self._session_factory = session_factory
+        self._pending: _Batch = {m: [] for m in BUFFERED}
+        self._count = 0
+        self._oldest: float | None = None
+        self._lock = asyncio.Lock()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _sessions(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_factory is None:
+            from app.db.database import AsyncSessionLocal
+
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, row: Base, on_flush: Callable[[int], None] | None = None) -> None:
+        """Queue ``row`` for insertion; ``on_flush(id)`` runs once it is committed."""
+        model = type(row)
+        if model not in self._pending:
+            raise TypeError(f"{model.__name__} rows are not write-behind buffered")
+        if self._closed:
+            self._journal_late(model, row_values(row))
+            return
+        self._pending[model].append(_Pending(row_values(row), on_flush))
+        self._count += 1
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if self._wake is not None and self._count >= self.max_rows:
+            self._wake.set()
+
+    def pending(self, model: type[Base], station_id: int | None = None) -> int:
+        rows = self._pending.get(model, [])
+        if station_id is None:
+            return len(rows)
+        return sum(1 for p in rows if p.values.get("station_id") == station_id)
+
+    def _take(self) -> _Batch:
+        taken = self._pending
+        self._pending = {m: [] for m in BUFFERED}
+        self._count = 0
+        self._oldest = None
+        return taken
+
+    def _restore(self, taken: _Batch) -> None:
+        """Put a failed batch back ahead of rows added since it was taken."""
+        for model, rows in taken.items():
+            self._pending[model][:0] = rows
+            self._count += len(rows)
+        if self._count:
+            self._oldest = time.monotonic()
+
+    async def _write(self, taken: _Batch) -> list[Callable[[], None]]:
+        callbacks: list[Callable[[], None]] = []
+        async with self._sessions()() as db:
+            daily = DailyRollup(
+                await station_zones(
+                    db,
+                    (p.values["station_id"] for rows in taken.values() for p in rows),
+                )
+            )
+            for model, rows in taken.items():
+                if not rows:
+                    continue
+                params = [p.values for p in rows]
+                daily.add_rows(model, params)
+                if any(p.on_flush for p in rows):
+                    # Ordered RETURNING maps ids back to rows
+                    res = await db.execute(
+                        insert(model).returning(
+                            model.id, sort_by_parameter_order=True  # type: ignore[attr-defined]
+                        ),
+                        params,
+                    )
+                    for p, row_id in zip(rows, res.scalars().all()):
+                        if p.on_flush is not None:
+                            callbacks.append(partial(p.on_flush, row_id))
+                else:
+                    await db.execute(insert(model), params)
+            await daily.apply(db)
+            await db.commit()
+        return callbacks
+
+    async def flush(self) -> int:
+        """Insert everything pending now; returns the number of rows written.
+
+        Rows that cannot be inserted are rejected and the rest written. If the
+        database is unreachable, rows not yet written stay queued for the next
+        attempt and the error is raised to the caller.
+        """
+        async with self._lock:
+            taken = self._take()
+            if not _size(taken):
+                return 0
+            callbacks, written, error = await self._write_isolating(taken)
+            if written:
+                self.flushes += 1
+                self.rows_written += written
+            if error is not None:
+                self.failures += 1
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                log.exception("write-behind callback failed")
+        if error is not None:
+            raise error
+        return written
+
+    async def _write_isolating(
+        self, taken: _Batch
+    ) -> tuple[list[Callable[[], None]], int, BaseException | None]:
+        """Write ``taken``, splitting it around rows that cannot be inserted.
+
+        Returns the callbacks and count of the rows written, and the error
+        that stopped the flush, if any; unwritten rows are then re-queued.
+        """
+        callbacks: list[Callable[[], None]] = []
+        written = 0
+        parts = [taken]
+        while parts:
+            part = parts.pop()
+            try:
+                callbacks += await self._write(part)
+            except BaseException as exc:
+                if isinstance(exc, Exception) and not _transient(exc):
+                    if _size(part) == 1:
+                        self._reject(part, exc)
+                    else:
+                        first, second = _halves(part)
+                        parts += [second, first]
+                    continue
+                # Oldest rows first, ahead of anything added meanwhile
+                for rest in [*parts, part]:
+                    self._restore(rest)
+                return callbacks, written, exc
+            written += _size(part)
+        return callbacks, written, None
+
+    def _reject(self, batch: _Batch, exc: Exception) -> None:
+        """Set aside a row that cannot be inserted so it stops blocking flushes."""
+        self.rejected += _size(batch)
+        records = [
+            (m.__tablename__, [p.values for p in rows])
+            for m, rows in batch.items()
+            if rows
+        ]
+        log.error(
+            "write-behind row rejected",
+            extra={
+                "table": records[0][0],
+                "error": f"{type(exc).__name__}: {exc}".splitlines()[0],
+                "path": str(self.rejected_path) if self.rejected_path else None,
+            },
+        )
+        if self.rejected_path is not None:
+            self._append(records, self.rejected_path)
+
+    @property
+    def rejected_path(self) -> Path | None:
+        return (
+            self.journal.with_name(self.journal.name + ".rejected")
+            if self.journal
+            else None
+        )
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            timeout = self.max_delay
+            if self._oldest is not None:
+                timeout = max(0.0, self._oldest + self.max_delay - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._count:
+                continue
+            due = self._oldest is not None and (
+                time.monotonic() - self._oldest >= self.max_delay
+            )
+            if self._count < self.max_rows and not due:
+                continue
+            try:
+                await self.flush()
+            except Exception:
+                log.exception(
+                    "write-behind flush failed", extra={"pending": self._count}
+                )
+                # Back off instead of spinning on a database that is down
+                await asyncio.sleep(self.max_delay)
+
+    async def start(self) -> None:
+        """Replay any journal left by a previous run and start the flusher."""
+        await self._replay()
+        self._closed = False
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="write-behind")
+
+    async def stop(self) -> None:
+        """Stop the flusher and persist everything pending, to the journal if need be.
+
+        Rows added from here on are journaled by :meth:`add` instead of queued.
+        """
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        try:
+            await self.flush()
+        except Exception:
+            log.exception(
+                "write-behind shutdown flush failed", extra={"pending": self._count}
+            )
+            self._spill()
+
+    def _append(
+        self, records: list[tuple[str, list[dict[str, Any]]]], path: Path | None = None
+    ) -> None:
+        path = path or self.journal
+        assert path is not None
+        with open(path, "ab") as fh:
+            for record in records:
+                pickle.dump(record, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _journal_late(self, model: type[Base], values: dict[str, Any]) -> None:
+        """Persist a row added after :meth:`stop`, e.g. by a job still running."""
+        if self.journal is None:
+            raise RuntimeError("write-behind buffer is stopped and has no journal")
+        self._append([(model.__tablename__, [values])])
+        log.warning(
+            "write-behind row journaled after stop",
+            extra={"table": model.__tablename__, "path": str(self.journal)},
+        )
+
+    def _spill(self) -> None:
+        if not self._count:
+            return
+        if self.journal is None:
+            log.error("write-behind rows lost: no journal", extra={"rows": self._count})
+            return
+        taken = self._take()
+        records = [
+            (model.__tablename__, [p.values for p in rows])
+            for model, rows in taken.items()
+            if rows
+        ]
+        self._append(records)
+        log.warning(
+            "write-behind rows journaled",
+            extra={"rows": sum(len(r) for _, r in records), "path": str(self.journal)},
+        )
+
+    async def _replay(self) -> None:
+        if self.journal is None or not self.journal.exists():
+            return
+        models = {m.__tablename__: m for m in BUFFERED}
+        taken: _Batch = {m: [] for m in BUFFERED}
+        with open(self.journal, "rb") as fh:
+            while True:
+                try:
+                    table, values = pickle.load(fh)
+                except EOFError:
+                    break
+                except pickle.UnpicklingError:
+                    # Torn tail from a crash mid-spill; its batch never completed
+                    log.warning(
+                        "write-behind journal truncated",
+                        extra={"path": str(self.journal)},
+                    )
+                    break
+                taken[models[table]].extend(_Pending(v) for v in values)
+        rows = sum(len(r) for r in taken.values())
+        try:
+            await self._write(taken)
+        except Exception:
+            # Leave the journal in place for the next start
+            log.exception("write-behind journal replay failed", extra={"rows": rows})
+            return
+        self.journal.unlink()
+        self.rows_written += rows
+        log.info("write-behind journal replayed", extra={"rows": rows})
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": {
+                m.__tablename__: len(rows) for m, rows in self._pending.items()
+            },
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "oldest_age_seconds": (
+                time.monotonic() - self._oldest if self._oldest is not None else None
+            ),
+        }
+
+
+_settings = get_settings()
+write_behind = WriteBehind(
+    max_rows=_settings.write_behind_max_rows,
+    max_delay=_settings.write_behind_max_delay_seconds,
+    journal=_settings.write_behind_journal or None,
+)
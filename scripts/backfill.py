@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Backfill historical hourly temperatures from the Open-Meteo archive.
+
+    python scripts/backfill.py --stations KAUS,KLAX --start 2024-01-01 --end 2024-12-31
+
+Re-run the same command after an interruption to resume from the checkpoint.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.log import configure_logging, shutdown_logging
+from app.db.database import AsyncSessionLocal
+from app.services.backfill import Checkpoint, run_backfill
+from app.services.station_registry import station_registry
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--stations", default="all", help="comma-separated station codes, or 'all'"
+    )
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--chunk-days", type=int, default=31)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=Path(".backfill-checkpoint.json"),
+        help="file recording completed chunks",
+    )
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    if args.end < args.start:
+        print("❌ --end is before --start")
+        return 2
+
+    async with AsyncSessionLocal() as db:
+        await station_registry.load(db)
+
+    if args.stations == "all":
+        stations = station_registry.all()
+    else:
+        stations = []
+        for code in args.stations.split(","):
+            station = station_registry.get(code.strip())
+            if station is None:
+                print(f"❌ Station {code} not found")
+                return 2
+            stations.append(station)
+
+    # Progress and per-chunk failures arrive as log records
+    configure_logging(fmt="text", stream=sys.stderr)
+    try:
+        stats = await run_backfill(
+            AsyncSessionLocal,
+            stations,
+            args.start,
+            args.end,
+            Checkpoint(args.checkpoint),
+            chunk_days=args.chunk_days,
+            concurrency=args.concurrency,
+        )
+    finally:
+        shutdown_logging()
+    print(
+        f"✅ Loaded {stats.rows} rows in {stats.chunks} chunks "
+        f"({stats.rows_per_second:,.0f} rows/s); "
+        f"{stats.skipped} skipped, {stats.failed} failed"
+    )
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measure event-loop stalls caused by log bursts.
+
+    python scripts/bench_logging.py --records 2000 --sink-latency-ms 0.2
+
+A probe task sleeps 1 ms in a loop and records how late it wakes up while
+another task logs bursts to a deliberately slow sink. The run is repeated
+with a plain StreamHandler (writes on the loop) and with the queue-backed
+handler from app.core.log.
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.log import JsonFormatter, configure_logging, job_scope, shutdown_logging
+
+
+class SlowSink(io.TextIOBase):
+    """Stdout stand-in that blocks for a fixed time per write."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def write(self, s: str) -> int:
+        time.sleep(self.latency)
+        return len(s)
+
+
+async def _probe(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - started - 0.001) * 1000)
+
+
+async def _burst(records: int, bursts: int) -> None:
+    log = logging.getLogger("marlin.bench")
+    for b in range(bursts):
+        async with job_scope("bench", station="KBEN", slot=f"burst-{b}"):
+            for i in range(records // bursts):
+                log.info("forecast stored", extra={"hour": i, "temperature": 80.5})
+        await asyncio.sleep(0.01)
+
+
+async def _run(records: int, bursts: int) -> list[float]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await _burst(records, bursts)
+    stop.set()
+    await probe
+    return lags
+
+
+def _report(name: str, lags: list[float], elapsed: float) -> None:
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{name:<8} emit {elapsed * 1000:8.1f} ms  "
+        f"loop lag p50 {statistics.median(lags):6.2f} ms  "
+        f"p99 {p99:7.2f} ms  max {lags[-1]:7.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    args = parser.parse_args()
+    latency = args.sink_latency_ms / 1000
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(SlowSink(latency))
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    started = time.perf_counter()
+    lags = asyncio.run(_run(args.records, args.bursts))
+    _report("inline", lags, time.perf_counter() - started)
+    root.removeHandler(handler)
+
+    configure_logging(level="INFO", fmt="json", stream=SlowSink(latency))
+    started = time.perf_counter()
+    lags = asyncio.run(_run(args.records, args.bursts))
+    _report("queued", lags, time.perf_counter() - started)
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compare serialization paths for a large tmax listing.
+
+    python scripts/bench_serialization.py --rows 10000
+
+Loads N TmaxCalculation rows into an in-memory SQLite database, then times
+the previous path (ORM objects validated through TmaxCalcOut and dumped by
+Pydantic) against selecting the schema's columns and dumping them with
+orjson, and reports size and time for each negotiated encoding.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, List
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.routes import tmax_for_station_query
+from app.api.schemas import TmaxCalcOut
+from app.core.encoding import encode, rows_json
+from app.models import Base, TmaxCalculation, WeatherStation
+
+
+async def _seed(factory: async_sessionmaker[AsyncSession], rows: int) -> None:
+    async with factory() as db:
+        db.add(
+            WeatherStation(
+                code="KBEN",
+                name="Bench",
+                lat=30.0,
+                lon=-97.0,
+                timezone="UTC",
+                coastal_distance_km=1.0,
+            )
+        )
+        await db.flush()
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        db.add_all(
+            TmaxCalculation(
+                station_id=1,
+                cli_forecast=80.0 + i % 20,
+                method="MARLIN_v1",
+                confidence=0.85,
+                size=2.0,
+                raw_payload={
+                    "delta": (i % 7) - 3.0,
+                    "model_temp": 80.0 + i % 20,
+                    "wethr_high": 78.5,
+                    "station_code": "KBEN",
+                    "model_spread": 1.25,
+                },
+                created_at=start + timedelta(minutes=i),
+            )
+            for i in range(rows)
+        )
+        await db.commit()
+
+
+async def _time(fn: Callable[[], Awaitable[bytes]], repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await fn()
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await _seed(factory, rows)
+    adapter = TypeAdapter(List[TmaxCalcOut])
+
+    async def pydantic_path() -> bytes:
+        async with factory() as db:
+            res = await db.execute(
+                select(TmaxCalculation)
+                .where(TmaxCalculation.station_id == 1)
+                .order_by(TmaxCalculation.created_at)
+            )
+            objs = adapter.validate_python(res.scalars().all(), from_attributes=True)
+            return adapter.dump_json(objs)
+
+    async def fast_path() -> bytes:
+        async with factory() as db:
+            return rows_json(await db.execute(tmax_for_station_query(1)))
+
+    results: dict[str, Any] = {}
+    for name, fn in (("pydantic", pydantic_path), ("orjson", fast_path)):
+        results[name] = await _time(fn, repeat)
+        secs, body = results[name]
+        print(
+            f"{name:<9} {secs * 1000:8.1f} ms  {rows / secs:10,.0f} rows/s  {len(body):>10,} B"
+        )
+    print(f"speedup   {results['pydantic'][0] / results['orjson'][0]:.2f}x end to end")
+
+    body = results["orjson"][1]
+    for media, coding in (
+        ("json", "gzip"),
+        ("json", "br"),
+        ("msgpack", None),
+        ("msgpack", "br"),
+    ):
+        started = time.perf_counter()
+        out, _ = encode(body, media, coding)
+        secs = time.perf_counter() - started
+        label = f"{media}+{coding}" if coding else media
+        print(
+            f"{label:<13} {secs * 1000:7.1f} ms  {len(out):>10,} B  ({len(out) / len(body):.0%})"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Export forecast and signal history to partitioned Parquet.
+
+    python scripts/export.py --out exports/                 # new rows, recent months rewritten
+    python scripts/export.py --out exports/ --full          # delete and re-export everything
+
+Read back with e.g. ``pl.scan_parquet("exports/tmax_calculations/**/*.parquet")``.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.db.database import AsyncReadSessionLocal
+from app.services.export import BATCH_SIZE, EXPORTS, export_table
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="export root directory")
+    parser.add_argument(
+        "--tables",
+        default=",".join(EXPORTS),
+        help=f"comma-separated subset of {', '.join(EXPORTS)}",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="delete existing partitions and export all rows",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    args.out.mkdir(parents=True, exist_ok=True)
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = set(tables) - set(EXPORTS)
+    if unknown:
+        print(f"❌ Unknown tables: {', '.join(sorted(unknown))}")
+        return 2
+
+    for table in tables:
+        started = time.perf_counter()
+        async with AsyncReadSessionLocal() as db:
+            result = await export_table(
+                db, args.out, table, full=args.full, batch_size=args.batch_size
+            )
+        elapsed = time.perf_counter() - started
+        print(
+            f"✅ {table}: {result.rows} rows in {result.files} files "
+            f"up to id {result.last_id} ({elapsed:.1f}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -9,7 +9,7 @@ import os
 import sys
 
 # Add the app directory to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -21,19 +21,27 @@ async def create_tables() -> None:
     """Create all tables defined in the models."""
     settings = get_settings()
     engine = create_async_engine(settings.database_url)
-    
+
     async with engine.begin() as conn:
         print("🗄️  Creating database tables...")
         await conn.run_sync(Base.metadata.create_all)
         print("✅ All tables created successfully!")
-        
+
         # Mark current state as migration head for Alembic
         print("📝 Marking database state for Alembic...")
-        await conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL, CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))"))
+        await conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL, CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num))"
+            )
+        )
         await conn.execute(text("DELETE FROM alembic_version"))
-        await conn.execute(text("INSERT INTO alembic_version (version_num) VALUES ('20250622_add_wethr_highs')"))
+        await conn.execute(
+            text(
+                "INSERT INTO alembic_version (version_num) VALUES ('20251019_signal_date')"
+            )
+        )
         print("✅ Database state marked successfully!")
 
 
 if __name__ == "__main__":
-    asyncio.run(create_tables()) 
\ No newline at end of file
+    asyncio.run(create_tables())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rebuild station_daily rollups from forecasts, wethr.net highs and signals.
+
+    python scripts/rebuild_daily.py                    # every station
+    python scripts/rebuild_daily.py --stations KAUS,KLAX
+
+Run once after migrating to ``20251019_station_daily`` (the migration only
+creates the empty table), or after loading history with scripts/backfill.py.
+Each station's rollups are replaced in its own transaction, so re-running is
+safe; stop the scheduler first so no rows are written meanwhile.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from sqlalchemy import select
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.db.database import AsyncSessionLocal
+from app.models.weather import WeatherStation
+from app.services.rollups import rebuild_daily
+
+
+async def main(codes: list[str]) -> int:
+    async with AsyncSessionLocal() as db:
+        stmt = select(WeatherStation.id, WeatherStation.code).order_by(
+            WeatherStation.code
+        )
+        if codes:
+            stmt = stmt.where(WeatherStation.code.in_(codes))
+        stations = (await db.execute(stmt)).all()
+    missing = set(codes) - {code for _, code in stations}
+    if missing:
+        print(f"❌ Unknown stations: {', '.join(sorted(missing))}")
+        return 2
+
+    for station_id, code in stations:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            days = await rebuild_daily(db, [station_id])
+            await db.commit()
+        print(f"✅ {code}: {days} days ({time.perf_counter() - started:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", default="", help="comma-separated station codes")
+    args = parser.parse_args()
+    codes = [c.strip().upper() for c in args.stations.split(",") if c.strip()]
+    sys.exit(asyncio.run(main(codes)))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Reconcile observed highs into tmax_calculations for a range of past days.
+
+    python scripts/reconcile.py --start 2025-06-01 --end 2025-06-30
+
+Days already reconciled are skipped row by row, so re-running is safe. The
+scheduler reconciles the previous day every morning on its own. Days are
+station days in local standard time (see app.services.rollups).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+# Add the app directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.db.database import AsyncSessionLocal
+from app.services.reconcile import reconcile_day
+
+
+async def main(start: date, end: date) -> None:
+    day = start
+    while day <= end:
+        async with AsyncSessionLocal() as db:
+            deltas = await reconcile_day(db, day)
+            await db.commit()
+        signals = sum(d.samples for d in deltas.values())
+        print(f"{day}: {signals} signals across {len(deltas)} stations")
+        day += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    args = parser.parse_args()
+    if args.end < args.start:
+        print("❌ --end is before --start")
+        sys.exit(1)
+    asyncio.run(main(args.start, args.end))
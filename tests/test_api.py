@@ -4,7 +4,7 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 from app.models import Base
 
 
@@ -27,6 +27,7 @@ async def test_client():
             yield s
 
     app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
@@ -116,6 +117,22 @@ async def test_tmax_crud(test_client):
     assert len(calculations) == 1
     assert calculations[0]["cli_forecast"] == 78.5
 
+    # The signal is rolled up into today's summary
+    r = await test_client.get(f"/stations/{station_id}/daily")
+    assert r.status_code == 200
+    (day,) = r.json()
+    assert day["date_iso"] == tmax_data["created_at"][:10]
+    assert day["signals"] == 1
+    assert day["confidence"] == 0.85
+
+    r = await test_client.get(
+        f"/stations/{station_id}/daily",
+        params={"start": "2020-01-01", "end": "2020-01-31"},
+    )
+    assert r.json() == []
+    r = await test_client.get("/stations/999999/daily")
+    assert r.status_code == 404
+
 
 @pytest.mark.anyio
 async def test_station_validation(test_client):
@@ -136,3 +153,60 @@ async def test_station_validation(test_client):
     invalid_payload["code"] = "TOOLONG"  # Too long
     r = await test_client.post("/stations/", json=invalid_payload)
     assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_station_list_etag(test_client):
+    """Polled reads carry an ETag, revalidate with 304 and refresh after writes."""
+    r = await test_client.get("/stations/")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = await test_client.get("/stations/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+
+    # Creating a station invalidates the cached listing
+    payload = {
+        "code": "KDEN",
+        "name": "Denver Intl",
+        "lat": 39.86,
+        "lon": -104.67,
+        "timezone": "America/Denver",
+        "coastal_distance_km": 1500.0,
+    }
+    r = await test_client.post("/stations/", json=payload)
+    assert r.status_code == 201
+
+    r = await test_client.get("/stations/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert "KDEN" in [s["code"] for s in r.json()]
+
+
+@pytest.mark.anyio
+async def test_nearest_stations(test_client):
+    """Spatial routes resolve ahead of /stations/{station_id}."""
+    payload = {
+        "code": "KSEA",
+        "name": "Seattle-Tacoma Intl",
+        "lat": 47.45,
+        "lon": -122.31,
+        "timezone": "America/Los_Angeles",
+        "coastal_distance_km": 5.0,
+    }
+    r = await test_client.post("/stations/", json=payload)
+    assert r.status_code == 201
+
+    r = await test_client.get(
+        "/stations/nearest", params={"lat": 47.6, "lon": -122.3, "k": 1}
+    )
+    assert r.status_code == 200
+    (hit,) = r.json()
+    assert hit["code"] == "KSEA"
+    assert 15 < hit["distance_km"] < 20
+
+    r = await test_client.get(
+        "/stations/within", params={"lat": 47.6, "lon": -122.3, "radius_km": 10}
+    )
+    assert r.json() == []
@@ -0,0 +1,150 @@
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.models import Base, WeatherForecast
+from app.services import series
+from app.services.backfill import ARCHIVE_SOURCE, Checkpoint, plan_chunks, run_backfill
+from app.services.station_registry import StationSnapshot
+
+STATIONS = [
+    StationSnapshot(1, "KAUS", "Austin", 30.19, -97.67, "America/Chicago", 200.0),
+    StationSnapshot(
+        2, "KLAX", "Los Angeles", 33.94, -118.40, "America/Los_Angeles", 3.4
+    ),
+]
+
+
+def _archive_handler(request: httpx.Request) -> httpx.Response:
+    start = date.fromisoformat(request.url.params["start_date"])
+    end = date.fromisoformat(request.url.params["end_date"])
+    hours = ((end - start).days + 1) * 24
+    first = datetime.combine(start, datetime.min.time())
+    return httpx.Response(
+        200,
+        json={
+            "hourly": {
+                "time": [
+                    (first + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M")
+                    for h in range(hours)
+                ],
+                "temperature_2m": [60.0 + (h % 24) for h in range(hours)],
+            }
+        },
+    )
+
+
+def test_plan_chunks_covers_range_without_overlap():
+    chunks = plan_chunks(STATIONS[:1], date(2024, 1, 1), date(2024, 1, 10), 4)
+    assert [(c.start.day, c.end.day) for c in chunks] == [(1, 4), (5, 8), (9, 10)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_loads_and_resumes(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_archive_handler))
+    ckpt_path = tmp_path / "ckpt.json"
+
+    stats = await run_backfill(
+        session_factory,
+        STATIONS,
+        date(2024, 1, 1),
+        date(2024, 1, 10),
+        Checkpoint(ckpt_path),
+        chunk_days=4,
+        concurrency=2,
+        client=client,
+    )
+    assert (stats.chunks, stats.rows, stats.failed) == (6, 20, 0)
+
+    async with session_factory() as db:
+        count = await db.scalar(select(func.count(WeatherForecast.id)))
+        assert count == 20
+        row = (
+            (
+                await db.execute(
+                    select(WeatherForecast).where(
+                        WeatherForecast.source == ARCHIVE_SOURCE
+                    )
+                )
+            )
+            .scalars()
+            .first()
+        )
+        assert row.temperature == 83.0
+        assert len(series.unpack(row.hourly_values)) == 24
+
+    # A second run finds every chunk in the checkpoint
+    stats = await run_backfill(
+        session_factory,
+        STATIONS,
+        date(2024, 1, 1),
+        date(2024, 1, 10),
+        Checkpoint(ckpt_path),
+        chunk_days=4,
+        client=client,
+    )
+    assert (stats.chunks, stats.skipped) == (0, 6)
+
+    # Losing the checkpoint re-loads chunks in place instead of duplicating
+    ckpt_path.unlink()
+    await run_backfill(
+        session_factory,
+        STATIONS,
+        date(2024, 1, 1),
+        date(2024, 1, 10),
+        Checkpoint(ckpt_path),
+        chunk_days=4,
+        client=client,
+    )
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count(WeatherForecast.id))) == 20
+
+
+def test_extended_range_does_not_reuse_a_shortened_chunk():
+    short = plan_chunks(STATIONS[:1], date(2024, 1, 1), date(2024, 1, 10), 4)
+    longer = plan_chunks(STATIONS[:1], date(2024, 1, 1), date(2024, 1, 12), 4)
+    # (9, 10) was done; (9, 12) starts on the same day but is not
+    done = {c.key for c in short}
+    assert [(c.start.day, c.end.day) for c in longer if c.key not in done] == [(9, 12)]
+
+
+@pytest.mark.asyncio
+async def test_chunk_failures_are_logged_not_printed(tmp_path, caplog, capsys):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params["longitude"].startswith("-118"):
+            return httpx.Response(200, content=b"<html>maintenance</html>")
+        return _archive_handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with caplog.at_level("INFO", logger="app.services.backfill"):
+        stats = await run_backfill(
+            session_factory,
+            STATIONS,
+            date(2024, 1, 1),
+            date(2024, 1, 4),
+            Checkpoint(tmp_path / "ckpt.json"),
+            chunk_days=4,
+            client=client,
+        )
+
+    assert (stats.chunks, stats.failed) == (1, 1)
+    failures = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert [r.chunk for r in failures] == ["KLAX:2024-01-01..2024-01-04"]
+    assert any(r.getMessage() == "backfill chunk loaded" for r in caplog.records)
+    assert capsys.readouterr().out == ""
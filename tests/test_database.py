@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.settings import Settings
+from app.db.database import ENGINE_PROFILES, engine_options
+
+PG_URL = "postgresql+asyncpg://marlin:secret@db:5432/marlin"
+
+
+def test_profile_defaults_follow_app_env():
+    assert Settings(app_env="local").engine_profile == "local"
+    assert Settings(app_env="production").engine_profile == "production"
+    assert (
+        Settings(app_env="local", db_profile="pgbouncer").engine_profile == "pgbouncer"
+    )
+
+
+def test_production_profile_tunes_pool_and_statement_cache():
+    url, opts = engine_options(PG_URL, Settings(app_env="production", app_debug=True))
+    profile = ENGINE_PROFILES["production"]
+
+    # APP_DEBUG no longer turns on SQL echo
+    assert opts["echo"] is False
+    assert opts["pool_size"] == profile.pool_size
+    assert opts["pool_pre_ping"] is True
+    assert opts["pool_recycle"] == profile.pool_recycle
+    assert opts["connect_args"] == {
+        "statement_cache_size": profile.statement_cache_size
+    }
+    assert f"prepared_statement_cache_size={profile.statement_cache_size}" in url
+
+
+def test_overrides_win_over_profile():
+    cfg = Settings(db_profile="pgbouncer", db_pool_size=3, db_echo=True)
+    url, opts = engine_options(PG_URL, cfg)
+    assert opts["pool_size"] == 3
+    assert opts["echo"] is True
+    assert opts["connect_args"] == {"statement_cache_size": 0}
+
+
+def test_sqlite_skips_pool_options():
+    url, opts = engine_options("sqlite+aiosqlite:///:memory:", Settings())
+    assert url == "sqlite+aiosqlite:///:memory:"
+    assert opts == {"echo": False}
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        engine_options(PG_URL, Settings(db_profile="turbo"))
@@ -0,0 +1,79 @@
+import msgpack
+import orjson
+import pytest
+from fastapi import FastAPI, Request, Response
+from httpx import ASGITransport, AsyncClient
+
+from app.core.encoding import MIN_COMPRESS_BYTES, dumps, negotiate
+from app.core.response_cache import cached_json, response_cache
+
+ROWS = [
+    {"id": i, "raw_payload": {"delta": i / 10, "note": "x" * 40}} for i in range(100)
+]
+
+
+def _request(**headers: str) -> Request:
+    raw = [
+        (k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()
+    ]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_negotiation_honours_q_values():
+    assert negotiate(_request()) == ("json", None)
+    assert negotiate(_request(accept_encoding="gzip, br")) == ("json", "br")
+    assert negotiate(_request(accept_encoding="br;q=0, gzip")) == ("json", "gzip")
+    assert negotiate(_request(accept="application/msgpack")) == ("msgpack", None)
+    assert negotiate(
+        _request(accept="application/json, application/msgpack;q=0.5")
+    ) == ("json", None)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/rows")
+    async def rows(request: Request) -> Response:
+        async def render() -> bytes:
+            return dumps(ROWS)
+
+        return await cached_json(request, ["rows"], render)
+
+    response_cache.clear()
+    yield AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    response_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_cached_body_is_served_per_representation(client):
+    async with client as ac:
+        plain = await ac.get("/rows", headers={"Accept-Encoding": "identity"})
+        assert len(plain.content) > MIN_COMPRESS_BYTES
+        assert orjson.loads(plain.content) == ROWS
+
+        r = await ac.get("/rows", headers={"Accept-Encoding": "br"})
+        assert r.headers["content-encoding"] == "br"
+        assert r.headers["vary"] == "Accept, Accept-Encoding"
+        assert r.headers["etag"] != plain.headers["etag"]
+        assert int(r.headers["content-length"]) < len(plain.content) / 5
+
+        r = await ac.get(
+            "/rows",
+            headers={"Accept": "application/msgpack", "Accept-Encoding": "gzip"},
+        )
+        assert r.headers["content-type"] == "application/msgpack"
+        assert r.headers["content-encoding"] == "gzip"
+        # httpx already undid the gzip coding
+        assert msgpack.unpackb(r.content) == ROWS
+
+        etag = r.headers["etag"]
+        again = await ac.get(
+            "/rows",
+            headers={
+                "Accept": "application/msgpack",
+                "Accept-Encoding": "gzip",
+                "If-None-Match": etag,
+            },
+        )
+        assert again.status_code == 304
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.models import Base, WeatherStation, TmaxCalculation
+from app.services.export import arrow_ipc_stream, export_table
+from app.services.ingest import store_forecast
+from tests.test_ingest import PAYLOAD
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        station = WeatherStation(
+            code="KEXP",
+            name="Export Field",
+            lat=30.0,
+            lon=-97.0,
+            timezone="UTC",
+            coastal_distance_km=1.0,
+        )
+        db.add(station)
+        await db.flush()
+        await store_forecast(db, station, PAYLOAD)
+        db.add(
+            TmaxCalculation(
+                station_id=station.id,
+                cli_forecast=85.0,
+                method="MARLIN_v1",
+                confidence=0.95,
+                size=3.0,
+                raw_payload={"delta": 3.0},
+                created_at=datetime(2025, 6, 22, 21, 19, tzinfo=timezone.utc),
+            )
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_export_flattens_and_partitions(session_factory, tmp_path):
+    async with session_factory() as db:
+        res = await export_table(db, tmp_path, "weather_forecasts")
+    # 4 rows (3 models + ensemble) x 3 hours
+    assert res.rows == 12
+
+    table = ds.dataset(tmp_path / "weather_forecasts", partitioning="hive").to_table()
+    assert table.num_rows == 12
+    assert set(table["station"].to_pylist()) == {"KEXP"}
+    # Partitioned by the run's forecast_time, i.e. when it was ingested
+    assert len(set(table["month"].to_pylist())) == 1
+    hrrr = table.filter(ds.field("source") == "ncep_hrrr_conus").sort_by("valid_time")
+    # HRRR's missing third hour is exported as null
+    assert hrrr["temperature"].to_pylist() == [81.0, 83.0, None]
+
+
+@pytest.mark.asyncio
+async def test_incremental_export_only_writes_new_rows(session_factory, tmp_path):
+    async with session_factory() as db:
+        first = await export_table(db, tmp_path, "tmax_calculations")
+        again = await export_table(db, tmp_path, "tmax_calculations")
+    assert (first.rows, again.rows) == (1, 0)
+
+    async with session_factory() as db:
+        db.add(
+            TmaxCalculation(
+                station_id=1,
+                cli_forecast=80.0,
+                method="MARLIN_v1",
+                confidence=0.5,
+                size=0.5,
+                raw_payload=None,
+                created_at=datetime(2025, 7, 1, tzinfo=timezone.utc),
+            )
+        )
+        await db.commit()
+        third = await export_table(db, tmp_path, "tmax_calculations")
+    assert third.rows == 1
+    months = sorted(
+        p.name for p in (tmp_path / "tmax_calculations" / "station=KEXP").iterdir()
+    )
+    assert months == ["month=2025-06", "month=2025-07"]
+
+
+@pytest.mark.asyncio
+async def test_recent_partitions_pick_up_updated_rows(session_factory, tmp_path):
+    now = datetime(2025, 6, 23, 12, tzinfo=timezone.utc)
+    async with session_factory() as db:
+        await export_table(db, tmp_path, "tmax_calculations", now=now)
+        # Reconcile fills in the observed high after the row was exported
+        await db.execute(update(TmaxCalculation).values(observed_high=84.0))
+        await db.commit()
+        res = await export_table(db, tmp_path, "tmax_calculations", now=now)
+    assert res.rows == 1
+
+    table = ds.dataset(tmp_path / "tmax_calculations", partitioning="hive").to_table()
+    assert table["observed_high"].to_pylist() == [84.0]
+
+
+@pytest.mark.asyncio
+async def test_full_export_replaces_previous_files(session_factory, tmp_path):
+    async with session_factory() as db:
+        await export_table(db, tmp_path, "weather_forecasts")
+        await export_table(db, tmp_path, "weather_forecasts", full=True)
+    table = ds.dataset(tmp_path / "weather_forecasts", partitioning="hive").to_table()
+    assert table.num_rows == 12
+
+
+@pytest.mark.asyncio
+async def test_arrow_ipc_stream_round_trips(session_factory):
+    async with session_factory() as db:
+        body = b"".join([c async for c in arrow_ipc_stream(db, "tmax_calculations")])
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 1
+    assert table["station_code"].to_pylist() == ["KEXP"]
+    assert table["raw_payload"].to_pylist() == ['{"delta": 3.0}']
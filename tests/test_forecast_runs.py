@@ -0,0 +1,185 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, ForecastRun, WeatherStation
+from app.services import forecast_runs
+from app.services.forecast_runs import (
+    append_run,
+    decode,
+    dequantize,
+    encode_delta,
+    encode_keyframe,
+    forecast_evolution,
+    quantize,
+)
+
+T0 = datetime(2025, 6, 22, tzinfo=timezone.utc)
+
+
+def test_delta_roundtrip_with_shift_and_missing_hours():
+    base = quantize([80.0, 81.0, None, 83.0, 84.0])
+    current = quantize([81.0, 83.1, 84.0, None, 86.0])
+    # current starts one hour after base
+    payload = encode_delta(current, base, shift=1)
+    out = decode(payload, base, shift=1)
+    np.testing.assert_array_equal(out, current)
+
+    values = dequantize(out)
+    assert values[1] == pytest.approx(83.1) and math.isnan(values[3])
+    assert decode(encode_keyframe(base)).tolist() == base.tolist()
+
+
+def test_unchanged_run_compresses_to_almost_nothing():
+    base = quantize(np.linspace(70, 95, 384))
+    same = encode_delta(base, base, shift=0)
+    assert len(same) < len(encode_keyframe(base)) / 10
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(
+            WeatherStation(
+                code="KRUN",
+                name="Run Field",
+                lat=30.0,
+                lon=-97.0,
+                timezone="UTC",
+                coastal_distance_km=1.0,
+            )
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_keyframe_cadence_and_evolution(session_factory, monkeypatch):
+    monkeypatch.setattr(forecast_runs, "KEYFRAME_EVERY", 3)
+    hour = timedelta(hours=1)
+    async with session_factory() as db:
+        for i in range(5):
+            start = T0 + i * hour
+            # Each hourly run predicts 80 + i for valid time T0 + 4h
+            values = [
+                80.0 + i if start + h * hour == T0 + 4 * hour else 70.0
+                for h in range(6)
+            ]
+            await append_run(db, 1, "gfs_seamless", start, start, values)
+            await db.commit()
+
+    async with session_factory() as db:
+        runs = (
+            (await db.execute(select(ForecastRun).order_by(ForecastRun.id)))
+            .scalars()
+            .all()
+        )
+        assert [r.base_id is None for r in runs] == [True, False, False, True, False]
+        assert runs[2].keyframe_id == runs[0].id
+
+        points = await forecast_evolution(db, 1, T0 + 4 * hour)
+    assert [p["temperature"] for p in points] == [80.0, 81.0, 82.0, 83.0, 84.0]
+    assert [p["lead_hours"] for p in points] == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_run_is_never_a_base(session_factory):
+    async with session_factory() as db:
+        await append_run(db, 1, "ecmwf_ifs025", T0, T0, [70.0, 71.0])
+        await db.commit()
+        await append_run(db, 1, "ecmwf_ifs025", T0, T0, [99.0, 99.0])
+        await db.rollback()
+        run = await append_run(db, 1, "ecmwf_ifs025", T0, T0, [70.0, 72.0])
+        await db.commit()
+        assert run.base_id == 1
+
+        points = await forecast_evolution(
+            db, 1, T0 + timedelta(hours=1), "ecmwf_ifs025"
+        )
+    assert [p["temperature"] for p in points] == [71.0, 72.0]
+
+
+@pytest.mark.asyncio
+async def test_evolution_decodes_only_runs_within_horizon(session_factory, monkeypatch):
+    monkeypatch.setattr(forecast_runs, "KEYFRAME_EVERY", 3)
+    monkeypatch.setattr(forecast_runs, "MAX_HORIZON_HOURS", 6)
+    decoded: list[int] = []
+    decode_chain = forecast_runs.decode_chain
+
+    def spy(runs):
+        decoded.extend(r.id for r in runs)
+        return decode_chain(runs)
+
+    hour = timedelta(hours=1)
+    async with session_factory() as db:
+        for i in range(9):
+            start = T0 + i * hour
+            await append_run(db, 1, "gfs_seamless", start, start, [70.0 + i] * 6)
+            await db.commit()
+
+    monkeypatch.setattr(forecast_runs, "decode_chain", spy)
+    async with session_factory() as db:
+        points = await forecast_evolution(db, 1, T0 + 10 * hour)
+    # Runs 6-9 (starting 5-8 h) cover it; run 6 decodes from keyframe run 4
+    assert [p["temperature"] for p in points] == [75.0, 76.0, 77.0, 78.0]
+    assert decoded == [4, 5, 6, 7, 8, 9]
+
+
+@pytest.mark.asyncio
+async def test_interleaved_chains_from_two_writers_decode(session_factory):
+    hour = timedelta(hours=1)
+    series_at = {
+        i: quantize([60.0 + 10 * i + h for h in range(3)]) for i in range(1, 6)
+    }
+    # Writer A: 1 <- 2 <- 4; writer B (stale head, new keyframe): 3 <- 5
+    layout = {1: None, 2: 1, 3: None, 4: 2, 5: 3}
+    async with session_factory() as db:
+        for run_id, base_id in layout.items():
+            q = series_at[run_id]
+            start = T0 + run_id * hour
+            if base_id is None:
+                payload, keyframe_id = encode_keyframe(q), None
+            else:
+                payload = encode_delta(q, series_at[base_id], run_id - base_id)
+                keyframe_id = 1 if run_id in (2, 4) else 3
+            db.add(
+                ForecastRun(
+                    id=run_id,
+                    station_id=1,
+                    source="gfs_seamless",
+                    run_time=start,
+                    hourly_start=start,
+                    hours=3,
+                    payload=payload,
+                    base_id=base_id,
+                    keyframe_id=keyframe_id,
+                )
+            )
+        await db.commit()
+
+    async with session_factory() as db:
+        # Run 4's base (2) lies before keyframe 3, where run 5's chain starts
+        points = await forecast_evolution(db, 1, T0 + 5 * hour)
+        assert [p["temperature"] for p in points] == [92.0, 101.0, 110.0]
+
+        series = await forecast_runs.run_series(
+            db, [(1, "gfs_seamless", T0 + 4 * hour), (1, "gfs_seamless", T0 + 5 * hour)]
+        )
+        assert series[(1, "gfs_seamless", T0 + 4 * hour)][1].tolist() == [100, 101, 102]
+
+        # A fresh process loads its head from run 5 and keeps appending
+        run = await append_run(
+            db, 1, "gfs_seamless", T0 + 6 * hour, T0 + 6 * hour, [76.0, 77.0]
+        )
+        await db.commit()
+    assert run.base_id == 5 and run.keyframe_id == 3
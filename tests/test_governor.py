@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.core.governor import ResourceGovernor, governed
+
+
+@pytest.mark.asyncio
+async def test_jobs_past_the_budget_queue():
+    gov = ResourceGovernor({"browser": 2, "db": 5})
+    running = 0
+    peak = 0
+
+    async def scrape(code: str) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return code
+
+    job = governed(scrape, "browser", "db", gov=gov)
+    tasks = [asyncio.create_task(job(f"K{i:03d}")) for i in range(5)]
+    await asyncio.sleep(0.005)
+    assert gov.stats()["browser"]["queued"] == 3
+    assert await asyncio.gather(*tasks) == [f"K{i:03d}" for i in range(5)]
+
+    assert peak == 2
+    stats = gov.stats()["browser"]
+    assert (stats["admitted"], stats["in_use"], stats["queued"]) == (5, 0, 0)
+    assert stats["wait_ms_max"] >= 30
+    assert gov.stats()["db"]["wait_ms_max"] < 5
+
+
+@pytest.mark.asyncio
+async def test_overlapping_resource_sets_do_not_deadlock():
+    gov = ResourceGovernor({"db": 1, "http": 1, "browser": 1})
+
+    async def work() -> None:
+        await asyncio.sleep(0.001)
+
+    # Declared in opposite orders; acquisition order is canonical
+    a = governed(work, "browser", "db", gov=gov)
+    b = governed(work, "db", "http", "browser", gov=gov)
+    await asyncio.wait_for(asyncio.gather(*(f() for f in [a, b] * 10)), timeout=2)
+
+
+def test_unknown_resource_is_rejected():
+    with pytest.raises(ValueError):
+        ResourceGovernor({"gpu": 1})
+
+
+@pytest.mark.asyncio
+async def test_browser_burst_does_not_block_http_jobs():
+    gov = ResourceGovernor({"browser": 1, "http": 4, "db": 2})
+    release = asyncio.Event()
+
+    async def scrape() -> None:
+        await release.wait()
+
+    async def fetch() -> str:
+        return "ok"
+
+    scrapes = [
+        asyncio.create_task(governed(scrape, "browser", "db", gov=gov)())
+        for _ in range(6)
+    ]
+    await asyncio.sleep(0.005)
+    # One scrape holds the page; the rest wait on it without holding db slots
+    assert gov.stats()["browser"]["queued"] == 5
+    assert gov.stats()["db"]["in_use"] == 1
+
+    job = governed(fetch, "http", "db", gov=gov)
+    assert (
+        await asyncio.wait_for(asyncio.gather(*(job() for _ in range(3))), timeout=1)
+        == ["ok"] * 3
+    )
+
+    release.set()
+    await asyncio.gather(*scrapes)
+
+
+@pytest.mark.asyncio
+async def test_lease_holds_its_slot_until_adopted():
+    gov = ResourceGovernor({"browser": 1, "db": 1})
+    lease = await gov.lease("browser")
+    other = asyncio.create_task(governed(asyncio.sleep, "browser", gov=gov)(0))
+    await asyncio.sleep(0.005)
+    assert not other.done() and gov.stats()["browser"]["queued"] == 1
+
+    # Adopting the lease needs no second slot, and exiting gives it back
+    async with gov.acquire("browser", "db", held={"browser": lease}) as waits:
+        assert waits["browser"] == 0.0
+        assert gov.stats()["browser"]["in_use"] == 1
+    await asyncio.wait_for(other, 1)
+    assert lease.released and gov.stats()["browser"]["in_use"] == 0
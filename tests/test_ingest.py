@@ -0,0 +1,149 @@
+import asyncio
+import math
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, WeatherStation, TmaxCalculation
+from app.services import ingest, series
+from app.services.ingest import ENSEMBLE_SOURCE, forecast_rows, store_forecast
+from app.services.singleflight import SingleFlight
+from app.services.station_registry import StationSnapshot
+from app.services.strategy import run_for_station
+
+PAYLOAD = {
+    "latitude": 30.0,
+    "longitude": -97.0,
+    "hourly_units": {"temperature_2m_gfs_seamless": "°F"},
+    "hourly": {
+        "time": ["2025-06-22T00:00", "2025-06-22T01:00", "2025-06-22T02:00"],
+        "temperature_2m_gfs_seamless": [80.0, 82.0, 84.0],
+        "temperature_2m_ncep_hrrr_conus": [81.0, 83.0, None],
+        "temperature_2m_ecmwf_ifs025": [79.0, 81.0, 86.0],
+    },
+}
+
+
+def test_pack_roundtrip_keeps_missing_hours():
+    packed = series.pack([1.5, None, 3.25])
+    assert len(packed) == 12
+    values = series.unpack(packed)
+    assert values[0] == 1.5 and math.isnan(values[1]) and values[2] == 3.25
+    assert series.last_finite(series.unpack(series.pack([2.0, None]))) == 2.0
+
+
+def test_forecast_rows_per_model_plus_ensemble():
+    fetched = datetime(2025, 6, 22, 0, 5, tzinfo=timezone.utc)
+    rows = forecast_rows(1, PAYLOAD, fetched)
+
+    assert [r.source for r in rows] == [
+        "gfs_seamless",
+        "ncep_hrrr_conus",
+        "ecmwf_ifs025",
+        ENSEMBLE_SOURCE,
+    ]
+    assert all(
+        r.hourly_start == datetime(2025, 6, 22, tzinfo=timezone.utc) for r in rows
+    )
+    # HRRR's last finite hour is its temperature
+    assert rows[1].temperature == 83.0
+
+    ens = rows[-1]
+    mean = series.unpack(ens.hourly_values)
+    spread = series.unpack(ens.hourly_spread)
+    np.testing.assert_allclose(mean, [80.0, 82.0, 85.0])
+    np.testing.assert_allclose(
+        spread, [np.std([80, 81, 79]), np.std([82, 83, 81]), 1.0]
+    )
+    assert ens.temperature == pytest.approx(85.0)
+
+
+def test_unsuffixed_series_is_not_copied_to_every_model(monkeypatch):
+    fetched = datetime(2025, 6, 22, 0, 5, tzinfo=timezone.utc)
+    payload = {
+        "hourly": {
+            "time": ["2025-06-22T00:00"],
+            "temperature_2m": [90.0],
+            "temperature_2m_gfs_seamless": [80.0],
+        }
+    }
+    rows = forecast_rows(1, payload, fetched)
+    assert [r.source for r in rows] == ["gfs_seamless", ENSEMBLE_SOURCE]
+    assert rows[-1].temperature == 80.0
+
+    monkeypatch.setattr("app.services.ingest.ENSEMBLE_MODELS", ("gfs_seamless",))
+    rows = forecast_rows(
+        1, {"hourly": {"time": ["2025-06-22T00:00"], "temperature_2m": [90.0]}}, fetched
+    )
+    assert [(r.source, r.temperature) for r in rows[:1]] == [("gfs_seamless", 90.0)]
+
+
+def test_forecast_rows_without_hourly_data():
+    assert forecast_rows(1, {"error": True}, datetime.now(timezone.utc)) == []
+
+
+@pytest.mark.asyncio
+async def test_strategy_reads_ensemble_row():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as db:
+        station = WeatherStation(
+            code="KENS",
+            name="Ensemble Field",
+            lat=30.0,
+            lon=-97.0,
+            timezone="America/Chicago",
+            coastal_distance_km=100.0,
+        )
+        db.add(station)
+        await db.flush()
+        assert await store_forecast(db, station, PAYLOAD) == 4
+        await db.commit()
+
+        await run_for_station(db, station, 82.0)
+        await db.commit()
+
+        calc = (await db.execute(select(TmaxCalculation))).scalar_one()
+        assert calc.cli_forecast == pytest.approx(85.0)
+        assert calc.raw_payload["model_spread"] == pytest.approx(1.0)
+        assert calc.confidence == 0.95
+
+
+@pytest.mark.asyncio
+async def test_shared_fetch_outlives_the_first_caller(monkeypatch):
+    station = StationSnapshot(
+        1, "KAUS", "Austin", 30.19, -97.67, "America/Chicago", 200.0
+    )
+    started, release = asyncio.Event(), asyncio.Event()
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        started.set()
+        await release.wait()
+        return httpx.Response(200, json=PAYLOAD)
+
+    monkeypatch.setattr(
+        ingest, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    monkeypatch.setattr(ingest, "upstream_flight", SingleFlight(ttl_seconds=0))
+
+    first = asyncio.create_task(ingest.fetch_forecast(station))
+    await started.wait()
+    second = asyncio.create_task(ingest.fetch_forecast(station))
+    await asyncio.sleep(0)
+    # The caller that started the request goes away before it completes
+    first.cancel()
+    release.set()
+
+    assert await asyncio.wait_for(second, 1) == PAYLOAD
+    assert len(requests) == 1
+    await ingest.close_forecast_client()
@@ -0,0 +1,57 @@
+import io
+import json
+import time
+
+import pytest
+
+from app.core.log import configure_logging, get_logger, job_scope, shutdown_logging
+
+
+class SlowStream(io.StringIO):
+    def write(self, s: str) -> int:
+        time.sleep(0.01)
+        return super().write(s)
+
+
+@pytest.fixture
+def stream():
+    out = SlowStream()
+    configure_logging(level="INFO", fmt="json", stream=out)
+    yield out
+    shutdown_logging()
+
+
+def _lines(out: io.StringIO) -> list[dict]:
+    shutdown_logging()
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_job_context_and_duration_are_attached(stream):
+    log = get_logger("marlin.test")
+    async with job_scope("wethr", station="KAUS", slot="21:19") as ctx:
+        log.info("scraped %s", "KAUS", extra={"high": 91.5})
+
+    first, done = _lines(stream)
+    assert first["msg"] == "scraped KAUS"
+    assert first["high"] == 91.5
+    assert (first["job"], first["station"], first["slot"]) == ("wethr", "KAUS", "21:19")
+    assert first["job_id"] == done["job_id"] == ctx["job_id"]
+    assert done["msg"] == "job finished" and done["duration_ms"] >= 0
+
+
+def test_sampling_keeps_one_in_n(stream):
+    log = get_logger("marlin.test")
+    for i in range(10):
+        log.info("stored %s", i, extra={"sample": 5})
+    assert [line["msg"] for line in _lines(stream)] == ["stored 0", "stored 5"]
+
+
+def test_emit_does_not_wait_for_a_slow_sink(stream):
+    log = get_logger("marlin.test")
+    started = time.perf_counter()
+    for i in range(50):
+        log.info("burst %s", i)
+    # 50 writes x 10 ms would take 0.5 s if written inline
+    assert time.perf_counter() - started < 0.1
+    assert len(_lines(stream)) == 50
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.admin import admin_router
+from app.core.loopmon import LoopMonitor, sample_profile
+from app.core.settings import get_settings
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_monitor_records_stall_with_stack():
+    monitor = LoopMonitor(threshold=0.05, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    _block_the_loop(0.2)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["lag_max_ms"] >= 150
+    (event,) = stats["slow_callbacks"]
+    assert event["duration_ms"] >= 150
+    assert "_block_the_loop" in "".join(event["stack"])
+
+
+def _busy_spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_profile_returns_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        folded = await sample_profile(0.2, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = folded.splitlines()
+    spinner = [line for line in lines if line.startswith("spinner;")]
+    assert spinner and all("test_loopmon:_busy_spin" in line for line in spinner)
+    stack, count = spinner[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+@pytest.mark.asyncio
+async def test_admin_routes_require_token(monkeypatch):
+    app = FastAPI()
+    app.include_router(admin_router)
+    settings = get_settings()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        monkeypatch.setattr(settings, "admin_token", "")
+        assert (await ac.get("/admin/loop")).status_code == 404
+
+        monkeypatch.setattr(settings, "admin_token", "s3cret")
+        assert (await ac.get("/admin/loop")).status_code == 403
+        r = await ac.get("/admin/loop", headers={"X-Admin-Token": "s3cre"})
+        assert r.status_code == 403
+        r = await ac.get("/admin/loop", headers={"X-Admin-Token": "s3cret"})
+        assert r.status_code == 200 and "slow_callbacks" in r.json()
+
+        r = await ac.post(
+            "/admin/profile?seconds=0.1", headers={"X-Admin-Token": "s3cret"}
+        )
+        assert r.status_code == 200
+        assert "profile.folded" in r.headers["content-disposition"]
@@ -0,0 +1,280 @@
+from datetime import date, datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, StationAccuracy, TmaxCalculation, WeatherStation
+from app.models.weather import WethrHigh
+from app.services.reconcile import accuracy_summary, reconcile_day
+from app.core.schedule_loader import load_station_schedule
+from app.services.rollups import day_bounds, day_of
+from app.services.station_registry import StationSnapshot
+from app.services.strategy import run_for_station
+from app.services.wethr import report_day
+
+DAY = date(2025, 6, 22)
+
+
+def _at(day: int, hour: int) -> datetime:
+    return datetime(2025, 6, day, hour, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        for code in ("KAUS", "KLAX"):
+            db.add(
+                WeatherStation(
+                    code=code,
+                    name=code,
+                    lat=30.0,
+                    lon=-97.0,
+                    timezone="UTC",
+                    coastal_distance_km=1.0,
+                )
+            )
+        await db.flush()
+        db.add_all(
+            [
+                # Two KAUS scrapes; the later one is the final high
+                WethrHigh(
+                    station_id=1,
+                    date_iso="2025-06-22",
+                    wethr_high=90.0,
+                    scraped_at=_at(22, 21),
+                ),
+                WethrHigh(
+                    station_id=1,
+                    date_iso="2025-06-22",
+                    wethr_high=92.0,
+                    scraped_at=_at(22, 23),
+                ),
+                WethrHigh(
+                    station_id=2,
+                    date_iso="2025-06-22",
+                    wethr_high=75.0,
+                    scraped_at=_at(22, 22),
+                ),
+            ]
+        )
+        for station_id, forecast, created in [
+            (1, 93.0, _at(22, 21)),
+            (1, 91.5, _at(22, 22)),
+            (2, 78.0, _at(22, 22)),
+            # Next day: not part of this reconciliation
+            (1, 99.0, _at(23, 1)),
+        ]:
+            db.add(
+                TmaxCalculation(
+                    station_id=station_id,
+                    cli_forecast=forecast,
+                    method="MARLIN_v1",
+                    confidence=0.7,
+                    size=1.0,
+                    raw_payload=None,
+                    created_at=created,
+                )
+            )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fills_observed_and_aggregates(session_factory):
+    async with session_factory() as db:
+        deltas = await reconcile_day(db, DAY)
+        await db.commit()
+    assert {sid: d.samples for sid, d in deltas.items()} == {1: 2, 2: 1}
+
+    async with session_factory() as db:
+        observed = (
+            (
+                await db.execute(
+                    select(TmaxCalculation.observed_high).order_by(TmaxCalculation.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert observed == [92.0, 92.0, 75.0, None]
+
+        kaus = accuracy_summary(await db.get(StationAccuracy, 1))
+    assert kaus["samples"] == 2
+    assert kaus["mae"] == pytest.approx(0.75)
+    assert kaus["bias"] == pytest.approx(0.25)
+    assert kaus["hit_rate"] == 1.0
+    assert kaus["last_date"] == "2025-06-22"
+
+
+@pytest.mark.asyncio
+async def test_rerun_is_idempotent_and_later_days_accumulate(session_factory):
+    async with session_factory() as db:
+        await reconcile_day(db, DAY)
+        await db.commit()
+        assert await reconcile_day(db, DAY) == {}
+        db.add(
+            WethrHigh(
+                station_id=1,
+                date_iso="2025-06-23",
+                wethr_high=95.0,
+                scraped_at=_at(23, 2),
+            )
+        )
+        await db.flush()
+        await reconcile_day(db, date(2025, 6, 23))
+        await db.commit()
+
+        row = await db.get(StationAccuracy, 1)
+        await db.refresh(row)
+    assert row.samples == 3
+    assert row.sum_abs_error == pytest.approx(1.0 + 0.5 + 4.0)
+    assert row.within_1f == 2
+    assert row.last_date == "2025-06-23"
+
+
+@pytest.mark.asyncio
+async def test_post_cli_signal_after_utc_midnight_stays_on_local_day(session_factory):
+    # Pacific schedule like KLAX: post-DSM 22:12 UTC, post-CLI 01:12 UTC next day
+    assert day_of(_at(23, 1), "America/Los_Angeles") == "2025-06-22"
+    assert day_bounds(DAY, "America/Los_Angeles")[0] == _at(22, 8)
+    async with session_factory() as db:
+        db.add(
+            WeatherStation(
+                code="KSAN",
+                name="KSAN",
+                lat=32.7,
+                lon=-117.2,
+                timezone="America/Los_Angeles",
+                coastal_distance_km=1.0,
+            )
+        )
+        await db.flush()
+        db.add_all(
+            [
+                WethrHigh(
+                    station_id=3,
+                    date_iso="2025-06-22",
+                    wethr_high=88.0,
+                    scraped_at=_at(22, 22),
+                ),
+                WethrHigh(
+                    station_id=3,
+                    date_iso="2025-06-22",
+                    wethr_high=89.0,
+                    scraped_at=_at(23, 1),
+                ),
+                # Next local day's in-progress reading
+                WethrHigh(
+                    station_id=3,
+                    date_iso="2025-06-23",
+                    wethr_high=70.0,
+                    scraped_at=_at(23, 22),
+                ),
+            ]
+        )
+        for created in (_at(22, 22), _at(23, 1)):
+            db.add(
+                TmaxCalculation(
+                    station_id=3,
+                    cli_forecast=90.0,
+                    method="MARLIN_v1",
+                    confidence=0.7,
+                    size=1.0,
+                    raw_payload=None,
+                    created_at=created,
+                )
+            )
+        await db.commit()
+
+        deltas = await reconcile_day(db, DAY)
+        await db.commit()
+        assert deltas[3].samples == 2
+        assert (await reconcile_day(db, date(2025, 6, 23))).get(3) is None
+        await db.commit()
+        observed = (
+            (
+                await db.execute(
+                    select(TmaxCalculation.observed_high).where(
+                        TmaxCalculation.station_id == 3
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+    assert observed == [89.0, 89.0]
+
+
+def test_post_cli_slot_reports_on_the_post_dsm_day():
+    schedule = load_station_schedule()
+    kaus = schedule["KAUS"]
+    # 06:19 UTC is 00:19 CST, already the next local day by the clock
+    assert day_of(_at(23, 6).replace(minute=19), "America/Chicago") == "2025-06-23"
+    assert (
+        report_day(kaus["post_cli"], kaus["post_dsm"], "America/Chicago", _at(23, 7))
+        == "2025-06-22"
+    )
+    assert (
+        report_day(kaus["post_dsm"], kaus["post_dsm"], "America/Chicago", _at(22, 22))
+        == "2025-06-22"
+    )
+    for code, tz in [("KLAX", "America/Los_Angeles"), ("KMIA", "America/New_York")]:
+        slots = schedule[code]
+        assert (
+            report_day(slots["post_cli"], slots["post_dsm"], tz, _at(23, 7))
+            == "2025-06-22"
+        )
+
+
+@pytest.mark.asyncio
+async def test_kaus_post_cli_high_reconciles_its_report_day(session_factory):
+    kaus = load_station_schedule()["KAUS"]
+    tz = "America/Chicago"
+    post_dsm_at = _at(22, 21).replace(minute=19)
+    post_cli_at = _at(23, 6).replace(minute=19)
+    async with session_factory() as db:
+        db.add(
+            WeatherStation(
+                code="KATT",
+                name="KATT",
+                lat=30.3,
+                lon=-97.7,
+                timezone=tz,
+                coastal_distance_km=250.0,
+            )
+        )
+        await db.flush()
+        station = StationSnapshot(3, "KATT", "KATT", 30.3, -97.7, tz, 250.0)
+        for slot, at, high in [
+            (kaus["post_dsm"], post_dsm_at, 90.0),
+            (kaus["post_cli"], post_cli_at, 92.0),
+        ]:
+            day = report_day(slot, kaus["post_dsm"], tz, at)
+            db.add(
+                WethrHigh(station_id=3, date_iso=day, wethr_high=high, scraped_at=at)
+            )
+            await run_for_station(db, station, high, latest=(93.0, None), date_iso=day)
+        await db.commit()
+
+        assert (await reconcile_day(db, DAY))[3].samples == 2
+        await db.commit()
+        observed = (
+            (
+                await db.execute(
+                    select(TmaxCalculation.observed_high).where(
+                        TmaxCalculation.station_id == 3
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+    # The CLI reading, not the afternoon one, is the day's observed high
+    assert observed == [92.0, 92.0]
@@ -0,0 +1,179 @@
+from datetime import date, datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import (
+    Base,
+    StationDaily,
+    TmaxCalculation,
+    WeatherForecast,
+    WeatherStation,
+)
+from app.models.weather import WethrHigh
+from app.services.reconcile import reconcile_day
+from app.services import rollups
+from app.services.rollups import DailyRollup, rebuild_daily
+from app.services.write_behind import WriteBehind
+
+
+def _at(day: int, hour: int) -> datetime:
+    return datetime(2025, 6, day, hour, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(
+            WeatherStation(
+                code="KAUS",
+                name="Austin",
+                lat=30.2,
+                lon=-97.7,
+                timezone="America/Chicago",
+                coastal_distance_km=250.0,
+            )
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+async def _days(factory) -> dict[str, StationDaily]:
+    async with factory() as db:
+        rows = (await db.execute(select(StationDaily))).scalars().all()
+    return {r.date_iso: r for r in rows}
+
+
+@pytest.mark.asyncio
+async def test_batches_apply_in_any_order(session_factory):
+    late, early = DailyRollup(), DailyRollup()
+    late.forecast(1, _at(22, 18), 91.0)
+    late.signal(1, _at(22, 21), 2.0, 0.85, 2.0)
+    early.forecast(1, _at(22, 6), 88.0)
+    early.signal(1, _at(22, 20), -1.0, 0.7, 1.0)
+    early.high(1, "2025-06-22", 90.0, _at(22, 20))
+
+    async with session_factory() as db:
+        await late.apply(db)
+        await early.apply(db)
+        await db.commit()
+
+    day = (await _days(session_factory))["2025-06-22"]
+    assert (day.model_temp, day.wethr_high) == (91.0, 90.0)
+    assert day.signals == 2
+    assert (day.delta, day.confidence, day.size) == (2.0, 0.85, 2.0)
+    assert day.observed_high is None
+
+
+@pytest.mark.asyncio
+async def test_write_behind_and_reconcile_maintain_rollups(session_factory):
+    # Forecasts commit in the model job's own transaction
+    async with session_factory() as db:
+        daily = DailyRollup()
+        for source, temp in (("gfs_seamless", 92.0), ("ensemble", 93.0)):
+            db.add(
+                WeatherForecast(
+                    station_id=1,
+                    source=source,
+                    forecast_time=_at(22, 6),
+                    valid_time=_at(22, 0),
+                    temperature=temp,
+                )
+            )
+            daily.forecast(1, _at(22, 6), temp)
+        await daily.apply(db)
+        await db.commit()
+
+    buffer = WriteBehind(session_factory=session_factory)
+    buffer.add(
+        WethrHigh(
+            station_id=1, date_iso="2025-06-22", wethr_high=90.0, scraped_at=_at(22, 21)
+        )
+    )
+    buffer.add(
+        TmaxCalculation(
+            station_id=1,
+            cli_forecast=93.0,
+            method="MARLIN_v1",
+            confidence=0.95,
+            size=3.0,
+            raw_payload={"delta": 3.0},
+            created_at=_at(22, 21),
+        )
+    )
+    await buffer.flush()
+
+    day = (await _days(session_factory))["2025-06-22"]
+    # Same fetch: the ensemble row, written last, is the day's model temp
+    assert day.model_temp == 93.0
+    assert day.wethr_high == 90.0
+    assert (day.signals, day.delta) == (1, 3.0)
+
+    async with session_factory() as db:
+        await reconcile_day(db, date(2025, 6, 22))
+        await db.commit()
+    day = (await _days(session_factory))["2025-06-22"]
+    assert day.observed_high == 90.0
+    assert day.signals == 1
+
+
+@pytest.mark.asyncio
+async def test_apply_splits_large_rollups(session_factory, monkeypatch):
+    monkeypatch.setattr(rollups, "APPLY_BATCH", 2)
+    daily = DailyRollup()
+    for day in range(1, 6):
+        daily.forecast(1, _at(day, 12), 80.0 + day)
+    async with session_factory() as db:
+        await daily.apply(db)
+        await db.commit()
+    assert len(await _days(session_factory)) == 5
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_live_rollups(session_factory):
+    # A post-CLI signal after 00:00 UTC still belongs to the Chicago day before
+    async with session_factory() as db:
+        db.add_all(
+            [
+                WeatherForecast(
+                    station_id=1,
+                    source="ensemble",
+                    forecast_time=_at(22, 6),
+                    valid_time=_at(22, 0),
+                    temperature=93.0,
+                ),
+                WethrHigh(
+                    station_id=1,
+                    date_iso="2025-06-22",
+                    wethr_high=90.0,
+                    scraped_at=_at(23, 1),
+                ),
+                TmaxCalculation(
+                    station_id=1,
+                    cli_forecast=93.0,
+                    method="MARLIN_v1",
+                    confidence=0.95,
+                    size=3.0,
+                    raw_payload={"delta": 3.0},
+                    observed_high=91.0,
+                    created_at=_at(23, 1),
+                ),
+            ]
+        )
+        await db.commit()
+
+    for _ in range(2):
+        async with session_factory() as db:
+            assert await rebuild_daily(db) == 1
+            await db.commit()
+
+    day = (await _days(session_factory))["2025-06-22"]
+    assert (day.model_temp, day.wethr_high, day.observed_high) == (93.0, 90.0, 91.0)
+    assert (day.signals, day.delta, day.size) == (1, 3.0, 3.0)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, SchedulerNode
+from app.services.sharding import HashRing, ShardCoordinator, sharded
+
+CODES = [f"K{i:03d}" for i in range(300)]
+
+
+def test_ring_spreads_and_moves_only_departed_keys():
+    three = HashRing(["a", "b", "c"])
+    owners = {code: three.owner(code) for code in CODES}
+    counts = {n: list(owners.values()).count(n) for n in "abc"}
+    assert all(60 < c < 140 for c in counts.values())
+
+    two = HashRing(["a", "c"])
+    moved = [code for code in CODES if two.owner(code) != owners[code]]
+    assert moved and all(owners[code] == "b" for code in moved)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'nodes.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _beat(factory, nodes):
+    for node in nodes:
+        async with factory() as db:
+            await node.heartbeat(db)
+
+
+@pytest.mark.asyncio
+async def test_nodes_partition_stations_and_rebalance(session_factory):
+    nodes = [ShardCoordinator(f"node-{i}", ttl=30, enabled=True) for i in range(3)]
+    # Two rounds so every node has seen every other
+    await _beat(session_factory, nodes)
+    await _beat(session_factory, nodes)
+
+    owned = [set(n.owned(CODES)) for n in nodes]
+    assert sum(len(o) for o in owned) == len(CODES)
+    assert set().union(*owned) == set(CODES)
+
+    async with session_factory() as db:
+        await nodes[1].leave(db)
+    await _beat(session_factory, [nodes[0], nodes[2]])
+    after = [set(nodes[0].owned(CODES)), set(nodes[2].owned(CODES))]
+    assert after[0] | after[1] == set(CODES) and not after[0] & after[1]
+    # Survivors keep what they had and pick up only the departed node's share
+    assert owned[0] <= after[0] and owned[2] <= after[1]
+    assert nodes[1].owned(CODES) == []
+
+
+@pytest.mark.asyncio
+async def test_stale_node_drops_out(session_factory):
+    stale = datetime.now(timezone.utc) - timedelta(minutes=5)
+    async with session_factory() as db:
+        db.add(SchedulerNode(node_id="dead", started_at=stale, heartbeat_at=stale))
+        await db.commit()
+
+    node = ShardCoordinator("alive", ttl=30, enabled=True)
+    async with session_factory() as db:
+        ring = await node.heartbeat(db)
+    assert ring.nodes == ("alive",)
+    assert node.owned(CODES) == CODES
+
+
+@pytest.mark.asyncio
+async def test_sharded_job_skips_foreign_stations():
+    ran = []
+
+    async def job(code: str) -> None:
+        ran.append(code)
+
+    node = ShardCoordinator("solo", enabled=True)
+    # Never heartbeated: owns nothing
+    await sharded(job, node)("KAUS")
+    assert ran == []
+
+    node.enabled = False
+    await sharded(job, node)("KAUS")
+    assert ran == ["KAUS"]
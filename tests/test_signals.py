@@ -0,0 +1,133 @@
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, WeatherStation, WeatherForecast
+from app.services import signals
+from app.services.signals import SignalBroker, SubscriptionLagged
+from app.services.station_registry import StationSnapshot
+from app.services.strategy import run_for_station
+
+
+@pytest.mark.asyncio
+async def test_subscribers_only_see_their_stations():
+    broker = SignalBroker()
+    aus = broker.open([1])
+    everything = broker.open()
+
+    broker.publish(1, {"id": 1, "v": "a"})
+    broker.publish(2, {"id": 2, "v": "b"})
+
+    assert (await aus.next(timeout=0.1)).data == {"id": 1, "v": "a"}
+    assert await aus.next(timeout=0.01) is None
+    assert [(await everything.next(0.1)).station_id for _ in range(2)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_resume_from_last_event_id():
+    broker = SignalBroker()
+    first = broker.publish(1, {"id": 11, "n": 1})
+    broker.publish(1, {"id": 12, "n": 2})
+    broker.publish(1, {"id": 13, "n": 3})
+
+    sub = broker.open([1], last_event_id=first.id)
+    broker.publish(1, {"id": 14, "n": 4})
+
+    got = [(await sub.next(0.1)).data["n"] for _ in range(3)]
+    assert got == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_rows_committed_out_of_id_order():
+    broker = SignalBroker()
+    broker.publish(1, {"id": 21})
+    broker.publish(1, {"id": 23})
+    # Row 22 was inserted first but its transaction committed last
+    broker.publish(1, {"id": 22})
+
+    sub = broker.open(last_event_id=23)
+    assert (await sub.next(0.1)).id == 22
+    assert await sub.next(timeout=0.01) is None
+
+
+@pytest.mark.asyncio
+async def test_unbuffered_last_event_id_gets_a_reset():
+    broker = SignalBroker(history_size=2)
+    for row_id in (1, 2, 3):
+        broker.publish(1, {"id": row_id})
+
+    sub = broker.open(last_event_id=1)
+    reset = await sub.next(0.1)
+    assert (reset.kind, reset.id) == ("reset", 3)
+    broker.publish(1, {"id": 4})
+    assert (await sub.next(0.1)).id == 4
+
+    # After a restart nothing is buffered; the reset carries no id to resume from
+    fresh = SignalBroker().open(last_event_id=3)
+    reset = await fresh.next(0.1)
+    assert (reset.kind, reset.id) == ("reset", None)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_cut_off_without_blocking_publisher():
+    broker = SignalBroker()
+    slow = broker.open()
+    for n in range(signals.QUEUE_SIZE + 5):
+        broker.publish(1, {"id": n + 1, "n": n})
+
+    assert broker.subscriber_count == 0
+    # Whatever was queued is still delivered before the cut-off
+    for _ in range(signals.QUEUE_SIZE):
+        assert await slow.next(0.1) is not None
+    with pytest.raises(SubscriptionLagged):
+        await slow.next(0.1)
+
+
+@pytest.mark.asyncio
+async def test_strategy_publishes_only_after_commit(monkeypatch):
+    broker = SignalBroker()
+    monkeypatch.setattr("app.services.strategy.broker", broker)
+    sub = broker.open()
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_session() as db:
+        station = WeatherStation(
+            code="KSIG",
+            name="Signal Airport",
+            lat=30.0,
+            lon=-97.0,
+            timezone="America/Chicago",
+            coastal_distance_km=100.0,
+        )
+        db.add(station)
+        await db.flush()
+        db.add(
+            WeatherForecast(
+                station_id=station.id,
+                source="OpenMeteo",
+                forecast_time=datetime.now(timezone.utc),
+                valid_time=datetime.now(timezone.utc),
+                temperature=85.0,
+                raw_data=None,
+            )
+        )
+        await db.commit()
+        # Rollback expires ORM rows, so work from a snapshot like the jobs do
+        station = StationSnapshot.from_orm(station)
+
+        await run_for_station(db, station, 82.0)
+        await db.rollback()
+        assert await sub.next(timeout=0.01) is None
+
+        await run_for_station(db, station, 82.0)
+        await db.commit()
+        event = await sub.next(timeout=0.1)
+        assert event is not None
+        assert event.station_id == station.id
+        assert event.data["delta"] == 3.0
+        assert event.data["id"] is not None
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.singleflight import SingleFlight, model_run
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_fetch():
+    flight: SingleFlight[bytes] = SingleFlight(ttl_seconds=30)
+    calls = 0
+
+    async def fetch() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"forecast"
+
+    key = ("open-meteo", "KAUS", "2025-06-22T21")
+    results = await asyncio.gather(*(flight.do(key, fetch) for _ in range(5)))
+    assert results == [b"forecast"] * 5
+    # A repeat inside the TTL is served without fetching
+    assert await flight.do(key, fetch) == b"forecast"
+    assert calls == 1
+    assert flight.stats()["calls"] == 6
+
+    await flight.do(("open-meteo", "KLAX", "2025-06-22T21"), fetch)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_but_not_cached():
+    flight: SingleFlight[bytes] = SingleFlight(ttl_seconds=30)
+    attempts = 0
+
+    async def flaky() -> bytes:
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        if attempts == 1:
+            raise RuntimeError("upstream 502")
+        return b"ok"
+
+    results = await asyncio.gather(
+        flight.do("k", flaky), flight.do("k", flaky), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await flight.do("k", flaky) == b"ok"
+    assert attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_fetch():
+    flight: SingleFlight[bytes] = SingleFlight(ttl_seconds=0)
+
+    async def slow() -> bytes:
+        await asyncio.sleep(0.02)
+        return b"done"
+
+    first = asyncio.create_task(flight.do("k", slow))
+    second = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0.005)
+    first.cancel()
+    assert await second == b"done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+def test_model_run_is_the_utc_hour():
+    assert (
+        model_run(datetime(2025, 6, 22, 21, 59, tzinfo=timezone.utc)) == "2025-06-22T21"
+    )
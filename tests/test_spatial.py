@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from app.services.spatial import SpatialIndex, grid_groups, haversine_km
+from app.services.station_registry import StationRegistry, StationSnapshot
+
+
+def _stations(n: int, seed: int = 7) -> list[StationSnapshot]:
+    rng = random.Random(seed)
+    return [
+        StationSnapshot(
+            id=i,
+            code=f"K{i:04d}",
+            name=f"Station {i}",
+            lat=rng.uniform(-89.0, 89.0),
+            lon=rng.uniform(-180.0, 180.0),
+            timezone="UTC",
+            coastal_distance_km=None,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _brute(stations, lat, lon):
+    return sorted((haversine_km(lat, lon, s.lat, s.lon), s.id) for s in stations)
+
+
+@pytest.mark.parametrize("lat,lon", [(30.2, -97.7), (0.0, 179.9), (-88.0, 10.0)])
+def test_nearest_and_radius_match_brute_force(lat, lon):
+    stations = _stations(3000)
+    index = SpatialIndex(stations)
+    expected = _brute(stations, lat, lon)
+
+    nearest = index.nearest(lat, lon, k=10)
+    assert [s.id for s, _ in nearest] == [sid for _, sid in expected[:10]]
+    assert [km for _, km in nearest] == pytest.approx([km for km, _ in expected[:10]])
+
+    radius = expected[25][0] + 1.0
+    within = index.within(lat, lon, radius)
+    assert [s.id for s, _ in within] == [sid for km, sid in expected if km <= radius]
+
+
+def test_queries_scan_a_small_fraction_of_stations(monkeypatch):
+    index = SpatialIndex(_stations(5000))
+    scanned = 0
+    leaf = index.tree._leaf
+
+    def counting_leaf(node, q):
+        nonlocal scanned
+        scanned += node.end - node.start
+        return leaf(node, q)
+
+    monkeypatch.setattr(index.tree, "_leaf", counting_leaf)
+    rng = random.Random(1)
+    points = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(200)]
+    for lat, lon in points:
+        index.nearest(lat, lon, k=5)
+    # Brute force computes all 5000 distances per query
+    assert scanned / len(points) < len(index) / 20
+
+    scanned = 0
+    for lat, lon in points:
+        index.within(lat, lon, 250.0)
+    assert scanned / len(points) < len(index) / 20
+
+
+def test_registry_rebuilds_index_after_change():
+    registry = StationRegistry()
+    registry._swap(_stations(10), version=1)
+    first = registry.spatial_index()
+    assert registry.spatial_index() is first
+
+    far = StationSnapshot(99, "KFAR", "Far", 71.3, -156.8, "UTC", None)
+    registry._swap([*registry.all(), far], version=2)
+    assert registry.spatial_index() is not first
+    assert registry.spatial_index().nearest(71.0, -156.0, k=1)[0][0].code == "KFAR"
+
+
+def test_grid_groups_share_cells():
+    a = StationSnapshot(1, "KAAA", "A", 30.21, -97.71, "UTC", None)
+    b = StationSnapshot(2, "KBBB", "B", 30.23, -97.74, "UTC", None)
+    c = StationSnapshot(3, "KCCC", "C", 33.94, -118.40, "UTC", None)
+    assert grid_groups([c, b, a], 0.1) == [[a, b], [c]]
+    assert grid_groups([a, b], 0) == [[a], [b]]
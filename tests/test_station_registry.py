@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, WeatherStation
+from app.services.station_registry import StationRegistry, bump_version
+
+
+async def _session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _station(code: str) -> WeatherStation:
+    return WeatherStation(
+        code=code,
+        name=f"{code} Airport",
+        lat=30.0,
+        lon=-97.0,
+        timezone="America/Chicago",
+        coastal_distance_km=100.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_lookup_by_code_and_id():
+    async_session = await _session()
+    async with async_session() as db:
+        db.add_all([_station("KAUS"), _station("KLAX")])
+        await bump_version(db)
+        await db.commit()
+
+        registry = StationRegistry()
+        await registry.load(db)
+
+        assert len(registry) == 2
+        aus = registry.get("kaus")
+        assert aus is not None and aus.code == "KAUS"
+        assert registry.get_by_id(aus.id) == aus
+        assert registry.get("KXXX") is None
+        assert registry.version == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_falls_back_to_db_on_miss():
+    async_session = await _session()
+    async with async_session() as db:
+        registry = StationRegistry()
+        await registry.load(db)
+        assert registry.get("KMIA") is None
+
+        db.add(_station("KMIA"))
+        await db.commit()
+
+        snap = await registry.resolve(db, "kmia")
+        assert snap is not None and snap.code == "KMIA"
+        assert registry.get("KMIA") == snap
+        assert await registry.resolve(db, "KNOPE") is None
+
+
+@pytest.mark.asyncio
+async def test_version_counter_detects_stale_worker():
+    async_session = await _session()
+    async with async_session() as db:
+        worker_a, worker_b = StationRegistry(), StationRegistry()
+        await worker_a.load(db)
+        await worker_b.load(db)
+
+        # Worker A creates a station and applies it locally
+        station = _station("KDEN")
+        db.add(station)
+        version = await bump_version(db)
+        await db.commit()
+        worker_a.upsert(station, version)
+
+        assert not await worker_a.is_stale(db)
+        assert await worker_b.is_stale(db)
+        assert await worker_b.refresh_if_stale(db)
+        assert worker_b.get("KDEN") is not None
+        assert not await worker_b.refresh_if_stale(db)
+
+
+@pytest.mark.asyncio
+async def test_upsert_does_not_skip_another_workers_change():
+    async_session = await _session()
+    async with async_session() as db:
+        worker_a, worker_b = StationRegistry(), StationRegistry()
+        await worker_a.load(db)
+        await worker_b.load(db)
+
+        # B creates a station first, then A creates one
+        kden = _station("KDEN")
+        db.add(kden)
+        version = await bump_version(db)
+        await db.commit()
+        worker_b.upsert(kden, version)
+        kmia = _station("KMIA")
+        db.add(kmia)
+        version = await bump_version(db)
+        await db.commit()
+        worker_a.upsert(kmia, version)
+
+        # A must not claim version 2 while missing B's station
+        assert worker_a.version == 0
+        assert await worker_a.refresh_if_stale(db)
+        assert worker_a.get("KDEN") is not None and worker_a.version == 2
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from app.services.upstream_cache import ReplayMiss, UpstreamCache, through_cache
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path):
+    cache = UpstreamCache(tmp_path, max_bytes=1 << 20)
+    calls = []
+
+    async def fetch() -> bytes:
+        calls.append(1)
+        return b'{"hourly": {}}'
+
+    body = await through_cache("open-meteo:x", fetch, mode="record", cache=cache)
+    assert body == b'{"hourly": {}}'
+
+    async def offline() -> bytes:
+        raise AssertionError("replay must not reach the upstream")
+
+    assert (
+        await through_cache("open-meteo:x", offline, mode="replay", cache=cache) == body
+    )
+    assert len(calls) == 1
+
+    with pytest.raises(ReplayMiss):
+        await through_cache("open-meteo:y", offline, mode="replay", cache=cache)
+
+
+def test_identical_bodies_share_one_object(tmp_path):
+    cache = UpstreamCache(tmp_path, max_bytes=1 << 20)
+    assert cache.put("a", b"same") == cache.put("b", b"same")
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+    assert cache.get("a") == cache.get("b") == b"same"
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = UpstreamCache(tmp_path, max_bytes=250)
+    cache.put("old", b"o" * 100)
+    cache.put("hot", b"h" * 100)
+    # Make "old" clearly older, then read "hot" so it stays warm
+    old_obj = next(
+        p for p in (tmp_path / "objects").glob("*/*") if p.read_bytes()[:1] == b"o"
+    )
+    os.utime(old_obj, (1, 1))
+    cache.get("hot")
+
+    cache.put("new", b"n" * 100)
+    assert cache.size() <= 250
+    assert cache.get("old") is None
+    assert cache.get("hot") == b"h" * 100
+    assert cache.get("new") == b"n" * 100
+
+
+@pytest.mark.asyncio
+async def test_recordings_are_kept_apart_per_model_run_and_slot(tmp_path, monkeypatch):
+    import httpx
+
+    from app.services import ingest, upstream_cache, wethr
+    from app.services.singleflight import SingleFlight
+    from app.services.station_registry import StationSnapshot
+
+    station = StationSnapshot(
+        1, "KAUS", "Austin", 30.19, -97.67, "America/Chicago", 200.0
+    )
+    monkeypatch.setattr(
+        upstream_cache, "upstream_cache", UpstreamCache(tmp_path, 1 << 20)
+    )
+    monkeypatch.setattr(ingest, "upstream_flight", SingleFlight(ttl_seconds=0))
+    run = "2025-06-22T12"
+    monkeypatch.setattr(ingest, "model_run", lambda: run)
+    highs = iter([91.0, 84.0])
+
+    async def scrape(code, page=None):
+        return next(highs)
+
+    monkeypatch.setattr(wethr, "_scrape_wethr_high", scrape)
+    monkeypatch.setattr(
+        ingest,
+        "_client",
+        httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json={"run": run})
+            )
+        ),
+    )
+
+    monkeypatch.setattr(upstream_cache._settings, "upstream_mode", "record")
+    assert await ingest.fetch_forecast(station) == {"run": "2025-06-22T12"}
+    assert await wethr.fetch_wethr_high("KAUS", day="2025-06-21", slot="23:19") == 91
+    run = "2025-06-22T18"
+    assert await ingest.fetch_forecast(station) == {"run": "2025-06-22T18"}
+    assert await wethr.fetch_wethr_high("KAUS", day="2025-06-21", slot="06:19") == 84
+
+    # Replay serves each run and slot its own response, never the latest one
+    monkeypatch.setattr(upstream_cache._settings, "upstream_mode", "replay")
+    run = "2025-06-22T12"
+    assert await ingest.fetch_forecast(station) == {"run": "2025-06-22T12"}
+    assert await wethr.fetch_wethr_high("KAUS", day="2025-06-21", slot="23:19") == 91
+    assert await wethr.fetch_wethr_high("KAUS", day="2025-06-22", slot="23:19") is None
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta, timezone
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.governor import ResourceGovernor, governed
+from app.models import Base, TmaxCalculation, WeatherStation
+from app.services import wethr
+from app.services.station_registry import StationSnapshot
+from app.services.warmup import (
+    PreparedSlot,
+    SlotLatency,
+    WarmSlots,
+    lead_time,
+    slot_datetime,
+)
+from app.services.write_behind import WriteBehind
+
+STATION = StationSnapshot(
+    id=1,
+    code="KAUS",
+    name="Austin",
+    lat=30.2,
+    lon=-97.7,
+    timezone="America/Chicago",
+    coastal_distance_km=250.0,
+)
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.closed = False
+        self.reloaded = False
+
+    async def goto(self, url: str, timeout: float) -> None:
+        pass
+
+    async def reload(self, timeout: float) -> None:
+        self.reloaded = True
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def test_lead_time_wraps_midnight():
+    assert lead_time("21:19", 60) == (21, 18, 0)
+    assert lead_time("06:07", 45) == (6, 6, 15)
+    assert lead_time("00:00", 30) == (23, 59, 30)
+
+
+def test_slot_datetime():
+    now = datetime(2025, 6, 22, 0, 2, tzinfo=timezone.utc)
+    assert slot_datetime("23:59", now) == datetime(
+        2025, 6, 21, 23, 59, tzinfo=timezone.utc
+    )
+    assert slot_datetime("00:01", now) == datetime(
+        2025, 6, 22, 0, 1, tzinfo=timezone.utc
+    )
+    assert slot_datetime("00:01", now, upcoming=True) == datetime(
+        2025, 6, 23, 0, 1, tzinfo=timezone.utc
+    )
+
+
+@pytest.mark.asyncio
+async def test_prepared_slots_expire_and_invalidate():
+    slots = WarmSlots()
+    now = datetime.now(timezone.utc)
+    stale, fresh = FakePage(), FakePage()
+    await slots.put("ksea", PreparedSlot(STATION, now - timedelta(hours=1), page=stale))
+    await slots.put(
+        "kaus", PreparedSlot(STATION, now + timedelta(minutes=1), (85.0, None), fresh)
+    )
+    # Putting a slot sweeps the ones nobody took
+    assert stale.closed and len(slots) == 1
+
+    slots.invalidate("KAUS")
+    taken = await slots.take("KAUS")
+    assert taken is not None and taken.latest is None and taken.page is fresh
+    assert await slots.take("KAUS") is None
+
+
+def test_slot_latency_splits_warm_and_cold():
+    latency = SlotLatency()
+    slot_at = datetime.now(timezone.utc) - timedelta(seconds=2)
+    latency.record("KAUS", slot_at, warm=True)
+    latency.record("KAUS", slot_at - timedelta(seconds=3), warm=False)
+    stats = latency.stats()
+    assert stats["warm"]["runs"] == stats["cold"]["runs"] == 1
+    assert 2000 <= stats["warm"]["p50_ms"] < stats["cold"]["max_ms"]
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(
+            WeatherStation(
+                code="KAUS",
+                name="Austin",
+                lat=30.2,
+                lon=-97.7,
+                timezone="America/Chicago",
+                coastal_distance_km=250.0,
+            )
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_job_uses_prepared_slot(session_factory, monkeypatch):
+    buffer = WriteBehind(session_factory=session_factory)
+    slots, latency = WarmSlots(), SlotLatency()
+    monkeypatch.setattr("app.db.database.AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(wethr, "write_behind", buffer)
+    monkeypatch.setattr(wethr, "warm_slots", slots)
+    monkeypatch.setattr(wethr, "slot_latency", latency)
+    monkeypatch.setattr(wethr, "should_run", lambda key: True)
+    pages = []
+
+    async def fake_fetch(code, page=None, day=None, slot=None):
+        pages.append(page)
+        return 82.0
+
+    monkeypatch.setattr(wethr, "fetch_wethr_high", fake_fetch)
+
+    page = FakePage()
+    slot = (datetime.now(timezone.utc) - timedelta(seconds=1)).strftime("%H:%M")
+    await slots.put(
+        "KAUS",
+        PreparedSlot(STATION, slot_datetime(slot), latest=(85.0, None), page=page),
+    )
+    await wethr.fetch_and_store_single("KAUS", slot=slot)
+
+    # No forecast rows exist: the signal came from the prepared model temp
+    async with session_factory() as db:
+        calc = (await db.execute(select(TmaxCalculation))).scalar_one()
+    assert calc.cli_forecast == 85.0
+    assert pages == [page] and page.closed
+    assert latency.stats()["warm"]["runs"] == 1
+
+
+@pytest.mark.asyncio
+async def test_parked_page_counts_against_the_browser_budget(
+    session_factory, monkeypatch
+):
+    gov = ResourceGovernor({"browser": 1, "db": 2})
+    slots = WarmSlots()
+    monkeypatch.setattr("app.db.database.AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(wethr, "governor", gov)
+    monkeypatch.setattr(wethr, "warm_slots", slots)
+    monkeypatch.setattr(
+        wethr, "write_behind", WriteBehind(session_factory=session_factory)
+    )
+    monkeypatch.setattr(wethr, "should_run", lambda key: True)
+    page = FakePage()
+
+    async def new_page():
+        return page
+
+    async def fake_fetch(code, page=None, day=None, slot=None):
+        return 82.0
+
+    monkeypatch.setattr(wethr.browser_pool, "new_page", new_page)
+    monkeypatch.setattr(wethr, "fetch_wethr_high", fake_fetch)
+
+    slot = (datetime.now(timezone.utc) + timedelta(minutes=1)).strftime("%H:%M")
+    await wethr.warm_wethr_slot("KAUS", slot)
+    assert gov.stats()["browser"]["in_use"] == 1
+
+    # A live scrape for another station waits for the parked page's slot
+    other = asyncio.create_task(governed(asyncio.sleep, "browser", gov=gov)(0))
+    await asyncio.sleep(0.005)
+    assert not other.done()
+
+    # The slot's job adopts the parked slot instead of queueing behind it
+    await asyncio.wait_for(wethr.fetch_and_store_single("KAUS", slot=slot), 2)
+    await asyncio.wait_for(other, 1)
+    assert page.closed and gov.stats()["browser"]["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_discarded_parked_page_releases_its_slot():
+    gov = ResourceGovernor({"browser": 1})
+    slots = WarmSlots()
+    page = FakePage()
+    await slots.put(
+        "KAUS",
+        PreparedSlot(
+            STATION,
+            datetime.now(timezone.utc) - timedelta(hours=1),
+            page=page,
+            lease=await gov.lease("browser"),
+        ),
+    )
+    assert await slots.take("KAUS") is None
+    assert page.closed and gov.stats()["browser"]["in_use"] == 0
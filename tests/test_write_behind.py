@@ -0,0 +1,236 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import Base, TmaxCalculation, WeatherForecast, WeatherStation
+from app.models.weather import WethrHigh
+from app.services import signals, wethr
+from app.services.station_registry import StationSnapshot
+from app.services.strategy import run_for_station
+from app.services.write_behind import WriteBehind
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(
+            WeatherStation(
+                code="KAUS",
+                name="Austin",
+                lat=30.2,
+                lon=-97.7,
+                timezone="America/Chicago",
+                coastal_distance_km=250.0,
+            )
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+def _high(temp: float) -> WethrHigh:
+    return WethrHigh(
+        station_id=1,
+        date_iso="2025-06-22",
+        wethr_high=temp,
+        scraped_at=datetime.now(timezone.utc),
+    )
+
+
+async def _count(factory, model) -> int:
+    async with factory() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_flushes_at_size_threshold(session_factory):
+    buffer = WriteBehind(max_rows=3, max_delay=60.0, session_factory=session_factory)
+    await buffer.start()
+    try:
+        buffer.add(_high(90.0))
+        buffer.add(_high(91.0))
+        await asyncio.sleep(0.05)
+        assert await _count(session_factory, WethrHigh) == 0
+
+        buffer.add(_high(92.0))
+        for _ in range(50):
+            if buffer.flushes:
+                break
+            await asyncio.sleep(0.01)
+        assert buffer.flushes == 1
+        assert await _count(session_factory, WethrHigh) == 3
+    finally:
+        await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flushes_at_time_threshold(session_factory):
+    buffer = WriteBehind(max_rows=100, max_delay=0.05, session_factory=session_factory)
+    await buffer.start()
+    try:
+        buffer.add(_high(90.0))
+        await asyncio.sleep(0.2)
+        assert len(buffer) == 0
+        assert await _count(session_factory, WethrHigh) == 1
+    finally:
+        await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_forced_flush_runs_callbacks_with_ids(session_factory):
+    buffer = WriteBehind(session_factory=session_factory)
+    seen: list[int] = []
+    buffer.add(_high(90.0), on_flush=seen.append)
+    buffer.add(_high(91.0))
+    buffer.add(_high(92.0), on_flush=seen.append)
+    assert seen == []
+
+    assert await buffer.flush() == 3
+    assert seen == [1, 3]
+    assert await buffer.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_shutdown_flush_is_journaled_and_replayed(
+    session_factory, tmp_path
+):
+    journal = tmp_path / "wb.journal"
+
+    class Down:
+        def __call__(self):
+            raise ConnectionError("database unreachable")
+
+    buffer = WriteBehind(journal=journal, session_factory=Down())  # type: ignore[arg-type]
+    buffer.add(_high(90.0))
+    buffer.add(_high(91.0))
+    await buffer.stop()
+    assert journal.exists()
+    assert len(buffer) == 0
+
+    restarted = WriteBehind(journal=journal, session_factory=session_factory)
+    await restarted.start()
+    await restarted.stop()
+    assert not journal.exists()
+    async with session_factory() as db:
+        highs = (await db.execute(select(WethrHigh.wethr_high))).scalars().all()
+    assert sorted(highs) == [90.0, 91.0]
+
+
+@pytest.mark.asyncio
+async def test_rows_added_after_stop_are_journaled(session_factory, tmp_path):
+    journal = tmp_path / "wb.journal"
+    buffer = WriteBehind(journal=journal, session_factory=session_factory)
+    await buffer.start()
+    buffer.add(_high(90.0))
+    await buffer.stop()
+    assert not journal.exists()
+
+    # A job still running when the scheduler shut down
+    buffer.add(_high(91.0))
+    assert len(buffer) == 0 and journal.exists()
+
+    # Without a journal a late row is refused rather than dropped
+    unjournaled = WriteBehind(session_factory=session_factory)
+    await unjournaled.stop()
+    with pytest.raises(RuntimeError):
+        unjournaled.add(_high(92.0))
+
+    restarted = WriteBehind(journal=journal, session_factory=session_factory)
+    await restarted.start()
+    await restarted.stop()
+    async with session_factory() as db:
+        highs = (await db.execute(select(WethrHigh.wethr_high))).scalars().all()
+    assert sorted(highs) == [90.0, 91.0]
+
+
+@pytest.mark.asyncio
+async def test_buffered_signal_is_published_after_flush(session_factory, monkeypatch):
+    broker = signals.SignalBroker()
+    monkeypatch.setattr("app.services.strategy.broker", broker)
+    sub = broker.open()
+    buffer = WriteBehind(session_factory=session_factory)
+    async with session_factory() as db:
+        db.add(
+            WeatherForecast(
+                station_id=1,
+                source="ensemble",
+                forecast_time=datetime.now(timezone.utc),
+                valid_time=datetime.now(timezone.utc),
+                temperature=85.0,
+                raw_data=None,
+            )
+        )
+        await db.commit()
+        station = StationSnapshot.from_orm(await db.get(WeatherStation, 1))
+        await run_for_station(db, station, 82.0, sink=buffer)
+    assert await sub.next(timeout=0.01) is None
+    assert await _count(session_factory, TmaxCalculation) == 0
+
+    await buffer.flush()
+    event = await sub.next(timeout=0.1)
+    assert event is not None
+    assert event.data["id"] == 1
+    assert event.data["delta"] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_store_wethr_data_writes_only_a_high(session_factory, monkeypatch):
+    buffer = WriteBehind(session_factory=session_factory)
+    monkeypatch.setattr(wethr, "write_behind", buffer)
+
+    async with session_factory() as db:
+        station = await wethr.store_wethr_data(db, "KAUS", 93.0)
+    assert station is not None and station.code == "KAUS"
+    await buffer.flush()
+
+    assert await _count(session_factory, WethrHigh) == 1
+    assert await _count(session_factory, WeatherForecast) == 0
+
+
+@pytest.mark.asyncio
+async def test_poison_row_does_not_block_the_others(session_factory, tmp_path):
+    journal = tmp_path / "wb.journal"
+    buffer = WriteBehind(journal=journal, session_factory=session_factory)
+    published = []
+    for temp in (90.0, 91.0, None, 92.0, 93.0):
+        # wethr_high is NOT NULL, so the third row can never be inserted
+        buffer.add(_high(temp), on_flush=published.append)
+
+    assert await buffer.flush() == 4
+    assert await _count(session_factory, WethrHigh) == 4
+    assert len(published) == 4 and len(buffer) == 0
+    assert buffer.stats()["rejected"] == 1
+    assert buffer.rejected_path.exists()
+
+    # Later flushes are unaffected
+    buffer.add(_high(94.0))
+    assert await buffer.flush() == 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_database_requeues_the_batch(session_factory):
+    from sqlalchemy.exc import OperationalError
+
+    buffer = WriteBehind(session_factory=session_factory)
+    buffer.add(_high(90.0))
+    buffer.add(_high(91.0))
+
+    async def down(taken):
+        raise OperationalError("INSERT", {}, ConnectionError("connection refused"))
+
+    write = buffer._write
+    buffer._write = down
+    with pytest.raises(OperationalError):
+        await buffer.flush()
+    assert len(buffer) == 2 and buffer.stats()["rejected"] == 0
+
+    buffer._write = write
+    assert await buffer.flush() == 2